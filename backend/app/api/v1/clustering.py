@@ -0,0 +1,40 @@
+from fastapi import APIRouter, HTTPException
+from app.models.schemas import (
+    ClusteringTrainRequest, ClusteringTrainingStatus, ClusterProfilesResponse, HouseholdCluster
+)
+from app.services import clustering_service
+
+router = APIRouter()
+
+@router.post("/train", response_model=ClusteringTrainingStatus, status_code=202)
+def train_clustering(request: ClusteringTrainRequest):
+    """Queue K-Prototypes training as a batch job; poll /train/status for progress"""
+    params = request.dict()
+    try:
+        state = clustering_service.start_training(params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if state is None:
+        raise HTTPException(status_code=409, detail="A clustering run is already in progress")
+    return state
+
+@router.get("/train/status", response_model=ClusteringTrainingStatus)
+def get_training_status():
+    """Get progress of the current or last clustering run"""
+    return clustering_service.get_training_status()
+
+@router.get("/profiles", response_model=ClusterProfilesResponse)
+def get_profiles():
+    """Get household cluster profiles of the current model"""
+    profiles = clustering_service.get_profiles()
+    if profiles is None:
+        raise HTTPException(status_code=404, detail="No clustering model has been trained yet")
+    return profiles
+
+@router.get("/households/{hh_id}", response_model=HouseholdCluster)
+def get_household_cluster(hh_id: str):
+    """Get the cluster assignment of one household"""
+    result = clustering_service.get_household_cluster(hh_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"No cluster assignment for household {hh_id}")
+    return result
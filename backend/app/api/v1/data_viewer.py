@@ -1,13 +1,21 @@
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import StreamingResponse
 from typing import List, Optional, Dict, Any
-from app.models.schemas import DataTableResponse, ColumnInfo
+from app.models.schemas import DataTableResponse, ColumnInfo, Facet, TableProfileResponse
 from app.services import data_service
 import json
 from datetime import datetime
 
 router = APIRouter()
 
+# URL name (as in /poverty-data, /predictions) or table name -> table
+PROFILE_TABLES = {
+    'poverty-data': 'poverty_data',
+    'poverty_data': 'poverty_data',
+    'predictions': 'poverty_predictions',
+    'poverty_predictions': 'poverty_predictions'
+}
+
 @router.get("/poverty-data", response_model=DataTableResponse)
 def get_poverty_data(
     page: int = Query(1, ge=1),
@@ -75,6 +83,28 @@ def get_poverty_data_columns():
     """Get available columns for poverty data table"""
     return data_service.get_available_columns('poverty_data')
 
+@router.get("/poverty-data/facets", response_model=List[Facet])
+def get_poverty_data_facets(
+    columns: str = Query(...),  # Comma-separated list
+    filters: Optional[str] = Query(None),  # JSON string
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """Distinct values with counts per column, under the other active filters"""
+    column_list = [c.strip() for c in columns.split(',') if c.strip()]
+
+    # Parse filters
+    filter_dict = None
+    if filters:
+        try:
+            filter_dict = json.loads(filters)
+        except json.JSONDecodeError:
+            filter_dict = None
+
+    try:
+        return data_service.get_facets(column_list, filters=filter_dict, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.get("/predictions/columns", response_model=List[ColumnInfo])
 def get_predictions_columns():
     """Get available columns for predictions table"""
@@ -151,3 +181,38 @@ def export_predictions_csv(
         media_type="text/csv",
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
+
+@router.get("/{table}/profile", response_model=TableProfileResponse)
+def get_table_profile(
+    table: str,
+    columns: Optional[str] = Query(None),  # Comma-separated list
+    filters: Optional[str] = Query(None),  # JSON string
+    bins: int = Query(10, ge=2, le=100),
+    top_k: int = Query(10, ge=1, le=100),
+    correlation: bool = Query(True)
+):
+    """Column statistics (nulls, min/max, distinct, top values, histograms) and correlations"""
+    if table not in PROFILE_TABLES:
+        raise HTTPException(status_code=404, detail=f"Unknown table: {table}")
+
+    # Parse columns
+    column_list = None
+    if columns:
+        column_list = [c.strip() for c in columns.split(',')]
+
+    # Parse filters
+    filter_dict = None
+    if filters:
+        try:
+            filter_dict = json.loads(filters)
+        except json.JSONDecodeError:
+            filter_dict = None
+
+    return data_service.get_column_profile(
+        PROFILE_TABLES[table],
+        columns=column_list,
+        filters=filter_dict,
+        bins=bins,
+        top_k=top_k,
+        correlation=correlation
+    )
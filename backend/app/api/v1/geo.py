@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Query
+from typing import Optional
+from app.models.schemas import GeoSearchResponse
+from app.services import geo_service
+
+router = APIRouter()
+
+@router.get("/search", response_model=GeoSearchResponse)
+def search_places(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    level: Optional[str] = Query(None, pattern="^(region|province|city|barangay)$")
+):
+    """Typeahead over region, province, city and barangay names and PSGC codes"""
+    return geo_service.search(q, limit=limit, level=level)
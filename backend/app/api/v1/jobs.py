@@ -0,0 +1,58 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import FileResponse
+from typing import List, Optional
+from app.models.schemas import JobRequest, JobResponse
+from app.services import job_service
+
+router = APIRouter()
+
+@router.post("", response_model=JobResponse, status_code=202)
+def submit_job(request: JobRequest):
+    """Queue a long-running job (export, train, score_roster, cluster_train)"""
+    try:
+        return job_service.submit_job(request.type, request.params, request.priority, request.lane)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except job_service.JobConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@router.get("", response_model=List[JobResponse])
+def list_jobs(
+    status: Optional[str] = Query(None),
+    type: Optional[str] = Query(None),
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """List jobs, most recent first"""
+    return job_service.list_jobs(status=status, job_type=type, limit=limit)
+
+@router.get("/{job_id}", response_model=JobResponse)
+def get_job(job_id: str):
+    """Get status and progress of a job"""
+    job = job_service.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+@router.get("/{job_id}/result")
+def get_job_result(job_id: str):
+    """Download the result file of a completed job"""
+    job = job_service.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    path = job_service.get_result_path(job_id)
+    if path is None:
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is {job['status']}, no result available")
+    return FileResponse(path, filename=job['result_file'])
+
+@router.delete("/{job_id}", response_model=JobResponse)
+def cancel_job(job_id: str, purge: bool = Query(False)):
+    """Cancel a queued or running job; purge=true deletes a finished job and its files"""
+    if purge:
+        job = job_service.get_job(job_id)
+        if job is None or not job_service.delete_job(job_id):
+            raise HTTPException(status_code=409, detail=f"Job {job_id} is missing or not finished")
+        return job
+    job = job_service.cancel_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
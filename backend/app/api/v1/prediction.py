@@ -1,15 +1,66 @@
-from fastapi import APIRouter
-from app.models.schemas import PredictionRequest, PredictionResponse
-from app.services import ml_service
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+from app.models.schemas import (
+    PredictionRequest, PredictionResponse, BatchPredictionRequest, BatchPredictionResponse, DriftReport,
+    PredictionStatsResponse
+)
+from app.services import drift_service, ml_service, prediction_stats_service
 
 router = APIRouter()
 
-@router.post("/poverty", response_model=PredictionResponse)
-def predict_poverty(request: PredictionRequest):
+@router.post("/poverty", response_model=PredictionResponse, response_model_exclude_none=True)
+def predict_poverty(
+    request: PredictionRequest,
+    explain: bool = Query(False, description="Include per-feature contributions to the decision")
+):
     """Predict poverty status"""
-    result = ml_service.predict_poverty(request.dict())
+    try:
+        result = ml_service.predict_poverty(request.dict(), explain=explain)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return result
 
+@router.post("/poverty/batch", response_model=BatchPredictionResponse, response_model_exclude_none=True)
+def predict_poverty_batch(
+    request: BatchPredictionRequest,
+    explain: bool = Query(False, description="Include per-feature contributions to each decision")
+):
+    """Predict poverty status for many households at once"""
+    try:
+        predictions = ml_service.predict_poverty_batch([h.dict() for h in request.households], explain=explain)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"predictions": predictions}
+
+@router.get("/drift", response_model=DriftReport)
+def get_input_drift(
+    province: Optional[str] = Query(None, description="Only this province (ALL for the pooled entry)"),
+    refresh: bool = Query(False, description="Recompute now instead of returning the scheduled report")
+):
+    """PSI/KS drift of recent prediction inputs against the roster, per province and feature"""
+    report = drift_service.get_report(refresh=refresh)
+    if province is not None:
+        report = {**report, 'provinces': [p for p in report['provinces'] if p['province'] == province]}
+    return report
+
+@router.get("/stats", response_model=PredictionStatsResponse)
+def get_prediction_stats(
+    grain: str = Query("day", pattern="^(hour|day)$"),
+    start: Optional[datetime] = Query(None, description="Default: 48 hours (hour) or 30 days (day) before end"),
+    end: Optional[datetime] = Query(None, description="Exclusive; default now"),
+    by: str = Query("province_name,model_version", description="Comma-separated split; empty for totals"),
+    province: Optional[str] = None,
+    model_version: Optional[str] = None
+):
+    """Prediction counts, Poor share and probability quantiles per hour or day, from the rollups"""
+    try:
+        return prediction_stats_service.get_prediction_stats(
+            grain, start, end, [d.strip() for d in by.split(',') if d.strip()], province, model_version
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.get("/questionnaire")
 def get_questionnaire():
     """Get questionnaire fields"""
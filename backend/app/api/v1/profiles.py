@@ -0,0 +1,61 @@
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import FileResponse
+from typing import List, Optional
+from app.config import settings
+from app.models.schemas import ProfileSummary
+from app.utils import profiling
+
+router = APIRouter()
+
+def _check_token(token: Optional[str]):
+    # Profiles hold SQL and request parameters: admin only, and closed without a token
+    if not settings.profiling_token:
+        raise HTTPException(status_code=403, detail="Profile access is disabled: PROFILING_TOKEN is not set")
+    if not profiling.token_matches(token):
+        raise HTTPException(status_code=403, detail="Missing or invalid X-Profile token")
+
+@router.get("", response_model=List[ProfileSummary])
+def list_profiles(
+    limit: int = Query(50, ge=1, le=500),
+    min_ms: float = Query(0, ge=0),
+    route: Optional[str] = Query(None),
+    x_profile: Optional[str] = Header(None)
+):
+    """Recent request profiles, most recent first"""
+    _check_token(x_profile)
+    return profiling.list_profiles(limit=limit, min_ms=min_ms, route=route)
+
+@router.get("/{profile_id}", response_model=ProfileSummary)
+def get_profile(profile_id: str, x_profile: Optional[str] = Header(None)):
+    """Profile summary: duration, stage timings and the ClickHouse queries run"""
+    _check_token(x_profile)
+    profile = profiling.get_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} not found")
+    return profile
+
+@router.get("/{profile_id}/speedscope")
+def get_speedscope(profile_id: str, x_profile: Optional[str] = Header(None)):
+    """Sampled stacks in speedscope format (https://www.speedscope.app)"""
+    _check_token(x_profile)
+    path = profiling.get_profile_file(profile_id, 'speedscope')
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} not found")
+    return FileResponse(path, media_type="application/json", filename=f"{profile_id}.speedscope.json")
+
+@router.get("/{profile_id}/folded")
+def get_folded(profile_id: str, x_profile: Optional[str] = Header(None)):
+    """Collapsed stacks, for flamegraph.pl"""
+    _check_token(x_profile)
+    path = profiling.get_profile_file(profile_id, 'folded')
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} not found")
+    return FileResponse(path, media_type="text/plain", filename=f"{profile_id}.folded")
+
+@router.delete("/{profile_id}")
+def delete_profile(profile_id: str, x_profile: Optional[str] = Header(None)):
+    """Delete a saved profile"""
+    _check_token(x_profile)
+    if not profiling.delete_profile(profile_id):
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} not found")
+    return {"deleted": profile_id}
@@ -1,16 +1,52 @@
-from fastapi import APIRouter
-from typing import List
-from app.models.schemas import CoverageMetrics, EfficiencyMetrics
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from app.models.schemas import CoverageMetrics, EfficiencyMetrics, EligibleNotEnrolledMetrics
 from app.services import targeting_service
+from app.utils import sampling
 
 router = APIRouter()
 
+ACCURACY_DESCRIPTION = (
+    "exact: full scan; approx: estimate from a sample of households with 95% margins; "
+    "progressive: server-sent 'approx' then 'exact' events"
+)
+
+def _progressive(compute, model):
+    """Stream compute('approx') then compute('exact'), each validated like the JSON response"""
+    events = sampling.progressive_events(
+        lambda accuracy: [model(**row).model_dump() for row in compute(accuracy)]
+    )
+    return StreamingResponse(
+        events, media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/coverage", response_model=List[CoverageMetrics])
-def get_coverage():
+def get_coverage(
+    accuracy: str = Query("exact", pattern=sampling.ACCURACY_PATTERN, description=ACCURACY_DESCRIPTION),
+    sample: Optional[float] = Query(None, ge=0.001, le=1, description="Share of households read by approx")
+):
     """Get 4Ps coverage metrics by province"""
-    return targeting_service.get_coverage_by_province()
+    if accuracy == "progressive":
+        return _progressive(
+            lambda mode: targeting_service.get_coverage_by_province(mode, sample), CoverageMetrics
+        )
+    return targeting_service.get_coverage_by_province(accuracy, sample)
 
 @router.get("/efficiency", response_model=List[EfficiencyMetrics])
-def get_efficiency():
+def get_efficiency(
+    accuracy: str = Query("exact", pattern=sampling.ACCURACY_PATTERN, description=ACCURACY_DESCRIPTION),
+    sample: Optional[float] = Query(None, ge=0.001, le=1, description="Share of households read by approx")
+):
     """Get targeting efficiency metrics by province"""
-    return targeting_service.get_efficiency_by_province()
+    if accuracy == "progressive":
+        return _progressive(
+            lambda mode: targeting_service.get_efficiency_by_province(mode, sample), EfficiencyMetrics
+        )
+    return targeting_service.get_efficiency_by_province(accuracy, sample)
+
+@router.get("/eligible-not-enrolled", response_model=List[EligibleNotEnrolledMetrics])
+def get_eligible_not_enrolled():
+    """Get households scored as poor but not enrolled in 4Ps, by province"""
+    return targeting_service.get_eligible_not_enrolled_by_province()
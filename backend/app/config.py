@@ -7,10 +7,72 @@ class Settings(BaseSettings):
     clickhouse_user: str = "admin"
     clickhouse_password: str = "admin123"
     clickhouse_db: str = "poverty_db"
+    # Sharded deployment (docker-compose.cluster.yml): comma-separated host:port list
+    # tried in turn, overriding host/port, and the cluster name of the Distributed tables
+    clickhouse_hosts: str = ""
+    clickhouse_cluster: str = ""
 
     # API
     api_cors_origins: str = "http://localhost:3000"
 
+    # Metrics: queries slower than this are logged with their SQL
+    slow_query_ms: int = 500
+    slow_query_max_sql: int = 2000
+
+    # Load the ClickHouse driver and ML models in a background thread at startup
+    # (see app/utils/warmup.py) instead of on the first request that needs them
+    warmup_enabled: bool = True
+
+    # Background jobs
+    jobs_dir: str = "/app/jobs"
+    jobs_interactive_workers: int = 2
+    jobs_batch_workers: int = 1
+
+    # Profiling (see app/utils/profiling.py); nothing is installed unless enabled.
+    # Requests sending "X-Profile: <profiling_token>" are always profiled and saved;
+    # sampled requests are saved when slower than profiling_min_ms
+    profiling_enabled: bool = False
+    profiling_token: str = ""
+    profiling_sample_rate: float = 0.0
+    profiling_interval_ms: float = 1.0
+    profiling_min_ms: int = 500
+    profiling_dir: str = "/app/profiles"
+    profiling_keep: int = 200
+
+    # Data-viewer result cache (see app/utils/query_cache.py); 0 bytes disables it.
+    # Table data versions are re-read at most every query_cache_version_ttl_s,
+    # so cached pages can lag a write by that long
+    query_cache_max_bytes: int = 64 * 1024 * 1024
+    query_cache_version_ttl_s: float = 2.0
+    query_cache_prefetch: bool = True
+
+    # Prediction memo (see app/services/ml_service.py): model outputs of recently
+    # seen questionnaires, per model; 0 entries disables it
+    prediction_cache_size: int = 10000
+    prediction_cache_ttl_s: float = 3600.0
+
+    # Prediction log (see app/services/prediction_log_service.py): served predictions are
+    # inserted into poverty_predictions in batches every prediction_log_flush_s (sooner
+    # once prediction_log_batch_rows wait); beyond prediction_log_max_rows the oldest are dropped
+    prediction_log_enabled: bool = True
+    prediction_log_flush_s: float = 1.0
+    prediction_log_batch_rows: int = 5000
+    prediction_log_max_rows: int = 100000
+
+    # accuracy=approx on the targeting endpoints reads this share of poverty_data_sampled
+    approx_sample_fraction: float = 0.05
+
+    # Input-drift monitor (see app/services/drift_service.py): prediction inputs are
+    # counted in drift_windows windows of drift_window_s and compared with the roster
+    # every drift_interval_s; PSI from drift_psi_warn is 'warn', from drift_psi_alert 'drift'
+    drift_enabled: bool = True
+    drift_window_s: int = 3600
+    drift_windows: int = 24
+    drift_interval_s: int = 300
+    drift_min_samples: int = 200
+    drift_psi_warn: float = 0.1
+    drift_psi_alert: float = 0.25
+
     class Config:
         env_file = ".env"
 
@@ -1,12 +1,94 @@
-import clickhouse_connect
+import itertools
+import time
+from contextlib import contextmanager
 from app.config import settings
+from app.utils.metrics import observe_query
+
+class InstrumentedClient:
+    """ClickHouse client wrapper that records timings and query summaries"""
+
+    def __init__(self, client):
+        self._client = client
+
+    def __getattr__(self, name):
+        # Anything not instrumented goes straight to the real client
+        return getattr(self._client, name)
+
+    def query(self, query, *args, **kwargs):
+        started = time.perf_counter()
+        result = self._client.query(query, *args, **kwargs)
+        observe_query('query', query, time.perf_counter() - started,
+                      getattr(result, 'summary', None), result.row_count)
+        return result
+
+    def command(self, cmd, *args, **kwargs):
+        started = time.perf_counter()
+        result = self._client.command(cmd, *args, **kwargs)
+        observe_query('command', cmd, time.perf_counter() - started, getattr(result, 'summary', None))
+        return result
+
+    def query_df(self, query, *args, **kwargs):
+        started = time.perf_counter()
+        df = self._client.query_df(query, *args, **kwargs)
+        observe_query('query_df', query, time.perf_counter() - started, result_rows=len(df))
+        return df
+
+    def insert(self, table, data, *args, **kwargs):
+        started = time.perf_counter()
+        result = self._client.insert(table, data, *args, **kwargs)
+        observe_query('insert', f"INSERT INTO {table}", time.perf_counter() - started,
+                      getattr(result, 'summary', None))
+        return result
+
+    @contextmanager
+    def query_column_block_stream(self, query, *args, **kwargs):
+        # Timed until the stream is closed, so it covers consuming the blocks
+        started = time.perf_counter()
+        with self._client.query_column_block_stream(query, *args, **kwargs) as stream:
+            yield stream
+        observe_query('stream', query, time.perf_counter() - started)
+
+def _nodes():
+    """(host, port) pairs to connect to: clickhouse_hosts when set, else clickhouse_host/port"""
+    nodes = []
+    for entry in settings.clickhouse_hosts.split(','):
+        host, _, port = entry.strip().partition(':')
+        if host:
+            nodes.append((host, int(port) if port else settings.clickhouse_port))
+    return nodes or [(settings.clickhouse_host, settings.clickhouse_port)]
+
+# Successive connections start at successive nodes, spreading clients over the cluster
+_next_node = itertools.count()
+
+def _connect():
+    # Imported on first connection: clickhouse_connect loads pandas when it is installed
+    import clickhouse_connect
+    from clickhouse_connect.driver.exceptions import OperationalError
+
+    nodes = _nodes()
+    start = next(_next_node)
+    for attempt in range(len(nodes)):
+        host, port = nodes[(start + attempt) % len(nodes)]
+        try:
+            return clickhouse_connect.get_client(
+                host=host,
+                port=port,
+                username=settings.clickhouse_user,
+                password=settings.clickhouse_password,
+                database=settings.clickhouse_db
+            )
+        except OperationalError:
+            # Node unreachable: any other node can serve the Distributed tables
+            if attempt == len(nodes) - 1:
+                raise
+
+_client_factory = _connect
+
+def set_client_factory(factory=None):
+    """Swap how raw clients are created (e.g. an embedded stand-in for benchmarks); None restores the default"""
+    global _client_factory
+    _client_factory = factory or _connect
 
 def get_clickhouse_client():
     """Get ClickHouse client connection"""
-    return clickhouse_connect.get_client(
-        host=settings.clickhouse_host,
-        port=settings.clickhouse_port,
-        username=settings.clickhouse_user,
-        password=settings.clickhouse_password,
-        database=settings.clickhouse_db
-    )
+    return InstrumentedClient(_client_factory())
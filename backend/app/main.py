@@ -1,11 +1,37 @@
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
+from app.utils.metrics import PrometheusMiddleware, TimedJSONResponse, metrics_response
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Heavy imports are lazy; load them in the background rather than before serving
+    if settings.warmup_enabled:
+        from app.utils.warmup import start_warmup
+        start_warmup()
+    if settings.drift_enabled:
+        from app.services.drift_service import start_scheduler
+        start_scheduler()
+    if settings.prediction_log_enabled:
+        from app.services.prediction_log_service import start_writer
+        start_writer()
+    yield
+    if settings.prediction_log_enabled:
+        # Rows still buffered would be lost with the process
+        from app.services.prediction_log_service import flush
+        try:
+            flush()
+        except Exception as e:
+            logging.getLogger('app.prediction_log').warning("Final flush failed: %s: %s", type(e).__name__, e)
 
 app = FastAPI(
     title="DSWD Poverty Analysis API",
     description="API for poverty targeting analysis and prediction",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=TimedJSONResponse,
+    lifespan=lifespan
 )
 
 # CORS
@@ -17,6 +43,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Added last so it is outermost and times everything, CORS included
+app.add_middleware(PrometheusMiddleware)
+
 @app.get("/")
 def root():
     return {"message": "DSWD Poverty Analysis API", "status": "running"}
@@ -25,9 +54,24 @@ def root():
 def health():
     return {"status": "healthy"}
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint"""
+    return metrics_response()
+
 # Import routers
-from app.api.v1 import targeting, prediction, data_viewer
+from app.api.v1 import targeting, clustering, prediction, data_viewer, geo, jobs
 
 app.include_router(targeting.router, prefix="/api/v1/targeting", tags=["Targeting Analysis"])
+app.include_router(clustering.router, prefix="/api/v1/clustering", tags=["Clustering"])
 app.include_router(prediction.router, prefix="/api/v1/predict", tags=["Prediction"])
 app.include_router(data_viewer.router, prefix="/api/v1/data-viewer", tags=["Data Viewer"])
+app.include_router(geo.router, prefix="/api/v1/geo", tags=["Geography"])
+app.include_router(jobs.router, prefix="/api/v1/jobs", tags=["Jobs"])
+
+# Opt-in: when disabled nothing is wrapped or added, so requests pay nothing
+if settings.profiling_enabled:
+    from app.api.v1 import profiles
+    from app.utils.profiling import install_profiling
+    app.include_router(profiles.router, prefix="/api/v1/profiles", tags=["Profiling"])
+    install_profiling(app)
@@ -0,0 +1,316 @@
+"""Household segmentation (Objective 2) with K-Prototypes.
+
+Training fits on a sample of poverty_data stratified by province and
+poverty status. The model is then applied to every household in streamed
+column blocks, which fills household_clusters. The same pass accumulates
+the per-cluster profile statistics. Profiles are stored in the model
+artifact so the API serves them without touching the roster.
+
+Run from the backend directory (or /app inside the container):
+
+    python -m app.ml.clustering --clusters 5
+    python -m app.ml.clustering --clusters 4 --sample-size 50000 --n-init 16
+"""
+import argparse
+import os
+import pickle
+import time
+from datetime import datetime
+
+import numpy as np
+from sklearn.preprocessing import StandardScaler
+
+from app.database import get_clickhouse_client
+from app.ml.kprototypes import MAX_CODE, fit_kprototypes, predict_kprototypes, silhouette
+
+CLUSTER_MODEL_PATH = '/app/models/clustering_model.pkl'
+
+ASSET_COLUMNS = ['radio', 'television', 'ref', 'motorcycle', 'phone', 'pc']
+
+# Numeric features and how to compute them in ClickHouse
+NUMERIC_FEATURES = {
+    'no_of_indiv': 'toFloat64(no_of_indiv)',
+    'no_sleeping_rooms': 'toFloat64(no_sleeping_rooms)',
+    'l_stay': 'toFloat64(l_stay)',
+    'asset_count': 'toFloat64(' + ' + '.join(f"({c} = 1)" for c in ASSET_COLUMNS) + ')'
+}
+
+# Categorical survey codes, compared by equality
+CATEGORICAL_FEATURES = [
+    'urb_rur', 'house_type', 'roof_mat', 'out_wall', 'toilet_facilities', 'water_supply', 'has_electricity'
+]
+
+STRATA = ['province_name', 'poor']
+
+ASSIGNMENT_COLUMNS = [
+    'hh_id', 'province_name', 'city_name', 'barangay_name',
+    'cluster_id', 'cluster_distance', 'cluster_probability', 'model_version'
+]
+KEY_COLUMNS = ASSIGNMENT_COLUMNS[:4]
+
+# Roster values averaged per cluster during assignment (flags become rates)
+PROFILE_EXPRESSIONS = {
+    'no_of_indiv': 'no_of_indiv',
+    'no_sleeping_rooms': 'no_sleeping_rooms',
+    'house_type': 'house_type',
+    'urb_rur': 'urb_rur = 1',
+    'received_pppp': 'received_pppp = 1',
+    'poor': 'poor = 1',
+    **{c: f"{c} = 1" for c in ASSET_COLUMNS}
+}
+PROFILE_COLUMNS = list(PROFILE_EXPRESSIONS)
+
+# Segment names from poorest to least poor; clusters are named by their rank
+CLUSTER_TIERS = [
+    ('Ultra-Poor', "Large families with minimal assets and weak housing; high 4Ps dependency"),
+    ('Moderate Poor', "Some basic assets and adequate housing; mixed program participation"),
+    ('Near-Poor/Vulnerable', "Most assets but still at risk of falling into poverty"),
+    ('Non-Poor', "Full asset ownership and good housing; minimal program need")
+]
+
+
+def split_features(features=None):
+    """Split a requested feature list into (numeric, categorical), validating names"""
+    if not features:
+        return list(NUMERIC_FEATURES), list(CATEGORICAL_FEATURES)
+    unknown = [f for f in features if f not in NUMERIC_FEATURES and f not in CATEGORICAL_FEATURES]
+    if unknown:
+        raise ValueError(f"Unknown clustering features: {unknown}")
+    numeric = [f for f in NUMERIC_FEATURES if f in features]
+    categorical = [f for f in CATEGORICAL_FEATURES if f in features]
+    if not numeric and not categorical:
+        raise ValueError("At least one clustering feature is required")
+    return numeric, categorical
+
+
+def _feature_select(numeric, categorical) -> str:
+    return ', '.join([f"{NUMERIC_FEATURES[f]} AS {f}" for f in numeric] + categorical)
+
+
+def _encode(columns, numeric, categorical, scaler=None):
+    """Column arrays -> (standardized numeric matrix, categorical code matrix)"""
+    X_num = np.column_stack([np.asarray(columns[f], dtype=np.float64) for f in numeric]) \
+        if numeric else np.empty((len(columns[categorical[0]]), 0))
+    X_cat = np.column_stack([np.asarray(columns[f], dtype=np.int64) for f in categorical]) \
+        if categorical else np.empty((len(X_num), 0), dtype=np.int64)
+    # Codes outside the survey range all count as the same "other" category
+    np.clip(X_cat, 0, MAX_CODE - 1, out=X_cat)
+    if scaler is not None and numeric:
+        X_num = scaler.transform(X_num)
+    return X_num, X_cat
+
+
+def stratified_sample(client, numeric, categorical, sample_size: int):
+    """Proportional sample per (province, poor) stratum, deterministic by hh_id hash
+
+    ClickHouse pre-filters on the hash with some headroom; the exact
+    per-stratum quotas are then taken in NumPy, lowest hash first.
+    """
+    strata = client.query(
+        f"SELECT {', '.join(STRATA)}, count() FROM poverty_data GROUP BY {', '.join(STRATA)}"
+    ).result_rows
+    total = sum(row[-1] for row in strata)
+    if total == 0:
+        raise ValueError("poverty_data is empty")
+    fraction = min(1.0, sample_size / total)
+    quotas = {tuple(row[:-1]): max(1, round(row[-1] * fraction)) for row in strata}
+
+    # 25% headroom (plus a floor for tiny strata) so every quota can be met
+    threshold = min(1_000_000, int(np.ceil(fraction * 1.25 * 1_000_000)) + 1000)
+    query = f"""
+        SELECT {', '.join(STRATA)}, cityHash64(hh_id, 'cluster') AS h, {_feature_select(numeric, categorical)}
+        FROM poverty_data
+        WHERE h % 1000000 < {threshold}
+    """
+    result = client.query(query)
+    columns = dict(zip(result.column_names, result.result_columns))
+
+    keys = list(zip(*(columns[s] for s in STRATA)))
+    stratum_index = {key: i for i, key in enumerate(quotas)}
+    stratum = np.array([stratum_index[key] for key in keys], dtype=np.int64)
+    quota = np.array(list(quotas.values()), dtype=np.int64)
+
+    # Rank rows within their stratum by hash and keep the first `quota`
+    order = np.lexsort((np.asarray(columns['h'], dtype=np.uint64), stratum))
+    sorted_strata = stratum[order]
+    starts = np.searchsorted(sorted_strata, np.arange(len(quota)))
+    rank = np.arange(len(order)) - starts[sorted_strata]
+    keep = np.sort(order[rank < quota[sorted_strata]])
+
+    X_num, X_cat = _encode(columns, numeric, categorical)
+    return X_num[keep], X_cat[keep]
+
+
+def _soft_assignment(distances) -> np.ndarray:
+    """Relative confidence in the nearest cluster (softmax of negative distances)"""
+    shifted = distances - distances.min(axis=1, keepdims=True)
+    weights = np.exp(-shifted)
+    return 1.0 / weights.sum(axis=1)
+
+
+def _label_clusters(stats: dict) -> list:
+    """Name clusters by poverty rate and build their profile dicts"""
+    sizes = stats['size']
+    total = sizes.sum()
+    profiles = []
+    used = {}
+    ranking = np.argsort(-stats['poor'] / np.maximum(sizes, 1), kind='stable')
+    for rank, cluster_id in enumerate(ranking):
+        size = int(sizes[cluster_id])
+        mean = {c: float(stats[c][cluster_id] / size) if size else 0.0 for c in PROFILE_COLUMNS}
+        name, description = CLUSTER_TIERS[rank * len(CLUSTER_TIERS) // len(ranking)]
+        used[name] = used.get(name, 0) + 1
+        if used[name] > 1:
+            name = f"{name} {used[name]}"
+
+        profiles.append({
+            'cluster_id': int(cluster_id),
+            'cluster_name': name,
+            'size': size,
+            'percentage': round(100.0 * size / total, 1) if total else 0.0,
+            'characteristics': {
+                'avg_household_size': round(mean['no_of_indiv'], 2),
+                'avg_sleeping_rooms': round(mean['no_sleeping_rooms'], 2),
+                'asset_ownership_rate': round(float(np.mean([mean[c] for c in ASSET_COLUMNS])), 3),
+                'pppp_participation': round(mean['received_pppp'], 3),
+                'avg_house_quality': round(mean['house_type'], 2),
+                'urban_rate': round(mean['urb_rur'], 3)
+            },
+            'top_features': {c: round(mean[c], 3) for c in ('television', 'ref', 'motorcycle')},
+            'poverty_rate': round(mean['poor'], 3),
+            'description': description
+        })
+    return sorted(profiles, key=lambda p: p['cluster_id'])
+
+
+def assign_households(client, model_data: dict, batch_size: int = 200000, progress=None) -> dict:
+    """Assign every household, insert into household_clusters and return per-cluster sums
+
+    progress: optional callback(rows_done, rows_total)
+    """
+    numeric, categorical = model_data['numeric_features'], model_data['categorical_features']
+    n_clusters = model_data['kprototypes']['n_clusters']
+    total = client.query("SELECT count() FROM poverty_data").result_rows[0][0]
+
+    # Profile values share names with some features, so they get a prefix
+    profile_select = ', '.join(f"{expr} AS p_{c}" for c, expr in PROFILE_EXPRESSIONS.items())
+    names = KEY_COLUMNS + numeric + categorical + [f"p_{c}" for c in PROFILE_COLUMNS]
+    query = f"""
+        SELECT {', '.join(KEY_COLUMNS)}, {_feature_select(numeric, categorical)}, {profile_select}
+        FROM poverty_data
+    """
+
+    stats = {c: np.zeros(n_clusters) for c in PROFILE_COLUMNS}
+    stats['size'] = np.zeros(n_clusters, dtype=np.int64)
+    rows = 0
+    with client.query_column_block_stream(query, settings={'max_block_size': batch_size}) as stream:
+        for block in stream:
+            columns = dict(zip(names, block))
+            X_num, X_cat = _encode(columns, numeric, categorical, model_data['scaler'])
+            labels, distances = predict_kprototypes(model_data['kprototypes'], X_num, X_cat)
+
+            stats['size'] += np.bincount(labels, minlength=n_clusters)
+            for c in PROFILE_COLUMNS:
+                values = np.asarray(columns[f"p_{c}"], dtype=np.float64)
+                stats[c] += np.bincount(labels, weights=values, minlength=n_clusters)
+
+            client.insert('household_clusters', list(block[:len(KEY_COLUMNS)]) + [
+                labels.astype(np.uint8),
+                distances[np.arange(len(labels)), labels].astype(np.float32),
+                _soft_assignment(distances).astype(np.float32),
+                [model_data['version']] * len(labels)
+            ], column_names=ASSIGNMENT_COLUMNS, column_oriented=True)
+
+            rows += len(labels)
+            if progress is not None:
+                progress(rows, total)
+
+    return stats
+
+
+def save_cluster_model(model_data: dict, path: str = CLUSTER_MODEL_PATH):
+    """Write the artifact atomically so readers never see a partial file"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(model_data, f)
+    os.replace(tmp_path, path)
+
+
+def train_clustering(n_clusters: int = 5, features=None, sample_size: int = 100000, n_init: int = 8,
+                     n_jobs: int = -1, output: str = CLUSTER_MODEL_PATH, progress=None) -> dict:
+    """Sample, fit, assign the whole roster and persist model + profiles
+
+    progress: optional callback(stage, fraction) with stage one of
+    'sampling', 'fitting', 'assigning', 'saving'
+    """
+    def report(stage, fraction):
+        if progress is not None:
+            progress(stage, fraction)
+
+    numeric, categorical = split_features(features)
+    client = get_clickhouse_client()
+    started = time.perf_counter()
+
+    report('sampling', 0.0)
+    X_num_raw, X_cat = stratified_sample(client, numeric, categorical, sample_size)
+    print(f"Sampled {len(X_cat)} households")
+
+    scaler = StandardScaler().fit(X_num_raw) if numeric else None
+    X_num = scaler.transform(X_num_raw) if numeric else X_num_raw
+
+    report('fitting', 0.0)
+    fitted = fit_kprototypes(X_num, X_cat, n_clusters, n_init=n_init, n_jobs=n_jobs,
+                             progress=lambda done, total: report('fitting', done / total))
+    labels, _ = predict_kprototypes(fitted, X_num, X_cat)
+    print(f"Best of {n_init} runs: cost {fitted['cost']:.1f} in {fitted['fit_seconds']}s")
+
+    trained_at = datetime.now()
+    version = f"cluster_v1_{trained_at.strftime('%Y%m%d_%H%M%S')}"
+    model_data = {
+        'model_id': version,
+        'version': version,
+        'trained_at': trained_at.isoformat(),
+        'kprototypes': fitted,
+        'scaler': scaler,
+        'numeric_features': numeric,
+        'categorical_features': categorical,
+        'training_samples': int(len(X_cat)),
+        'silhouette_score': round(silhouette(X_num, X_cat, labels, fitted['gamma']), 4)
+    }
+
+    report('assigning', 0.0)
+    stats = assign_households(client, model_data,
+                              progress=lambda done, total: report('assigning', done / max(total, 1)))
+
+    report('saving', 0.0)
+    model_data['profiles'] = _label_clusters(stats)
+    model_data['cluster_sizes'] = [int(s) for s in stats['size']]
+    model_data['assigned_households'] = int(stats['size'].sum())
+    model_data['total_seconds'] = round(time.perf_counter() - started, 3)
+    save_cluster_model(model_data, output)
+    report('saving', 1.0)
+    return model_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the K-Prototypes household segmentation")
+    parser.add_argument('--clusters', type=int, default=5)
+    parser.add_argument('--features', nargs='*', help="Subset of clustering features (default: all)")
+    parser.add_argument('--sample-size', type=int, default=100000)
+    parser.add_argument('--n-init', type=int, default=8, help="Parallel restarts; the best is kept")
+    parser.add_argument('--jobs', type=int, default=-1, help="Worker processes (-1 = all cores)")
+    parser.add_argument('--output', default=CLUSTER_MODEL_PATH)
+    args = parser.parse_args()
+
+    model_data = train_clustering(args.clusters, args.features, args.sample_size, args.n_init,
+                                  args.jobs, args.output)
+    print(f"\nSilhouette: {model_data['silhouette_score']}")
+    for profile in model_data['profiles']:
+        print(f"  {profile['cluster_id']}: {profile['cluster_name']:<24} {profile['size']:>8} households, "
+              f"{profile['poverty_rate']:.0%} poor")
+    print(f"Model saved to {args.output} ({model_data['total_seconds']}s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+"""Feature pipeline shared by training and serving.
+
+The spec is declarative: an ordered list of input columns and how each one
+is encoded. It is stored inside the model artifact together with a
+checksum, so the order and encodings used at serving time are exactly the
+ones the model was trained with.
+
+`FeatureSpec.transform` is vectorized over NumPy column arrays and accepts
+a single questionnaire dict, a list of dicts, a dict of columns, or a
+ClickHouse column block (column names + list of columns).
+"""
+import hashlib
+import json
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+SPEC_VERSION = 1
+
+# Input columns of the poverty model, in model order
+FEATURE_COLUMNS = [
+    'province_name',
+    'urb_rur',
+    'no_of_indiv',
+    'no_sleeping_rooms',
+    'house_type',
+    'has_electricity',
+    'television',
+    'ref',
+    'motorcycle'
+]
+
+
+def _sql_string(value: str) -> str:
+    return "'" + str(value).replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+@dataclass(frozen=True)
+class Feature:
+    """One model input: a source column and its encoding.
+
+    kind is one of:
+      - 'numeric': used as-is
+      - 'yes_no': survey 1=Yes/2=No coding folded to 1/0 (0/1 passes through)
+      - 'category': index into the sorted `categories`; a value outside them
+        raises (ValueError from transform, a query error from sql())
+    """
+    name: str
+    kind: str = 'numeric'
+    categories: tuple = ()
+    fill: float = 0.0
+
+    def transform(self, values) -> np.ndarray:
+        """Encode one column array"""
+        values = np.asarray(values)
+
+        if self.kind == 'category':
+            categories = np.asarray(self.categories, dtype=str)
+            values = values.astype(str)
+            codes = np.searchsorted(categories, values)
+            # Unseen: past the last category or not an exact match (every value when there are none)
+            known = codes < len(categories)
+            known[known] = categories[codes[known]] == values[known]
+            if not known.all():
+                raise ValueError(f"Unknown {self.name}: {values[~known][0]!r}")
+            return codes.astype(np.float64)
+
+        values = values.astype(np.float64)
+        values = np.where(np.isnan(values), self.fill, values)
+        if self.kind == 'yes_no':
+            return np.where(values == 2, 0.0, values)
+        return values
+
+    def sql(self) -> str:
+        """The same encoding as a ClickHouse expression"""
+        if self.kind == 'category':
+            index = self._sql_index()
+            # Fails the query on an unseen value, as transform raises on one
+            message = _sql_string(f"Unknown {self.name}")
+            return f"({index} - 1 + throwIf({index} = 0, {message}))"
+        if self.kind == 'yes_no':
+            return f"if({self.name} = 2, 0, {self.name})"
+        return f"toFloat64({self.name})"
+
+    def _sql_index(self) -> str:
+        categories = ', '.join(_sql_string(c) for c in self.categories)
+        return f"indexOf([{categories}], {self.name})"
+
+    def sql_known(self) -> str:
+        """ClickHouse condition that the value is one sql() can encode"""
+        return f"{self._sql_index()} > 0" if self.kind == 'category' else "1"
+
+
+class FeatureSpec:
+    """Ordered feature list with vectorized transform and a stable checksum"""
+
+    def __init__(self, features: List[Feature], version: int = SPEC_VERSION):
+        self.features = list(features)
+        self.version = version
+
+    @property
+    def columns(self) -> List[str]:
+        return [f.name for f in self.features]
+
+    def _as_columns(self, data, column_names: Sequence[str] = None) -> Dict[str, Any]:
+        """Normalize row / batch / block input into a dict of columns"""
+        if column_names is not None:
+            # ClickHouse column block: list of columns in column_names order
+            return dict(zip(column_names, data))
+        if isinstance(data, dict):
+            first = data[self.columns[0]]
+            if np.ndim(first) == 0:
+                return {name: [data[name]] for name in self.columns}
+            return data
+        # Sequence of row dicts
+        return {name: [row[name] for row in data] for name in self.columns}
+
+    def transform(self, data, column_names: Sequence[str] = None) -> np.ndarray:
+        """Encode input into an (n_rows, n_features) float64 matrix"""
+        columns = self._as_columns(data, column_names)
+        return np.column_stack([f.transform(columns[f.name]) for f in self.features])
+
+    def sql_expressions(self) -> List[str]:
+        """Per-feature ClickHouse expressions, in model order"""
+        return [f.sql() for f in self.features]
+
+    def sql_known(self) -> str:
+        """ClickHouse condition selecting the rows every sql() expression can encode"""
+        return ' AND '.join(f.sql_known() for f in self.features)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'version': self.version,
+            'features': [{**asdict(f), 'categories': list(f.categories)} for f in self.features]
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'FeatureSpec':
+        features = [
+            Feature(name=f['name'], kind=f['kind'], categories=tuple(f['categories']), fill=f['fill'])
+            for f in data['features']
+        ]
+        return cls(features, version=data['version'])
+
+    def checksum(self) -> str:
+        payload = json.dumps(self.to_dict(), sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def build_feature_spec(province_classes: Sequence[str]) -> FeatureSpec:
+    """The poverty model's feature spec for a given set of provinces"""
+    return FeatureSpec([
+        Feature('province_name', kind='category', categories=tuple(sorted(str(p) for p in province_classes))),
+        Feature('urb_rur'),
+        Feature('no_of_indiv'),
+        Feature('no_sleeping_rooms'),
+        Feature('house_type'),
+        Feature('has_electricity', kind='yes_no'),
+        Feature('television'),
+        Feature('ref'),
+        Feature('motorcycle')
+    ])
+
+
+def attach_feature_spec(model_data: Dict[str, Any], spec: FeatureSpec) -> Dict[str, Any]:
+    """Store the spec and its checksum in a model artifact"""
+    model_data['features'] = spec.columns
+    model_data['feature_spec'] = spec.to_dict()
+    model_data['feature_spec_checksum'] = spec.checksum()
+    return model_data
+
+
+def load_feature_spec(model_data: Dict[str, Any]) -> FeatureSpec:
+    """Read and verify the spec stored in a model artifact"""
+    if 'feature_spec' not in model_data:
+        # Artifacts from before the shared pipeline were served in
+        # FEATURE_COLUMNS order with the province encoder's classes
+        return build_feature_spec(model_data['province_encoder'].classes_)
+
+    spec = FeatureSpec.from_dict(model_data['feature_spec'])
+    if spec.checksum() != model_data.get('feature_spec_checksum'):
+        raise ValueError("Feature spec checksum mismatch: model artifact is corrupt or was edited")
+    return spec
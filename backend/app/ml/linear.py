@@ -0,0 +1,85 @@
+"""Closed-form view of a trained linear poverty model.
+
+Every model we ship is a linear SVM behind a StandardScaler, optionally
+wrapped in a sigmoid calibrator. That makes scoring a dot product:
+
+    decision = intercept + sum(coef * (x - mean) / scale)
+    probability_poor = 1 / (1 + exp(-(slope * decision + offset)))
+
+which can be evaluated anywhere, including inside ClickHouse.
+"""
+import numpy as np
+
+# Decision values the probability link is fitted and checked on (0 excluded)
+_PROBE_POINTS = np.linspace(-6.0, 6.0, 48)
+
+
+def linear_parameters(model):
+    """Return (coef, intercept) of the underlying linear SVM in scaled space"""
+    if hasattr(model, 'calibrated_classifiers_'):
+        if len(model.calibrated_classifiers_) != 1:
+            raise ValueError("Only prefit calibrators wrap a single linear model")
+        calibrated = model.calibrated_classifiers_[0]
+        # sklearn < 1.2 named it base_estimator
+        model = calibrated.estimator if hasattr(calibrated, 'estimator') else calibrated.base_estimator
+
+    if getattr(model, 'kernel', 'linear') != 'linear' or not hasattr(model, 'coef_'):
+        raise ValueError(f"{type(model).__name__} is not a linear model")
+
+    coef = np.asarray(model.coef_, dtype=np.float64).ravel()
+    intercept = float(np.ravel(model.intercept_)[0])
+    return coef, intercept
+
+
+def fold_scaler(coef, intercept: float, scaler):
+    """Fold StandardScaler into the weights so they apply to encoded raw features"""
+    weights = coef / scaler.scale_
+    return weights, intercept - float(np.dot(weights, scaler.mean_))
+
+
+def _probe_matrix(coef, intercept: float):
+    """Scaled-space points whose decision values are exactly _PROBE_POINTS"""
+    direction = coef / np.dot(coef, coef)
+    return np.outer(_PROBE_POINTS - intercept, direction)
+
+
+def probability_link(model, coef, intercept: float, tolerance: float = 5e-3):
+    """Fit logit(P(poor)) = slope * decision + offset; None if not sigmoid
+
+    Calibrated models match the fitted sigmoid exactly. SVC(probability=True)
+    runs libsvm's pairwise coupling even for two classes, which stays within
+    a few 1e-3 of its Platt sigmoid, hence the tolerance.
+    """
+    if not hasattr(model, 'predict_proba'):
+        return None
+
+    probs = model.predict_proba(_probe_matrix(coef, intercept))[:, 1]
+    # Saturated probabilities carry no slope information, only rounding noise
+    usable = np.minimum(probs, 1 - probs) > 1e-4
+    if usable.sum() < 3:
+        return None
+    logits = np.log(probs[usable] / (1 - probs[usable]))
+    slope, offset = np.polyfit(_PROBE_POINTS[usable], logits, 1)
+
+    fitted = 1 / (1 + np.exp(-(slope * _PROBE_POINTS + offset)))
+    if np.max(np.abs(fitted - probs)) > tolerance:
+        # e.g. isotonic calibration: not expressible as one sigmoid
+        return None
+    return float(slope), float(offset)
+
+
+def label_rule(model, coef, intercept: float, link) -> str:
+    """Which threshold model.predict uses: 'decision' (> 0) or 'probability' (> 0.5)
+
+    SVC predicts from the sign of the decision function even though its
+    Platt probabilities can disagree near the boundary; calibrated models
+    predict from the probability.
+    """
+    predicted = model.predict(_probe_matrix(coef, intercept))
+    if np.array_equal(predicted, (_PROBE_POINTS > 0).astype(predicted.dtype)):
+        return 'decision'
+    if link is not None:
+        slope, offset = link
+        if np.array_equal(predicted, (slope * _PROBE_POINTS + offset > 0).astype(predicted.dtype)):
+            return 'probability'
+    raise ValueError("Could not determine the model's decision threshold")
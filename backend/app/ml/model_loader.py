@@ -1,15 +1,38 @@
 import pickle
 import os
+from app.ml.features import load_feature_spec
 
-_model_cache = None
+MODEL_PATH = '/app/models/svm_poverty_predictor.pkl'
+
+_model_cache = {'mtime': None, 'model': None}
+
+def read_model_artifact(model_path: str = MODEL_PATH):
+    """Read a model artifact from disk and verify its feature spec"""
+    with open(model_path, 'rb') as f:
+        model_data = pickle.load(f)
+
+    # Raises if the stored spec does not match its checksum
+    model_data['feature_pipeline'] = load_feature_spec(model_data)
+    return model_data
+
+def _model_mtime():
+    try:
+        return os.path.getmtime(MODEL_PATH)
+    except OSError:
+        return None
+
+def set_model(model_data):
+    """Serve `model_data` (e.g. a benchmark model) until the model file next changes"""
+    _model_cache['model'] = model_data
+    _model_cache['mtime'] = _model_mtime()
 
 def load_svm_model():
-    """Load SVM model (cached)"""
-    global _model_cache
+    """Load SVM model (cached), re-reading it when a retrain replaces the file"""
+    mtime = _model_mtime()
 
-    if _model_cache is None:
-        model_path = '/app/models/svm_poverty_predictor.pkl'
-        with open(model_path, 'rb') as f:
-            _model_cache = pickle.load(f)
+    # A missing file keeps the loaded model serving
+    if _model_cache['model'] is None or (mtime is not None and mtime != _model_cache['mtime']):
+        _model_cache['model'] = read_model_artifact(MODEL_PATH)
+        _model_cache['mtime'] = mtime
 
-    return _model_cache
+    return _model_cache['model']
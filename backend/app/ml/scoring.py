@@ -0,0 +1,192 @@
+"""Score every household in poverty_data into household_scores.
+
+The default path folds scaler + SVM (+ sigmoid calibration) into a single
+ClickHouse expression and runs one INSERT ... SELECT, so no rows leave the
+database. Models that cannot be folded (non-linear kernels, isotonic
+calibration) fall back to streaming column blocks through NumPy; those
+blocks go to a staging table that is copied into household_scores in one
+statement once every block is scored, so a failed or cancelled run leaves
+household_scores as it was. Either way households the model cannot encode
+(e.g. a province added since training) are refused before anything is
+written.
+
+Run from the backend directory (or /app inside the container):
+
+    python -m app.ml.scoring
+    python -m app.ml.scoring --method python --model models/svm_poverty_predictor.pkl
+"""
+import argparse
+import time
+import uuid
+
+import numpy as np
+
+from app.database import get_clickhouse_client
+from app.ml.linear import fold_scaler, label_rule, linear_parameters, probability_link
+from app.ml.model_loader import MODEL_PATH, read_model_artifact
+
+SCORE_COLUMNS = [
+    'hh_id', 'province_name', 'city_name', 'barangay_name',
+    'decision_score', 'probability_poor', 'predicted_poor', 'model_version'
+]
+KEY_COLUMNS = SCORE_COLUMNS[:4]
+
+
+def score_expressions(model_data):
+    """Return (decision, probability, label) ClickHouse expressions for the model"""
+    model = model_data['model']
+    coef, intercept = linear_parameters(model)
+    link = probability_link(model, coef, intercept)
+    if link is None:
+        raise ValueError("Model probabilities are not a sigmoid of the decision function")
+    rule = label_rule(model, coef, intercept, link)
+
+    weights, bias = fold_scaler(coef, intercept, model_data['scaler'])
+    terms = [
+        f"{weight!r} * {expr}"
+        for weight, expr in zip(weights, model_data['feature_pipeline'].sql_expressions())
+        if weight != 0
+    ]
+    decision = ' + '.join([repr(bias)] + terms)
+
+    slope, offset = link
+    probability = f"1 / (1 + exp(-({slope!r} * decision_score + {offset!r})))"
+    label = "decision_score > 0" if rule == 'decision' else "probability_poor > 0.5"
+    return decision, probability, label
+
+
+def score_in_database(client, model_data, where: str = "") -> int:
+    """Score with one INSERT ... SELECT evaluated inside ClickHouse"""
+    decision, probability, label = score_expressions(model_data)
+    version = model_data['version'].replace("'", "\\'")
+
+    client.command(f"""
+        INSERT INTO household_scores ({', '.join(SCORE_COLUMNS)})
+        SELECT
+            {', '.join(KEY_COLUMNS)},
+            {decision} AS decision_score,
+            {probability} AS probability_poor,
+            {label} AS predicted_poor,
+            '{version}' AS model_version
+        FROM poverty_data
+        {where}
+    """)
+    return client.query(f"SELECT count() FROM poverty_data {where}").result_rows[0][0]
+
+
+def _decision_function(model, X):
+    """Raw SVM decision values, also for calibrated wrappers"""
+    try:
+        coef, intercept = linear_parameters(model)
+        return X @ coef + intercept
+    except ValueError:
+        pass
+    if hasattr(model, 'decision_function'):
+        return model.decision_function(X)
+    probabilities = np.clip(model.predict_proba(X)[:, 1], 1e-12, 1 - 1e-12)
+    return np.log(probabilities / (1 - probabilities))
+
+
+def score_in_python(client, model_data, where: str = "", batch_size: int = 200000, progress=None) -> int:
+    """Stream column blocks through NumPy into a staging table, then copy it into household_scores
+
+    progress: optional callback(rows_done, rows_total)
+    """
+    spec = model_data['feature_pipeline']
+    model = model_data['model']
+    feature_columns = [c for c in spec.columns if c not in KEY_COLUMNS]
+    select_columns = KEY_COLUMNS + feature_columns
+    query = f"SELECT {', '.join(select_columns)} FROM poverty_data {where}"
+    total = client.query(f"SELECT count() FROM poverty_data {where}").result_rows[0][0]
+
+    # Plain MergeTree: a table copied with AS household_scores alone would also copy a Distributed engine
+    staging = f"household_scores_staging_{uuid.uuid4().hex[:12]}"
+    client.command(f"CREATE TABLE {staging} AS household_scores ENGINE = MergeTree ORDER BY tuple()")
+    rows = 0
+    try:
+        with client.query_column_block_stream(query, settings={'max_block_size': batch_size}) as stream:
+            for block in stream:
+                X = model_data['scaler'].transform(spec.transform(block, column_names=select_columns))
+                probabilities = model.predict_proba(X)[:, 1]
+
+                columns = list(block[:len(KEY_COLUMNS)]) + [
+                    _decision_function(model, X).astype(np.float32),
+                    probabilities.astype(np.float32),
+                    model.predict(X).astype(np.uint8),
+                    [model_data['version']] * len(probabilities)
+                ]
+                client.insert(staging, columns, column_names=SCORE_COLUMNS, column_oriented=True)
+                rows += len(probabilities)
+                print(f"  scored {rows} households")
+                if progress is not None:
+                    progress(rows, total)
+
+        client.command(f"INSERT INTO household_scores SELECT * FROM {staging}")
+    finally:
+        client.command(f"DROP TABLE IF EXISTS {staging}")
+    return rows
+
+
+def score_roster(model_data=None, method: str = 'auto', where: str = "", progress=None) -> dict:
+    """Score poverty_data into household_scores; returns a run summary
+
+    progress: optional callback(rows_done, rows_total); the SQL path is one
+    statement and only reports when it is done
+    """
+    model_data = model_data or read_model_artifact()
+    client = get_clickhouse_client()
+    started = time.perf_counter()
+
+    if method == 'auto':
+        try:
+            score_expressions(model_data)
+            method = 'sql'
+        except ValueError as e:
+            print(f"Model cannot be folded into SQL ({e}); using the NumPy path")
+            method = 'python'
+
+    # Checked first: both paths would otherwise fail partway through, after writing some scores
+    spec = model_data['feature_pipeline']
+    unknown = client.query(
+        f"SELECT count() FROM (SELECT * FROM poverty_data {where}) WHERE NOT ({spec.sql_known()})"
+    ).result_rows[0][0]
+    if unknown:
+        raise ValueError(f"{unknown} households cannot be encoded by {model_data['version']} "
+                         f"(e.g. a province added since training); retrain first")
+
+    if method == 'sql':
+        rows = score_in_database(client, model_data, where)
+        if progress is not None:
+            progress(rows, rows)
+    elif method == 'python':
+        rows = score_in_python(client, model_data, where, progress=progress)
+    else:
+        raise ValueError(f"Unknown scoring method: {method}")
+
+    return {
+        'method': method,
+        'rows': rows,
+        'model_version': model_data['version'],
+        'seconds': round(time.perf_counter() - started, 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score the whole roster into household_scores")
+    parser.add_argument('--method', choices=['auto', 'sql', 'python'], default='auto')
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--show-sql', action='store_true', help="Print the folded score expression")
+    args = parser.parse_args()
+
+    model_data = read_model_artifact(args.model)
+    if args.show_sql:
+        decision, probability, label = score_expressions(model_data)
+        print(f"decision_score = {decision}\nprobability_poor = {probability}\npredicted_poor = {label}\n")
+
+    summary = score_roster(model_data, method=args.method)
+    print(f"Scored {summary['rows']} households with {summary['model_version']} "
+          f"({summary['method']}) in {summary['seconds']}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,224 @@
+"""Out-of-core SVM training straight from ClickHouse.
+
+Run from the backend directory (or /app inside the container):
+
+    python -m app.ml.training --estimator sgd
+    python -m app.ml.training --estimator linearsvc --output models/svm_poverty_predictor.pkl
+"""
+import argparse
+import pickle
+import time
+from datetime import datetime
+
+import numpy as np
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+from sklearn.svm import LinearSVC
+
+from app.database import get_clickhouse_client
+from app.ml.features import attach_feature_spec, build_feature_spec
+
+TARGET = 'poverty_status2'
+
+# Rows are split by hashing hh_id, so every pass over the table sees the
+# same train / calibration / test partition without materializing it.
+SPLIT_BUCKETS = 10
+CALIBRATION_BUCKET = 0
+TEST_BUCKET = 1
+SPLIT_EXPR = f"cityHash64(hh_id) % {SPLIT_BUCKETS}"
+TRAIN_FILTER = f"{SPLIT_EXPR} NOT IN ({CALIBRATION_BUCKET}, {TEST_BUCKET})"
+
+
+def fit_preprocessing(client, where: str = TRAIN_FILTER):
+    """Build the feature spec and fit the scaler on the rows matching `where` with one aggregate query"""
+    provinces = client.query(
+        "SELECT DISTINCT province_name FROM poverty_data ORDER BY province_name"
+    ).result_rows
+    spec = build_feature_spec([row[0] for row in provinces])
+
+    # Moments of the encoded features, computed by the same encodings in SQL
+    aggregates = ', '.join(f"avg({expr}), varPop({expr})" for expr in spec.sql_expressions())
+    row = client.query(
+        f"SELECT count(), {aggregates} FROM poverty_data WHERE {where}"
+    ).result_rows[0]
+
+    moments = np.array(row[1:], dtype=np.float64).reshape(-1, 2)
+    scaler = StandardScaler()
+    scaler.mean_ = moments[:, 0]
+    scaler.var_ = moments[:, 1]
+    # StandardScaler leaves constant features unscaled
+    scaler.scale_ = np.where(scaler.var_ > 0, np.sqrt(scaler.var_), 1.0)
+    scaler.n_features_in_ = len(spec.features)
+    scaler.n_samples_seen_ = int(row[0])
+
+    return spec, scaler
+
+
+def iter_batches(client, spec, where: str, batch_size: int = 100000, shuffle_seed=None):
+    """Stream (X, y) batches from poverty_data, encoded by the feature spec"""
+    order_by = f"ORDER BY cityHash64(hh_id, {int(shuffle_seed)})" if shuffle_seed is not None else ""
+    query = f"""
+        SELECT {', '.join(spec.columns)}, {TARGET}
+        FROM poverty_data
+        WHERE {where}
+        {order_by}
+    """
+
+    with client.query_column_block_stream(query, settings={'max_block_size': batch_size}) as stream:
+        for block in stream:
+            X = spec.transform(block[:-1], column_names=spec.columns)
+            yield X, np.asarray(block[-1], dtype=np.int64)
+
+
+def load_split(client, spec, scaler, bucket: int, batch_size: int):
+    """Load one hash bucket fully into memory, scaled"""
+    X_parts, y_parts = [], []
+    for X, y in iter_batches(client, spec, f"{SPLIT_EXPR} = {bucket}", batch_size):
+        X_parts.append(scaler.transform(X))
+        y_parts.append(y)
+    return np.vstack(X_parts), np.concatenate(y_parts)
+
+
+def train_sgd(client, spec, scaler, epochs: int = 5, alpha: float = 1e-5,
+              batch_size: int = 100000, progress=None):
+    """Train a hinge-loss SGDClassifier with partial_fit over streamed batches
+
+    progress: optional callback(rows_done, rows_total) over all epochs
+    """
+    svm = SGDClassifier(loss='hinge', alpha=alpha, random_state=42)
+    classes = np.array([0, 1])
+    total = epochs * scaler.n_samples_seen_
+    rows = 0
+
+    for epoch in range(epochs):
+        # A different hash seed per epoch reshuffles rows across batches
+        for X, y in iter_batches(client, spec, TRAIN_FILTER, batch_size, shuffle_seed=epoch):
+            svm.partial_fit(scaler.transform(X), y, classes=classes)
+            rows += len(y)
+            if progress is not None:
+                progress(rows, total)
+        print(f"  epoch {epoch + 1}/{epochs}: {rows} rows seen")
+
+    return svm
+
+
+def train_linear_svc(client, spec, scaler, C: float = 1.0, batch_size: int = 100000, progress=None):
+    """Train a LinearSVC (liblinear) on the streamed training split
+
+    progress: optional callback(rows_done, rows_total) while the split loads;
+    the fit itself reports nothing
+    """
+    X_parts, y_parts = [], []
+    rows = 0
+    for X, y in iter_batches(client, spec, TRAIN_FILTER, batch_size):
+        X_parts.append(scaler.transform(X))
+        y_parts.append(y)
+        rows += len(y)
+        if progress is not None:
+            progress(rows, scaler.n_samples_seen_)
+
+    svm = LinearSVC(C=C, dual=False, random_state=42)
+    svm.fit(np.vstack(X_parts), np.concatenate(y_parts))
+    return svm
+
+
+def calibrate(svm, X_cal, y_cal):
+    """Fit Platt scaling on a held-out split so the model has predict_proba"""
+    calibrated = CalibratedClassifierCV(svm, method='sigmoid', cv='prefit')
+    calibrated.fit(X_cal, y_cal)
+    return calibrated
+
+
+def train(estimator: str = 'sgd', C: float = 1.0, alpha: float = 1e-5, epochs: int = 5,
+          batch_size: int = 100000, version: str = None, progress=None):
+    """Train and calibrate a linear SVM; returns the model_data artifact
+
+    progress: optional callback(stage, fraction) with stage one of
+    'preprocessing', 'training', 'calibrating', 'evaluating'
+    """
+    def report(stage, fraction):
+        if progress is not None:
+            progress(stage, fraction)
+
+    def report_rows(done, total):
+        report('training', done / max(total, 1))
+
+    client = get_clickhouse_client()
+    started = time.perf_counter()
+
+    report('preprocessing', 0.0)
+    print("Fitting feature spec and scaler...")
+    spec, scaler = fit_preprocessing(client)
+    print(f"Training rows: {scaler.n_samples_seen_}, provinces: {len(spec.features[0].categories)}")
+
+    report('training', 0.0)
+    print(f"Training {estimator}...")
+    if estimator == 'sgd':
+        svm = train_sgd(client, spec, scaler, epochs=epochs, alpha=alpha, batch_size=batch_size,
+                        progress=report_rows)
+    elif estimator == 'linearsvc':
+        svm = train_linear_svc(client, spec, scaler, C=C, batch_size=batch_size, progress=report_rows)
+    else:
+        raise ValueError(f"Unknown estimator: {estimator}")
+
+    report('calibrating', 0.0)
+    print("Calibrating probabilities...")
+    X_cal, y_cal = load_split(client, spec, scaler, CALIBRATION_BUCKET, batch_size)
+    model = calibrate(svm, X_cal, y_cal)
+
+    report('evaluating', 0.0)
+    X_test, y_test = load_split(client, spec, scaler, TEST_BUCKET, batch_size)
+    y_pred = model.predict(X_test)
+    accuracy = accuracy_score(y_test, y_pred)
+
+    print(f"\nModel Accuracy: {accuracy:.2%} (trained in {time.perf_counter() - started:.1f}s)")
+    print("\nClassification Report:")
+    print(classification_report(y_test, y_pred, target_names=['Non-Poor', 'Poor']))
+    print("\nConfusion Matrix:")
+    print(confusion_matrix(y_test, y_pred))
+
+    province_encoder = LabelEncoder()
+    province_encoder.classes_ = np.array(spec.features[0].categories)
+
+    model_data = {
+        'model': model,
+        'scaler': scaler,
+        'province_encoder': province_encoder,
+        'accuracy': accuracy,
+        'version': version or f"svm_{estimator}_{datetime.now().strftime('%Y%m%d')}",
+        'training_rows': int(scaler.n_samples_seen_)
+    }
+    return attach_feature_spec(model_data, spec)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the poverty SVM from ClickHouse")
+    parser.add_argument('--estimator', choices=['sgd', 'linearsvc'], default='sgd')
+    parser.add_argument('--C', type=float, default=1.0, help="LinearSVC regularization")
+    parser.add_argument('--alpha', type=float, default=1e-5, help="SGD regularization")
+    parser.add_argument('--epochs', type=int, default=5, help="SGD passes over the table")
+    parser.add_argument('--batch-size', type=int, default=100000)
+    parser.add_argument('--version', default=None)
+    parser.add_argument('--output', default='models/svm_poverty_predictor.pkl')
+    args = parser.parse_args()
+
+    model_data = train(
+        estimator=args.estimator,
+        C=args.C,
+        alpha=args.alpha,
+        epochs=args.epochs,
+        batch_size=args.batch_size,
+        version=args.version
+    )
+
+    with open(args.output, 'wb') as f:
+        pickle.dump(model_data, f)
+
+    print(f"\nModel saved to {args.output}")
+    print("Restart backend: docker-compose restart backend")
+
+
+if __name__ == '__main__':
+    main()
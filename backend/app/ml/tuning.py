@@ -0,0 +1,233 @@
+"""Parallel hyperparameter search for the poverty SVM.
+
+The scaled feature matrix is pulled from ClickHouse once and cached as
+.npy files that every worker memory-maps read-only, so folds and
+candidates share one copy of the data. The cache is reused only while
+poverty_data's data version (see app.utils.query_cache), the fold count
+and the feature columns are the ones it was built with.
+
+Run from the backend directory (or /app inside the container):
+
+    python -m app.ml.tuning --search grid
+    python -m app.ml.tuning --search halving --folds 5 --jobs -1
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.metrics import accuracy_score, recall_score
+from sklearn.svm import LinearSVC
+
+from app.database import get_clickhouse_client
+from app.ml.features import FEATURE_COLUMNS
+from app.ml.training import TEST_BUCKET, SPLIT_EXPR, fit_preprocessing, iter_batches
+from app.utils.query_cache import read_data_version
+
+PARAM_GRID = {
+    'C': [0.01, 0.1, 1.0, 10.0],
+    'class_weight': [None, 'balanced'],
+    'features': ['all', 'no_province', 'housing_assets']
+}
+
+FEATURE_SUBSETS = {
+    'all': FEATURE_COLUMNS,
+    'no_province': FEATURE_COLUMNS[1:],
+    'housing_assets': ['no_sleeping_rooms', 'house_type', 'has_electricity', 'television', 'ref', 'motorcycle']
+}
+
+SCORING = ['accuracy', 'recall_poor']
+
+# The test bucket stays untouched so final evaluation is out-of-search
+SEARCH_FILTER = f"{SPLIT_EXPR} != {TEST_BUCKET}"
+
+
+def build_matrix_cache(cache_dir: str, folds: int = 5, batch_size: int = 100000, refresh: bool = False):
+    """Stream the search split once and write X / y / fold ids as .npy files"""
+    paths = {name: os.path.join(cache_dir, f"{name}.npy") for name in ('X', 'y', 'fold')}
+    meta_path = os.path.join(cache_dir, 'meta.json')
+    # Read before streaming: rows added meanwhile make the next run rebuild
+    meta = {'data_version': list(read_data_version('poverty_data')), 'folds': folds, 'columns': FEATURE_COLUMNS}
+    if not refresh and os.path.exists(meta_path) and all(os.path.exists(p) for p in paths.values()):
+        with open(meta_path) as f:
+            if json.load(f) == meta:
+                return paths
+
+    os.makedirs(cache_dir, exist_ok=True)
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+    client = get_clickhouse_client()
+    # Scaled with the moments of exactly the rows searched
+    spec, scaler = fit_preprocessing(client, SEARCH_FILTER)
+
+    X_parts, y_parts = [], []
+    for X, y in iter_batches(client, spec, SEARCH_FILTER, batch_size):
+        X_parts.append(scaler.transform(X).astype(np.float32))
+        y_parts.append(y.astype(np.int8))
+
+    X = np.vstack(X_parts)
+    y = np.concatenate(y_parts)
+
+    # Stratified fold assignment: shuffle within each class, then deal round-robin
+    rng = np.random.default_rng(42)
+    fold = np.empty(len(y), dtype=np.int8)
+    for label in (0, 1):
+        idx = rng.permutation(np.flatnonzero(y == label))
+        fold[idx] = np.arange(len(idx)) % folds
+
+    np.save(paths['X'], X)
+    np.save(paths['y'], y)
+    np.save(paths['fold'], fold)
+    # Written last, so an interrupted build is never reused
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f)
+    print(f"Cached {X.shape[0]} x {X.shape[1]} matrix in {cache_dir}")
+    return paths
+
+
+def candidates_from_grid(grid: dict):
+    """Expand a parameter grid into a list of candidate dicts"""
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def evaluate_candidate(paths: dict, params: dict, fold_id: int, max_samples: int = None):
+    """Fit one candidate on one fold; runs inside a worker process"""
+    X = np.load(paths['X'], mmap_mode='r')
+    y = np.load(paths['y'], mmap_mode='r')
+    fold = np.load(paths['fold'], mmap_mode='r')
+
+    cols = [FEATURE_COLUMNS.index(name) for name in FEATURE_SUBSETS[params['features']]]
+    train_idx = np.flatnonzero(fold != fold_id)
+    test_idx = np.flatnonzero(fold == fold_id)
+    if max_samples is not None and max_samples < len(train_idx):
+        # Same seed per fold so every candidate in a round sees the same rows
+        rng = np.random.default_rng(fold_id)
+        train_idx = np.sort(rng.choice(train_idx, max_samples, replace=False))
+
+    X_train = X[train_idx][:, cols]
+    X_test = X[test_idx][:, cols]
+
+    model = LinearSVC(C=params['C'], class_weight=params['class_weight'], dual=False, random_state=42)
+    started = time.perf_counter()
+    model.fit(X_train, y[train_idx])
+    fit_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    y_pred = model.predict(X_test)
+    latency_us = (time.perf_counter() - started) / len(test_idx) * 1e6
+
+    return {
+        **params,
+        'fold': fold_id,
+        'n_samples': len(train_idx),
+        'accuracy': accuracy_score(y[test_idx], y_pred),
+        'recall_poor': recall_score(y[test_idx], y_pred, pos_label=1, zero_division=0),
+        'fit_seconds': fit_seconds,
+        'latency_us': latency_us,
+        'model_bytes': len(pickle.dumps(model))
+    }
+
+
+def run_round(paths: dict, candidates: list, folds: int, n_jobs: int, max_samples: int = None):
+    """Evaluate every candidate on every fold in parallel"""
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(evaluate_candidate)(paths, params, fold_id, max_samples)
+        for params in candidates
+        for fold_id in range(folds)
+    )
+    return pd.DataFrame(results)
+
+
+def summarize(fold_results: pd.DataFrame, scoring: str) -> pd.DataFrame:
+    """Average fold results into one leaderboard row per candidate"""
+    keys = ['C', 'class_weight', 'features', 'n_samples_round']
+    frame = fold_results.assign(class_weight=fold_results['class_weight'].fillna('none'))
+    board = frame.groupby(keys, sort=False).agg(
+        accuracy=('accuracy', 'mean'),
+        accuracy_std=('accuracy', 'std'),
+        recall_poor=('recall_poor', 'mean'),
+        fit_seconds=('fit_seconds', 'mean'),
+        latency_us=('latency_us', 'mean'),
+        model_bytes=('model_bytes', 'max')
+    ).reset_index()
+    return board.sort_values(scoring, ascending=False).reset_index(drop=True)
+
+
+def grid_search(paths: dict, grid: dict, folds: int, n_jobs: int, scoring: str) -> pd.DataFrame:
+    """Exhaustive search over the full grid"""
+    results = run_round(paths, candidates_from_grid(grid), folds, n_jobs)
+    results['n_samples_round'] = 'all'
+    return summarize(results, scoring)
+
+
+def halving_search(paths: dict, grid: dict, folds: int, n_jobs: int, scoring: str,
+                   min_samples: int = 20000, eta: int = 3) -> pd.DataFrame:
+    """Successive halving: keep the best 1/eta candidates while growing the sample"""
+    n_rows = len(np.load(paths['y'], mmap_mode='r'))
+    candidates = candidates_from_grid(grid)
+    rounds = []
+    n_samples = min_samples
+
+    while True:
+        last_round = len(candidates) <= eta or n_samples >= n_rows
+        print(f"  round {len(rounds) + 1}: {len(candidates)} candidates, "
+              f"{'all' if last_round else n_samples} samples")
+        results = run_round(paths, candidates, folds, n_jobs, None if last_round else n_samples)
+        results['n_samples_round'] = 'all' if last_round else n_samples
+        board = summarize(results, scoring)
+        rounds.append(board)
+        if last_round:
+            break
+
+        keep = math.ceil(len(candidates) / eta)
+        candidates = [
+            {'C': row.C, 'class_weight': None if row.class_weight == 'none' else row.class_weight,
+             'features': row.features}
+            for row in board.head(keep).itertuples()
+        ]
+        n_samples *= eta
+
+    # The final round ranks the survivors; earlier rounds are kept for reference
+    return pd.concat(reversed(rounds), ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hyperparameter search for the poverty SVM")
+    parser.add_argument('--search', choices=['grid', 'halving'], default='halving')
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--jobs', type=int, default=-1, help="Worker processes (-1 = all cores)")
+    parser.add_argument('--scoring', choices=SCORING, default='accuracy')
+    parser.add_argument('--min-samples', type=int, default=20000, help="First halving round size")
+    parser.add_argument('--cache-dir', default='models/tuning_cache')
+    parser.add_argument('--refresh', action='store_true', help="Re-read the matrix from ClickHouse")
+    parser.add_argument('--output', default='models/leaderboard.csv')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    paths = build_matrix_cache(args.cache_dir, folds=args.folds, refresh=args.refresh)
+
+    print(f"Running {args.search} search...")
+    if args.search == 'grid':
+        board = grid_search(paths, PARAM_GRID, args.folds, args.jobs, args.scoring)
+    else:
+        board = halving_search(paths, PARAM_GRID, args.folds, args.jobs, args.scoring,
+                               min_samples=args.min_samples)
+
+    board.to_csv(args.output, index=False)
+    board.to_json(os.path.splitext(args.output)[0] + '.json', orient='records', indent=2)
+
+    print("\nLeaderboard:")
+    print(board.head(10).to_string(index=False))
+    print(f"\nSearch finished in {time.perf_counter() - started:.1f}s")
+    print(f"Leaderboard saved to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
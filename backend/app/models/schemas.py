@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from datetime import datetime
+from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
 
 # Objective 1: Targeting Analysis
@@ -11,6 +12,10 @@ class CoverageMetrics(BaseModel):
     poor_with_pppp: int
     coverage_rate: float
     unmet_need: int
+    # accuracy=approx: estimates from a sample, with 95% margins per field
+    approximate: bool = False
+    sample_fraction: Optional[float] = None
+    margins: Optional[Dict[str, float]] = None
 
 class EfficiencyMetrics(BaseModel):
     location: str
@@ -19,18 +24,86 @@ class EfficiencyMetrics(BaseModel):
     nonpoor_recipients: int
     targeting_accuracy: float
     leakage_rate: float
+    # accuracy=approx: estimates from a sample, with 95% margins per field
+    approximate: bool = False
+    sample_fraction: Optional[float] = None
+    margins: Optional[Dict[str, float]] = None
+
+class EligibleNotEnrolledMetrics(BaseModel):
+    location: str
+    scored_households: int
+    predicted_poor: int
+    eligible_not_enrolled: int  # Predicted poor, not receiving 4Ps
+    eligible_not_enrolled_rate: float
+    missed_by_roster: int  # ...and not flagged poor in the roster
+    avg_probability_poor: float
+
+# Objective 2: Clustering
+class ClusteringTrainRequest(BaseModel):
+    n_clusters: int = Field(5, ge=2, le=12)
+    features: Optional[List[str]] = None  # Default: all clustering features
+    clustering_method: str = "k-prototypes"
+    sample_size: int = Field(100000, ge=1000)
+    n_init: int = Field(8, ge=1, le=64)
+
+class ClusteringTrainingStatus(BaseModel):
+    job_id: Optional[str] = None
+    status: str  # idle, queued, running, completed, failed, cancelled
+    stage: Optional[str] = None
+    progress: float = 0.0
+    params: Optional[Dict[str, Any]] = None
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    model_id: Optional[str] = None
+    error: Optional[str] = None
+
+class ClusterProfile(BaseModel):
+    cluster_id: int
+    cluster_name: str
+    size: int
+    percentage: float
+    characteristics: Dict[str, float]
+    top_features: Dict[str, float]
+    poverty_rate: float
+    description: str
+
+class ClusterProfilesResponse(BaseModel):
+    model_id: str
+    total_households: int
+    clusters: List[ClusterProfile]
+
+class HouseholdCluster(BaseModel):
+    hh_id: str
+    cluster_id: int
+    cluster_name: str
+    cluster_probability: float
+    cluster_distance: float
+    similar_households: int
+    model_id: str
 
 # Objective 3: Prediction
 class PredictionRequest(BaseModel):
+    # Counts are bounded by poverty_predictions' UInt8 columns, codes by their survey values
     province_name: str
-    urb_rur: int  # 1=Urban, 2=Rural
-    no_of_indiv: int
-    no_sleeping_rooms: int
-    house_type: int  # 1-6
-    has_electricity: int  # 0/1
-    television: int  # 0/1/2
-    ref: int  # 0/1/2
-    motorcycle: int  # 0/1/2
+    urb_rur: int = Field(..., ge=1, le=2)  # 1=Urban, 2=Rural
+    no_of_indiv: int = Field(..., ge=1, le=255)
+    no_sleeping_rooms: int = Field(..., ge=0, le=255)
+    house_type: int = Field(..., ge=1, le=6)  # 1-6
+    has_electricity: int = Field(..., ge=0, le=2)  # 0/1 (roster coding 1/2 also accepted)
+    television: int = Field(..., ge=0, le=2)  # 0/1/2
+    ref: int = Field(..., ge=0, le=2)  # 0/1/2
+    motorcycle: int = Field(..., ge=0, le=2)  # 0/1/2
+
+class FeatureContribution(BaseModel):
+    feature: str
+    value: Any  # Questionnaire answer
+    contribution: float  # coef * scaled value: the feature's term of decision_score; positive pushes toward Poor
+
+class PredictionExplanation(BaseModel):
+    base_value: float  # Model intercept
+    decision_score: float  # base_value + sum of contributions; > 0 leans Poor
+    contributions: Dict[str, float]  # Feature -> contribution, in model feature order
+    top_drivers: List[FeatureContribution]  # Largest absolute contributions first
 
 class PredictionResponse(BaseModel):
     prediction_id: str
@@ -41,6 +114,50 @@ class PredictionResponse(BaseModel):
     probability_nonpoor: float
     model_version: str
     recommendation: str
+    explanation: Optional[PredictionExplanation] = None  # Only with explain=true
+
+class BatchPredictionRequest(BaseModel):
+    households: List[PredictionRequest]
+
+class BatchPredictionResponse(BaseModel):
+    predictions: List[PredictionResponse]
+
+class PredictionStatsBucket(BaseModel):
+    bucket: datetime  # Start of the hour or day
+    province_name: Optional[str] = None  # None when not grouped by it
+    model_version: Optional[str] = None
+    predictions: int
+    predicted_poor: int
+    poor_share: float
+    mean_probability: float  # Of the predicted class
+    probability_quantiles: Dict[str, float]  # p10, p25, p50, p75, p90 (t-digest)
+
+class PredictionStatsResponse(BaseModel):
+    grain: str
+    start: datetime
+    end: datetime
+    buckets: List[PredictionStatsBucket]
+
+class FeatureDrift(BaseModel):
+    feature: str
+    samples: int
+    psi: Optional[float] = None
+    ks: Optional[float] = None  # Ordinal features only
+    ks_pvalue: Optional[float] = None
+    status: str  # stable, warn, drift, no_reference
+
+class ProvinceDrift(BaseModel):
+    province: str  # 'ALL' pools every province
+    samples: int
+    status: str  # Worst feature status, or insufficient_data
+    features: List[FeatureDrift]
+
+class DriftReport(BaseModel):
+    computed_at: datetime
+    model_version: str
+    window_start: Optional[datetime] = None  # Oldest input counted
+    samples: int
+    provinces: List[ProvinceDrift]
 
 # Data Viewer
 class DataTableRequest(BaseModel):
@@ -56,6 +173,109 @@ class DataTableResponse(BaseModel):
     limit: int
     total_pages: int
 
+class FacetValue(BaseModel):
+    value: Any
+    count: int
+
+class Facet(BaseModel):
+    column: str
+    values: List[FacetValue]  # Most frequent first
+    truncated: bool  # More values exist than were returned
+
+class ValueCount(BaseModel):
+    value: Any
+    count: Optional[int] = None  # None when from an approximate topK
+
+class HistogramBin(BaseModel):  # lower == upper: one bin per value of a code column
+    lower: Optional[float] = None
+    upper: Optional[float] = None
+    count: float
+
+class ColumnProfile(BaseModel):
+    name: str
+    type: str
+    count: int
+    null_count: int  # Empty strings for String columns
+    null_rate: Optional[float] = None
+    distinct_approx: int  # Exact for UInt8 columns
+    min: Optional[Any] = None
+    max: Optional[Any] = None
+    min_length: Optional[int] = None  # String columns
+    max_length: Optional[int] = None
+    mean: Optional[float] = None
+    std: Optional[float] = None
+    top_values: Optional[List[ValueCount]] = None
+    histogram: Optional[List[HistogramBin]] = None
+
+class TableProfileResponse(BaseModel):
+    table: str
+    total_rows: int
+    columns: List[ColumnProfile]
+    correlation: Optional[Dict[str, Dict[str, Optional[float]]]] = None  # Numeric columns, Pearson
+
+# Geography
+class GeoMatch(BaseModel):
+    level: str  # region, province, city, barangay
+    name: str
+    code: Optional[str] = None  # PSGC code
+    region_name: Optional[str] = None
+    province_name: Optional[str] = None
+    city_name: Optional[str] = None
+    barangay_name: Optional[str] = None
+    households: int
+    filters: Dict[str, List[str]]  # Exact-match data viewer filters selecting this place
+
+class GeoSearchResponse(BaseModel):
+    query: str
+    matches: List[GeoMatch]
+    took_us: float
+    places: int  # Size of the index
+
+# Background jobs
+class JobRequest(BaseModel):
+    type: str  # export, train, score_roster, cluster_train
+    params: Dict[str, Any] = {}
+    priority: int = 0  # Higher runs first within a lane
+    lane: Optional[str] = None  # interactive or batch; defaults per job type
+
+class JobResponse(BaseModel):
+    job_id: str
+    type: str
+    lane: str
+    priority: int
+    params: Dict[str, Any]
+    status: str  # queued, running, completed, failed, cancelled
+    progress: float
+    message: Optional[str] = None
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    result_file: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+# Request profiles
+class ProfileQuery(BaseModel):
+    operation: str
+    ms: float
+    sql: str
+
+class ProfileSummary(BaseModel):
+    profile_id: str
+    created_at: str
+    method: str
+    path: str
+    query: str
+    route: Optional[str] = None
+    status_code: int
+    duration_ms: float
+    trigger: str  # header or sample
+    samples: int
+    interval_ms: float
+    stages: Dict[str, float]  # endpoint, row_conversion, response_validation, ... (ms)
+    query_ms: float
+    queries: Optional[List[ProfileQuery]] = None
+
 class ColumnInfo(BaseModel):
     name: str
     type: str
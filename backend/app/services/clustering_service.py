@@ -0,0 +1,124 @@
+import os
+import pickle
+from typing import Optional
+from app.database import get_clickhouse_client
+from app.services import job_service
+
+# Share of overall progress per training stage: (start, weight)
+STAGE_WEIGHTS = {
+    'sampling': (0.0, 0.05),
+    'fitting': (0.05, 0.45),
+    'assigning': (0.5, 0.45),
+    'saving': (0.95, 0.05)
+}
+
+_model_cache = {'mtime': None, 'model': None}
+
+def _latest_training_job() -> Optional[dict]:
+    jobs = job_service.list_jobs(job_type='cluster_train', limit=1)
+    return jobs[0] if jobs else None
+
+def _training_status(job: Optional[dict]) -> dict:
+    """Clustering view of a cluster_train job"""
+    if job is None:
+        return {'status': 'idle'}
+    return {
+        'job_id': job['job_id'],
+        'status': job['status'],
+        'stage': job['message'] if job['status'] == 'running' else None,
+        'progress': job['progress'],
+        'params': job['params'],
+        'started_at': job['started_at'],
+        'finished_at': job['finished_at'],
+        'model_id': (job['result'] or {}).get('model_id'),
+        'error': job['error']
+    }
+
+def get_training_status() -> dict:
+    """Status of the most recent clustering run"""
+    return _training_status(_latest_training_job())
+
+def start_training(params: dict) -> Optional[dict]:
+    """Queue a cluster_train job; None if one is already queued or running"""
+    # Reject bad parameters before accepting the job
+    if params.get('clustering_method', 'k-prototypes') != 'k-prototypes':
+        raise ValueError(f"Unsupported clustering method: {params['clustering_method']}")
+    from app.ml.clustering import split_features
+    split_features(params.get('features'))
+
+    try:
+        job = job_service.submit_job('cluster_train', params)
+    except job_service.JobConflict:
+        return None
+    return _training_status(job)
+
+def load_cluster_model(model_path: Optional[str] = None) -> Optional[dict]:
+    """Load the clustering artifact, re-reading it when a new run replaces the file"""
+    if model_path is None:
+        # Imported here: app.ml.clustering pulls in NumPy and scikit-learn
+        from app.ml.clustering import CLUSTER_MODEL_PATH as model_path
+    try:
+        mtime = os.path.getmtime(model_path)
+    except OSError:
+        return None
+
+    if _model_cache['mtime'] != mtime:
+        with open(model_path, 'rb') as f:
+            _model_cache['model'] = pickle.load(f)
+        _model_cache['mtime'] = mtime
+
+    return _model_cache['model']
+
+def summarize_model(model_data: dict) -> dict:
+    """Training summary of a clustering model"""
+    return {
+        'model_id': model_data['model_id'],
+        'n_clusters': model_data['kprototypes']['n_clusters'],
+        'features': model_data['numeric_features'] + model_data['categorical_features'],
+        'clustering_method': 'k-prototypes',
+        'silhouette_score': model_data['silhouette_score'],
+        'training_samples': model_data['training_samples'],
+        'cluster_sizes': model_data['cluster_sizes'],
+        'trained_at': model_data['trained_at']
+    }
+
+def get_profiles() -> Optional[dict]:
+    """Precomputed cluster profiles of the current model"""
+    model_data = load_cluster_model()
+    if model_data is None:
+        return None
+    return {
+        'model_id': model_data['model_id'],
+        'total_households': model_data['assigned_households'],
+        'clusters': model_data['profiles']
+    }
+
+def get_household_cluster(hh_id: str) -> Optional[dict]:
+    """Cluster assignment of one household under the current model"""
+    model_data = load_cluster_model()
+    if model_data is None:
+        return None
+
+    client = get_clickhouse_client()
+    query = """
+        SELECT cluster_id, cluster_probability, cluster_distance
+        FROM household_clusters
+        WHERE hh_id = {hh_id:String} AND model_version = {version:String}
+        ORDER BY assigned_at DESC
+        LIMIT 1
+    """
+    rows = client.query(query, parameters={'hh_id': hh_id, 'version': model_data['version']}).result_rows
+    if not rows:
+        return None
+
+    cluster_id, probability, distance = rows[0]
+    profile = next(p for p in model_data['profiles'] if p['cluster_id'] == cluster_id)
+    return {
+        'hh_id': hh_id,
+        'cluster_id': cluster_id,
+        'cluster_name': profile['cluster_name'],
+        'cluster_probability': round(float(probability), 4),
+        'cluster_distance': round(float(distance), 4),
+        'similar_households': max(profile['size'] - 1, 0),
+        'model_id': model_data['model_id']
+    }
@@ -1,5 +1,7 @@
 from app.database import get_clickhouse_client
-from typing import List, Dict, Any, Optional
+from app.utils import query_cache
+from app.utils.metrics import set_filter_shape, stage_timer
+from typing import Callable, List, Dict, Any, Optional
 import math
 import io
 
@@ -53,97 +55,100 @@ PREDICTIONS_COLUMNS = {
     'model_version': 'String'
 }
 
+def filter_conditions(key: str, value: Any) -> List[str]:
+    """SQL conditions for one filter"""
+    if value is None or value == "":
+        return []
+
+    conditions = []
+    # Handle different filter types
+    if isinstance(value, dict):
+        # Range filter: {'min': 10, 'max': 20}
+        if 'min' in value and value['min'] is not None:
+            conditions.append(f"{key} >= {value['min']}")
+        if 'max' in value and value['max'] is not None:
+            conditions.append(f"{key} <= {value['max']}")
+    elif isinstance(value, list):
+        # IN filter: ['value1', 'value2']
+        if value:
+            values_str = "', '".join(str(v) for v in value)
+            conditions.append(f"{key} IN ('{values_str}')")
+    elif isinstance(value, str):
+        # String contains filter
+        conditions.append(f"{key} LIKE '%{value}%'")
+    else:
+        # Exact match
+        if isinstance(value, str):
+            conditions.append(f"{key} = '{value}'")
+        else:
+            conditions.append(f"{key} = {value}")
+    return conditions
+
 def build_where_clause(filters: Optional[Dict[str, Any]]) -> str:
     """Build SQL WHERE clause from filters"""
+    set_filter_shape(filters)
     if not filters:
         return ""
 
     conditions = []
     for key, value in filters.items():
-        if value is None or value == "":
-            continue
-
-        # Handle different filter types
-        if isinstance(value, dict):
-            # Range filter: {'min': 10, 'max': 20}
-            if 'min' in value and value['min'] is not None:
-                conditions.append(f"{key} >= {value['min']}")
-            if 'max' in value and value['max'] is not None:
-                conditions.append(f"{key} <= {value['max']}")
-        elif isinstance(value, list):
-            # IN filter: ['value1', 'value2']
-            if value:
-                values_str = "', '".join(str(v) for v in value)
-                conditions.append(f"{key} IN ('{values_str}')")
-        elif isinstance(value, str):
-            # String contains filter
-            conditions.append(f"{key} LIKE '%{value}%'")
-        else:
-            # Exact match
-            if isinstance(value, str):
-                conditions.append(f"{key} = '{value}'")
-            else:
-                conditions.append(f"{key} = {value}")
+        conditions.extend(filter_conditions(key, value))
 
     if conditions:
         return " WHERE " + " AND ".join(conditions)
     return ""
 
-def get_poverty_data(
-    page: int = 1,
-    limit: int = 100,
-    columns: Optional[List[str]] = None,
-    filters: Optional[Dict[str, Any]] = None
-) -> Dict[str, Any]:
-    """Get paginated poverty data"""
+def _fetch_page(table: str, columns: List[str], where_clause: str, order_by: str,
+                page: int, limit: int, convert: Optional[Callable[[Any], Any]] = None) -> List[list]:
+    """One page as a list of column value lists"""
     client = get_clickhouse_client()
-
-    # Determine columns to select
-    if columns:
-        # Validate requested columns
-        valid_columns = [col for col in columns if col in POVERTY_DATA_COLUMNS]
-        if not valid_columns:
-            valid_columns = list(POVERTY_DATA_COLUMNS.keys())[:15]  # Default to first 15
-        select_columns = ', '.join(valid_columns)
-    else:
-        # Default columns
-        default_cols = ['hh_id', 'province_name', 'city_name', 'barangay_name', 'urb_rur',
-                       'no_of_indiv', 'no_sleeping_rooms', 'house_type', 'has_electricity',
-                       'television', 'ref', 'motorcycle', 'poverty_status', 'poor']
-        select_columns = ', '.join(default_cols)
-        valid_columns = default_cols
-
-    # Build WHERE clause
+    offset = (page - 1) * limit
+    data_query = f"""
+        SELECT {', '.join(columns)}
+        FROM {table}
+        {where_clause}
+        ORDER BY {order_by}
+        LIMIT {limit} OFFSET {offset}
+    """
+    result = client.query(data_query)
+    values = [list(column) for column in result.result_columns] or [[] for _ in columns]
+    if convert is not None:
+        values = [[convert(v) for v in column] for column in values]
+    return values
+
+def _paginate(table: str, columns: List[str], filters: Optional[Dict[str, Any]], order_by: str,
+              page: int, limit: int, convert: Optional[Callable[[Any], Any]] = None) -> Dict[str, Any]:
+    """Count and page of a table, served from the result cache when the data has not changed"""
     where_clause = build_where_clause(filters)
+    version = query_cache.data_version(table)
 
-    # Get total count
-    count_query = f"SELECT COUNT(*) FROM poverty_data{where_clause}"
-    count_result = client.query(count_query)
-    total = count_result.result_rows[0][0]
+    # Counts do not depend on columns or page, so every page of a view shares one
+    count_key = query_cache.make_key(table, 'count', version, filters=filters)
+    total = query_cache.get_or_load(
+        count_key,
+        lambda: get_clickhouse_client().query(f"SELECT COUNT(*) FROM {table}{where_clause}").result_rows[0][0]
+    )
 
     # Calculate pagination
-    offset = (page - 1) * limit
     total_pages = math.ceil(total / limit) if limit > 0 else 0
 
-    # Get data
-    data_query = f"""
-        SELECT {select_columns}
-        FROM poverty_data
-        {where_clause}
-        ORDER BY province_name, city_name, hh_id
-        LIMIT {limit} OFFSET {offset}
-    """
+    def page_key(number):
+        return query_cache.make_key(table, 'page', version, columns=columns, filters=filters,
+                                    order_by=order_by, page=number, limit=limit)
 
-    result = client.query(data_query)
-    rows = result.result_rows
+    values = query_cache.get_or_load(
+        page_key(page),
+        lambda: _fetch_page(table, columns, where_clause, order_by, page, limit, convert)
+    )
+    if page < total_pages:
+        query_cache.prefetch(
+            page_key(page + 1),
+            lambda: _fetch_page(table, columns, where_clause, order_by, page + 1, limit, convert)
+        )
 
     # Convert to list of dicts
-    data = []
-    for row in rows:
-        row_dict = {}
-        for idx, col_name in enumerate(valid_columns):
-            row_dict[col_name] = row[idx]
-        data.append(row_dict)
+    with stage_timer('row_conversion'):
+        data = [dict(zip(columns, row)) for row in zip(*values)]
 
     return {
         'data': data,
@@ -153,6 +158,33 @@ def get_poverty_data(
         'total_pages': total_pages
     }
 
+def _to_json_value(value):
+    # Convert UUID and DateTime to string for JSON serialization
+    if isinstance(value, (bytes,)):
+        return str(value)
+    return value
+
+def get_poverty_data(
+    page: int = 1,
+    limit: int = 100,
+    columns: Optional[List[str]] = None,
+    filters: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Get paginated poverty data"""
+    # Determine columns to select
+    if columns:
+        # Validate requested columns
+        valid_columns = [col for col in columns if col in POVERTY_DATA_COLUMNS]
+        if not valid_columns:
+            valid_columns = list(POVERTY_DATA_COLUMNS.keys())[:15]  # Default to first 15
+    else:
+        # Default columns
+        valid_columns = ['hh_id', 'province_name', 'city_name', 'barangay_name', 'urb_rur',
+                         'no_of_indiv', 'no_sleeping_rooms', 'house_type', 'has_electricity',
+                         'television', 'ref', 'motorcycle', 'poverty_status', 'poor']
+
+    return _paginate('poverty_data', valid_columns, filters, 'province_name, city_name, hh_id', page, limit)
+
 def get_predictions_data(
     page: int = 1,
     limit: int = 100,
@@ -160,85 +192,269 @@ def get_predictions_data(
     filters: Optional[Dict[str, Any]] = None
 ) -> Dict[str, Any]:
     """Get paginated predictions data"""
-    client = get_clickhouse_client()
-
     # Determine columns to select
     if columns:
         valid_columns = [col for col in columns if col in PREDICTIONS_COLUMNS]
         if not valid_columns:
             valid_columns = list(PREDICTIONS_COLUMNS.keys())
-        select_columns = ', '.join(valid_columns)
     else:
         # All columns by default
-        select_columns = ', '.join(PREDICTIONS_COLUMNS.keys())
         valid_columns = list(PREDICTIONS_COLUMNS.keys())
 
-    # Build WHERE clause
-    where_clause = build_where_clause(filters)
+    return _paginate('poverty_predictions', valid_columns, filters, 'prediction_date DESC', page, limit,
+                     convert=_to_json_value)
+
+def get_available_columns(table_name: str) -> List[Dict[str, str]]:
+    """Get available columns for a table"""
+    if table_name == 'poverty_data':
+        columns = POVERTY_DATA_COLUMNS
+    elif table_name == 'poverty_predictions':
+        columns = PREDICTIONS_COLUMNS
+    else:
+        return []
 
-    # Get total count
-    count_query = f"SELECT COUNT(*) FROM poverty_predictions{where_clause}"
-    count_result = client.query(count_query)
-    total = count_result.result_rows[0][0]
+    return [
+        {'name': name, 'type': col_type}
+        for name, col_type in columns.items()
+    ]
 
-    # Calculate pagination
-    offset = (page - 1) * limit
-    total_pages = math.ceil(total / limit) if limit > 0 else 0
+# Columns offered as facets: everything but the household id
+FACET_COLUMNS = [name for name in POVERTY_DATA_COLUMNS if name != 'hh_id']
 
-    # Get data
-    data_query = f"""
-        SELECT {select_columns}
-        FROM poverty_predictions
+def _compute_facets(columns: List[str], filters: Dict[str, Any], limit: int) -> List[Dict[str, Any]]:
+    client = get_clickhouse_client()
+
+    # Filters on non-facet columns apply to every facet and go in WHERE; a
+    # facet column's own filter is left out of its counts only
+    conditions = {key: filter_conditions(key, value) for key, value in filters.items()}
+    common = [c for key, conds in conditions.items() if key not in columns for c in conds]
+    where_clause = " WHERE " + " AND ".join(common) if common else ""
+
+    counts = []
+    for index, column in enumerate(columns):
+        others = [c for key, conds in conditions.items() if key in columns and key != column for c in conds]
+        # GROUPING() sets the bit of every column left out of the row's grouping set
+        mask = sum(1 << (len(columns) - 1 - i) for i in range(len(columns)) if i != index)
+        counts.append((mask, f"countIf({' AND '.join(others)})" if others else "count()"))
+    if len(counts) == 1:
+        count_expr = counts[0][1]
+    else:
+        branches = ", ".join(f"facet_set = {mask}, {expr}" for mask, expr in counts[:-1])
+        count_expr = f"multiIf({branches}, {counts[-1][1]})"
+
+    query = f"""
+        SELECT GROUPING({', '.join(columns)}) AS facet_set, {', '.join(columns)}, {count_expr} AS n
+        FROM poverty_data
         {where_clause}
-        ORDER BY prediction_date DESC
-        LIMIT {limit} OFFSET {offset}
+        GROUP BY GROUPING SETS ({', '.join(f'({c})' for c in columns)})
+        HAVING n > 0
+        ORDER BY facet_set, n DESC
+        LIMIT {limit + 1} BY facet_set
     """
+    result = client.query(query, settings={'force_grouping_standard_compatibility': 1})
 
-    result = client.query(data_query)
-    rows = result.result_rows
+    by_mask = {mask: index for index, (mask, _) in enumerate(counts)}
+    values = [[] for _ in columns]
+    for row in result.result_rows:
+        index = by_mask[row[0]]
+        values[index].append({'value': row[1 + index], 'count': row[-1]})
 
-    # Convert to list of dicts
-    data = []
-    for row in rows:
-        row_dict = {}
-        for idx, col_name in enumerate(valid_columns):
-            value = row[idx]
-            # Convert UUID and DateTime to string for JSON serialization
-            if isinstance(value, (bytes,)):
-                value = str(value)
-            row_dict[col_name] = value
-        data.append(row_dict)
+    return [
+        {'column': column, 'values': values[index][:limit], 'truncated': len(values[index]) > limit}
+        for index, column in enumerate(columns)
+    ]
+
+def get_facets(
+    columns: List[str],
+    filters: Optional[Dict[str, Any]] = None,
+    limit: int = 100
+) -> List[Dict[str, Any]]:
+    """Distinct values with counts of several poverty_data columns, in one GROUPING SETS query
+
+    Each column's counts apply every active filter except the one on that
+    column itself, so the values offered for a column are its alternatives
+    under the other filters. Values come most frequent first, at most
+    `limit` per column. Results are cached per data version.
+    """
+    valid_columns = list(dict.fromkeys(col for col in columns if col in FACET_COLUMNS))
+    if not valid_columns:
+        raise ValueError(f"No facet columns among: {', '.join(columns)}")
+    filters = {key: value for key, value in (filters or {}).items() if filter_conditions(key, value)}
+    set_filter_shape(filters)
+
+    key = query_cache.make_key('poverty_data', 'facets', query_cache.data_version('poverty_data'),
+                               columns=valid_columns, filters=filters, limit=limit)
+    return query_cache.get_or_load(key, lambda: _compute_facets(valid_columns, filters, limit))
+
+NUMERIC_TYPES = ('UInt8', 'UInt16', 'UInt32', 'UInt64', 'Float32', 'Float64')
+
+def _finite(value):
+    """Float for JSON, None for NaN/inf (e.g. corr of a constant column)"""
+    if value is None:
+        return None
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+def _profile_aggregates(index: int, name: str, col_type: str, bins: int, top_k: int) -> List[str]:
+    """Aggregates profiling one column, aliased c{index}_{stat}"""
+    alias = f"c{index}"
+    if col_type == 'UInt8':
+        # Code columns: exact frequencies of at most 256 values, everything else derives from them
+        return [f"sumMap(map({name}, toUInt64(1))) AS {alias}_counts"]
+
+    aggregates = [f"uniq({name}) AS {alias}_distinct"]
+    if col_type in NUMERIC_TYPES:
+        aggregates += [
+            f"min({name}) AS {alias}_min",
+            f"max({name}) AS {alias}_max",
+            f"avg({name}) AS {alias}_mean",
+            f"stddevPop({name}) AS {alias}_std",
+            f"histogram({bins})(toFloat64({name})) AS {alias}_histogram",
+            f"topK({top_k})({name}) AS {alias}_top"
+        ]
+    elif col_type == 'String':
+        aggregates += [
+            f"countIf({name} = '') AS {alias}_empty",
+            f"topK({top_k})({name}) AS {alias}_top",
+            f"min(length({name})) AS {alias}_min_length",
+            f"max(length({name})) AS {alias}_max_length"
+        ]
+    elif col_type == 'DateTime':
+        aggregates += [f"toString(min({name})) AS {alias}_min", f"toString(max({name})) AS {alias}_max"]
+    return aggregates
+
+def _profile_from_counts(profile: Dict[str, Any], counts: Dict[Any, int], top_k: int):
+    """Fill distinct, min/max, mean/std, top values and histogram from exact value counts"""
+    total = sum(counts.values())
+    values = sorted(counts)
+    profile['distinct_approx'] = len(values)
+    profile['top_values'] = [
+        {'value': v, 'count': c} for v, c in sorted(counts.items(), key=lambda item: -item[1])[:top_k]
+    ]
+    profile['histogram'] = [{'lower': v, 'upper': v, 'count': counts[v]} for v in values]
+    if total:
+        mean = sum(v * c for v, c in counts.items()) / total
+        profile.update({
+            'min': values[0],
+            'max': values[-1],
+            'mean': mean,
+            'std': math.sqrt(sum(c * (v - mean) ** 2 for v, c in counts.items()) / total)
+        })
+
+def _compute_column_profile(table_name: str, columns: Dict[str, str], where_clause: str,
+                            bins: int, top_k: int, correlation: bool) -> Dict[str, Any]:
+    client = get_clickhouse_client()
+    names = list(columns)
+    numeric = [name for name in names if columns[name] in NUMERIC_TYPES]
+
+    select = ["count() AS total_rows"]
+    for index, name in enumerate(names):
+        select += _profile_aggregates(index, name, columns[name], bins, top_k)
+    pairs = [(a, b) for i, a in enumerate(numeric) for b in numeric[i + 1:]] if correlation else []
+    select += [f"corr(toFloat64({a}), toFloat64({b})) AS r{i}" for i, (a, b) in enumerate(pairs)]
+
+    # Everything in one scan of the table
+    result = client.query(f"SELECT {', '.join(select)} FROM {table_name}{where_clause}")
+    row = dict(zip(result.column_names, result.first_row()))
+    total = row['total_rows']
+
+    with stage_timer('row_conversion'):
+        profiles = []
+        for index, name in enumerate(names):
+            stat = lambda key: row.get(f"c{index}_{key}")  # noqa: E731
+            missing = stat('empty') or 0
+            profile = {
+                'name': name,
+                'type': columns[name],
+                'count': total,
+                'null_count': missing,
+                'null_rate': round(missing / total, 6) if total else None,
+                'distinct_approx': stat('distinct'),
+                'min': None,
+                'max': None,
+                'min_length': None,
+                'max_length': None,
+                'mean': None,
+                'std': None,
+                'top_values': None,
+                'histogram': None
+            }
+            if stat('counts') is not None:
+                _profile_from_counts(profile, dict(stat('counts')), top_k)
+            elif total:
+                # Aggregates of an empty selection are type defaults, not values
+                profile.update({
+                    'min': stat('min'),
+                    'max': stat('max'),
+                    'min_length': stat('min_length'),
+                    'max_length': stat('max_length'),
+                    'mean': _finite(stat('mean')),
+                    'std': _finite(stat('std'))
+                })
+                if stat('top') is not None:
+                    profile['top_values'] = [{'value': v, 'count': None} for v in stat('top')]
+                if stat('histogram') is not None:
+                    profile['histogram'] = [
+                        {'lower': _finite(lower), 'upper': _finite(upper), 'count': round(float(height), 2)}
+                        for lower, upper, height in stat('histogram')
+                    ]
+            profiles.append(profile)
+
+        matrix = None
+        if correlation:
+            matrix = {name: {name: 1.0} for name in numeric}
+            for i, (a, b) in enumerate(pairs):
+                matrix[a][b] = matrix[b][a] = _finite(row[f"r{i}"])
 
     return {
-        'data': data,
-        'total': total,
-        'page': page,
-        'limit': limit,
-        'total_pages': total_pages
+        'table': table_name,
+        'total_rows': total,
+        'columns': profiles,
+        'correlation': matrix
     }
 
-def get_available_columns(table_name: str) -> List[Dict[str, str]]:
-    """Get available columns for a table"""
+def get_column_profile(
+    table_name: str,
+    columns: Optional[List[str]] = None,
+    filters: Optional[Dict[str, Any]] = None,
+    bins: int = 10,
+    top_k: int = 10,
+    correlation: bool = True
+) -> Dict[str, Any]:
+    """Per-column statistics and numeric correlations of a table, in a single ClickHouse pass
+
+    Null counts are empty strings for String columns (the roster has no
+    Nullable columns). Code (UInt8) columns are profiled from exact value
+    counts: one histogram bin per value, top values with counts. Other
+    numeric columns get an adaptive histogram (ClickHouse histogram: bin
+    widths vary, counts are approximate). Their distinct counts (uniq) and
+    top values (topK, without counts) are approximate, as are those of
+    String columns. Results are cached per data version.
+    """
     if table_name == 'poverty_data':
-        columns = POVERTY_DATA_COLUMNS
+        available_columns = POVERTY_DATA_COLUMNS
     elif table_name == 'poverty_predictions':
-        columns = PREDICTIONS_COLUMNS
+        available_columns = PREDICTIONS_COLUMNS
     else:
-        return []
+        raise ValueError(f"Unknown table: {table_name}")
 
-    return [
-        {'name': name, 'type': col_type}
-        for name, col_type in columns.items()
-    ]
+    valid_columns = [col for col in (columns or []) if col in available_columns] or list(available_columns)
+    selected = {name: available_columns[name] for name in valid_columns}
+    where_clause = build_where_clause(filters)
 
-def generate_csv_export(
+    key = query_cache.make_key(table_name, 'profile', query_cache.data_version(table_name),
+                               columns=valid_columns, filters=filters, bins=bins, top_k=top_k,
+                               correlation=correlation)
+    return query_cache.get_or_load(
+        key, lambda: _compute_column_profile(table_name, selected, where_clause, bins, top_k, correlation)
+    )
+
+def build_export_query(
     table_name: str,
     columns: Optional[List[str]] = None,
     filters: Optional[Dict[str, Any]] = None
-) -> str:
-    """Generate CSV export for data with filters"""
-    client = get_clickhouse_client()
-
+):
+    """Validated export columns, data query and count query for a table"""
     # Determine which table and columns
     if table_name == 'poverty_data':
         available_columns = POVERTY_DATA_COLUMNS
@@ -247,7 +463,7 @@ def generate_csv_export(
         available_columns = PREDICTIONS_COLUMNS
         order_by = "prediction_date DESC"
     else:
-        return ""
+        raise ValueError(f"Unknown table: {table_name}")
 
     # Validate and select columns
     if columns:
@@ -262,37 +478,54 @@ def generate_csv_export(
     # Build WHERE clause
     where_clause = build_where_clause(filters)
 
-    # Query data
     query = f"""
         SELECT {select_columns}
         FROM {table_name}
         {where_clause}
         ORDER BY {order_by}
-        LIMIT 100000
     """
+    count_query = f"SELECT COUNT(*) FROM {table_name}{where_clause}"
+    return valid_columns, query, count_query
+
+def generate_csv_export(
+    table_name: str,
+    columns: Optional[List[str]] = None,
+    filters: Optional[Dict[str, Any]] = None
+) -> str:
+    """Generate CSV export for data with filters"""
+    client = get_clickhouse_client()
+
+    try:
+        valid_columns, query, _ = build_export_query(table_name, columns, filters)
+    except ValueError:
+        return ""
+
+    # Synchronous exports are capped; use an 'export' job for everything
+    query += " LIMIT 100000"
 
     result = client.query(query)
     rows = result.result_rows
 
     # Generate CSV
-    output = io.StringIO()
-
-    # Write header
-    output.write(','.join(valid_columns) + '\n')
-
-    # Write data
-    for row in rows:
-        # Escape commas and quotes in data
-        escaped_row = []
-        for value in row:
-            value_str = str(value) if value is not None else ''
-            # If value contains comma or quote, wrap in quotes and escape quotes
-            if ',' in value_str or '"' in value_str or '\n' in value_str:
-                value_str = '"' + value_str.replace('"', '""') + '"'
-            escaped_row.append(value_str)
-        output.write(','.join(escaped_row) + '\n')
-
-    csv_content = output.getvalue()
-    output.close()
+    with stage_timer('serialization'):
+        output = io.StringIO()
+
+        # Write header
+        output.write(','.join(valid_columns) + '\n')
+
+        # Write data
+        for row in rows:
+            # Escape commas and quotes in data
+            escaped_row = []
+            for value in row:
+                value_str = str(value) if value is not None else ''
+                # If value contains comma or quote, wrap in quotes and escape quotes
+                if ',' in value_str or '"' in value_str or '\n' in value_str:
+                    value_str = '"' + value_str.replace('"', '""') + '"'
+                escaped_row.append(value_str)
+            output.write(','.join(escaped_row) + '\n')
+
+        csv_content = output.getvalue()
+        output.close()
 
     return csv_content
@@ -0,0 +1,296 @@
+"""Input-drift monitoring of prediction questionnaires.
+
+Every questionnaire scored by ml_service is counted into streaming
+histograms: per province, per model feature, per answer. Answers are small
+codes, so a histogram is an exact count per value (values beyond
+MAX_VALUES per feature share an overflow bin). Recording only counts raw
+answers, so it stays cheap on memo hits; the counts are encoded by the
+model's FeatureSpec when a report is computed, so they are compared as the
+model sees them and the form's coding (has_electricity 1/0) and the
+roster's (1/2) compare equal. Counts
+go into time windows of settings.drift_window_s, and the last
+settings.drift_windows windows are kept, so the monitor always covers a
+recent period and never rescans prediction history.
+
+The reference is the training population: the same per-province counts
+of the spec's SQL encodings over poverty_data, read with one GROUP BY when
+a model is first monitored. Every settings.drift_interval_s a background
+thread compares the recent inputs with it:
+- PSI (population stability index) per feature; below
+  settings.drift_psi_warn is 'stable', from settings.drift_psi_alert it is
+  'drift', in between 'warn'.
+- Two-sample Kolmogorov-Smirnov statistic and its asymptotic p-value for
+  ordinal (non-category) features (the p-value is conservative on integer
+  codes).
+Provinces with fewer than settings.drift_min_samples recent inputs report
+'insufficient_data'. The 'ALL' entry pools every province and includes
+the province mix itself.
+
+Counts live in the API process: each worker monitors its own traffic, and
+a restart starts a new period.
+"""
+import logging
+import math
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+from app.database import get_clickhouse_client
+from app.utils.metrics import DRIFT_PSI
+
+log = logging.getLogger('app.drift')
+
+ALL_PROVINCES = 'ALL'
+# Distinct values counted per feature; rarer extra values share the overflow bin
+MAX_VALUES = 64
+OVERFLOW = '__other__'
+# Probability floor for empty bins in PSI
+PSI_EPSILON = 1e-4
+
+
+class DriftMonitor:
+    """Windowed per-(province, feature) value counts of prediction inputs"""
+
+    def __init__(self):
+        self._windows: deque = deque()  # (window start, {(province, feature): Counter})
+        self._lock = threading.Lock()
+
+    def _current(self, now: float) -> Dict[tuple, Counter]:
+        window_s = settings.drift_window_s
+        start = now - now % window_s
+        if not self._windows or self._windows[-1][0] != start:
+            self._windows.append((start, {}))
+            while len(self._windows) > settings.drift_windows:
+                self._windows.popleft()
+        return self._windows[-1][1]
+
+    def record(self, inputs: List[dict], features: List[str]):
+        # Counted outside the lock; only the (few) distinct values are merged under it
+        provinces = [row.get('province_name') for row in inputs]
+        batch = {feature: Counter(zip(provinces, [row.get(feature) for row in inputs])) for feature in features}
+        with self._lock:
+            counts = self._current(time.time())
+            for feature, pairs in batch.items():
+                for (province, value), n in pairs.items():
+                    histogram = counts.get((province, feature))
+                    if histogram is None:
+                        histogram = counts[(province, feature)] = Counter()
+                    if value not in histogram and len(histogram) >= MAX_VALUES:
+                        value = OVERFLOW
+                    histogram[value] += n
+
+    def merged(self) -> tuple:
+        """(start of the oldest window kept, {(province, feature): Counter} over all kept windows)"""
+        cutoff = time.time() - settings.drift_window_s * settings.drift_windows
+        merged: Dict[tuple, Counter] = {}
+        with self._lock:
+            while self._windows and self._windows[0][0] < cutoff:
+                self._windows.popleft()
+            since = self._windows[0][0] if self._windows else None
+            for _, counts in self._windows:
+                for key, histogram in counts.items():
+                    merged.setdefault(key, Counter()).update(histogram)
+        return since, merged
+
+
+def psi(expected: Counter, actual: Counter) -> float:
+    """Population stability index of `actual` against `expected`"""
+    expected_total = sum(expected.values())
+    actual_total = sum(actual.values())
+    value = 0.0
+    for bin_value in set(expected) | set(actual):
+        e = max(expected.get(bin_value, 0) / expected_total, PSI_EPSILON)
+        a = max(actual.get(bin_value, 0) / actual_total, PSI_EPSILON)
+        value += (a - e) * math.log(a / e)
+    return value
+
+
+def ks(expected: Counter, actual: Counter) -> tuple:
+    """(two-sample KS statistic, asymptotic p-value) over ordinal values"""
+    n = sum(expected.values())
+    m = sum(actual.values())
+    values = sorted(v for v in set(expected) | set(actual) if v != OVERFLOW and v is not None)
+    statistic = 0.0
+    expected_cdf = actual_cdf = 0.0
+    for v in values:
+        expected_cdf += expected.get(v, 0) / n
+        actual_cdf += actual.get(v, 0) / m
+        statistic = max(statistic, abs(expected_cdf - actual_cdf))
+
+    # Kolmogorov distribution tail at sqrt(effective n) * D
+    lam = math.sqrt(n * m / (n + m)) * statistic
+    if lam < 0.27:
+        # The tail is 1 to within 1e-6 here, where the alternating series converges poorly
+        return statistic, 1.0
+    p = 2 * sum((-1) ** (k - 1) * math.exp(-2 * k * k * lam * lam) for k in range(1, 101))
+    return statistic, min(max(p, 0.0), 1.0)
+
+
+def _status(psi_value: Optional[float]) -> str:
+    if psi_value is None:
+        return 'no_reference'
+    if psi_value >= settings.drift_psi_alert:
+        return 'drift'
+    if psi_value >= settings.drift_psi_warn:
+        return 'warn'
+    return 'stable'
+
+
+_monitor = DriftMonitor()
+_reference: Dict[str, Any] = {'version': None, 'counts': None}
+_reference_lock = threading.Lock()
+_report: Optional[Dict[str, Any]] = None
+_report_lock = threading.Lock()
+_scheduler: Optional[threading.Thread] = None
+
+
+def record(inputs: List[dict], features: List[str]):
+    """Count the answers of scored questionnaires into the current window"""
+    if settings.drift_enabled:
+        _monitor.record(inputs, features)
+
+
+def _encode(feature, histogram: Counter) -> Counter:
+    """Raw answer counts re-keyed by the feature's encoding (answers it cannot encode are left out)"""
+    encoded: Counter = Counter()
+    for value, n in histogram.items():
+        if value == OVERFLOW:
+            encoded[OVERFLOW] += n
+            continue
+        try:
+            code = float(feature.transform([value])[0])
+        except (TypeError, ValueError):
+            # E.g. a province recorded under an earlier model
+            continue
+        encoded[code] += n
+    return encoded
+
+
+def _reference_counts(spec) -> Dict[tuple, Counter]:
+    """Per-(province, feature) encoded value counts of poverty_data in one pass, plus the ALL pool"""
+    client = get_clickhouse_client()
+    pairs = ', '.join(
+        f"('{feature}', toFloat64({expression}))"
+        for feature, expression in zip(spec.columns, spec.sql_expressions())
+    )
+    rows = client.query(f"""
+        SELECT province_name, pair.1 AS feature, pair.2 AS value, count()
+        FROM poverty_data
+        ARRAY JOIN [{pairs}] AS pair
+        -- Households the model cannot encode (e.g. a province added since training) are never served
+        WHERE {spec.sql_known()}
+        GROUP BY province_name, feature, value
+    """).result_rows
+
+    counts: Dict[tuple, Counter] = {}
+    for province, feature, value, n in rows:
+        counts.setdefault((province, feature), Counter())[value] += n
+        counts.setdefault((ALL_PROVINCES, feature), Counter())[value] += n
+    return counts
+
+
+def _get_reference(model_data: dict) -> Dict[tuple, Counter]:
+    with _reference_lock:
+        if _reference['version'] != model_data['version'] or _reference['counts'] is None:
+            _reference['counts'] = _reference_counts(model_data['feature_pipeline'])
+            _reference['version'] = model_data['version']
+        return _reference['counts']
+
+
+def _feature_drift(feature: str, expected: Optional[Counter], actual: Counter, ordinal: bool) -> Dict[str, Any]:
+    samples = sum(actual.values())
+    if not expected:
+        return {'feature': feature, 'samples': samples, 'psi': None, 'ks': None, 'ks_pvalue': None,
+                'status': 'no_reference'}
+    psi_value = psi(expected, actual)
+    ks_value, ks_pvalue = ks(expected, actual) if ordinal else (None, None)
+    return {'feature': feature, 'samples': samples, 'psi': round(psi_value, 6),
+            'ks': None if ks_value is None else round(ks_value, 6),
+            'ks_pvalue': None if ks_pvalue is None else round(ks_pvalue, 6),
+            'status': _status(psi_value)}
+
+
+def compute_report() -> Dict[str, Any]:
+    """Compare the kept windows of prediction inputs with the training reference"""
+    from app.ml.model_loader import load_svm_model
+    model_data = load_svm_model()
+    spec = model_data['feature_pipeline']
+    features = {f.name: f for f in spec.features}
+    # Category codes have no order: PSI only, no KS
+    ordinal = {f.name: f.kind != 'category' for f in spec.features}
+    reference = _get_reference(model_data)
+    since, recent = _monitor.merged()
+
+    # Pool the provinces for the ALL entry
+    by_province: Dict[str, Dict[str, Counter]] = {}
+    for (province, feature), raw in recent.items():
+        if feature not in features:
+            continue
+        histogram = _encode(features[feature], raw)
+        by_province.setdefault(province, {})[feature] = histogram
+        by_province.setdefault(ALL_PROVINCES, {}).setdefault(feature, Counter()).update(histogram)
+
+    provinces = []
+    for province in sorted(by_province, key=lambda p: (p != ALL_PROVINCES, str(p))):
+        histograms = by_province[province]
+        samples = sum(next(iter(histograms.values())).values())
+        entry = {'province': province, 'samples': samples, 'features': []}
+        if samples < settings.drift_min_samples:
+            entry['status'] = 'insufficient_data'
+            provinces.append(entry)
+            continue
+
+        for feature in spec.columns:
+            # The province feature is constant within a province
+            if feature in histograms and (province == ALL_PROVINCES or feature != 'province_name'):
+                drift = _feature_drift(feature, reference.get((province, feature)), histograms[feature],
+                                       ordinal[feature])
+                entry['features'].append(drift)
+                if drift['psi'] is not None:
+                    DRIFT_PSI.labels(province, feature).set(drift['psi'])
+        statuses = {f['status'] for f in entry['features']}
+        entry['status'] = next(
+            (s for s in ('drift', 'warn', 'stable') if s in statuses), 'no_reference'
+        )
+        provinces.append(entry)
+
+    report = {
+        'computed_at': datetime.now(),
+        'model_version': model_data['version'],
+        'window_start': datetime.fromtimestamp(since) if since is not None else None,
+        'samples': sum(p['samples'] for p in provinces if p['province'] != ALL_PROVINCES),
+        'provinces': provinces
+    }
+    global _report
+    with _report_lock:
+        _report = report
+    return report
+
+
+def get_report(refresh: bool = False) -> Dict[str, Any]:
+    """Latest scheduled report, or a fresh one when asked or none exists yet"""
+    with _report_lock:
+        report = _report
+    if refresh or report is None:
+        return compute_report()
+    return report
+
+
+def _run_scheduler():
+    while True:
+        time.sleep(settings.drift_interval_s)
+        try:
+            compute_report()
+        except Exception as e:
+            log.warning("Drift report failed: %s: %s", type(e).__name__, e)
+
+
+def start_scheduler() -> threading.Thread:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = threading.Thread(target=_run_scheduler, name='drift-monitor', daemon=True)
+        _scheduler.start()
+    return _scheduler
@@ -0,0 +1,251 @@
+"""Typeahead search over the geographic hierarchy of the roster.
+
+The index holds every region, province, city/municipality and barangay in
+poverty_data, with its PSGC code and household count. It is built from
+one GROUP BY over the geographic columns and kept in the API process as
+sorted lists of search keys, over all places and per level:
+- every word suffix of each name, so 'jose' finds 'SAN JOSE';
+- each PSGC code, so digits find by code prefix.
+A search bisects to the keys starting with the query and picks the best
+ranked of them (see RankedKeys). Names are matched case- and accent-insensitively
+('pena' finds 'PEÑA').
+
+Each match carries the exact filters selecting it. Barangays and cities
+include their parents, so the filter is unambiguous and uses the sort key
+(province_name, city_name, barangay_name).
+
+The index is built on first use (or by the startup warmup). It is rebuilt
+in the background when poverty_data's data version changes; the old index
+keeps serving meanwhile.
+"""
+import heapq
+import re
+import threading
+import time
+import unicodedata
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.database import get_clickhouse_client
+from app.utils import query_cache
+
+LEVELS = ('region', 'province', 'city', 'barangay')
+NAME_COLUMNS = ('region_name', 'province_name', 'city_name', 'barangay_name')
+
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+
+
+def normalize(text: str) -> str:
+    """Lowercase, accents stripped, punctuation folded to single spaces"""
+    decomposed = unicodedata.normalize('NFKD', text)
+    ascii_text = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return _NON_ALNUM.sub(' ', ascii_text.lower()).strip()
+
+
+class RankedKeys:
+    """Sorted (search key, place id) pairs with a fixed rank per key
+
+    A min segment tree over the ranks, in key order, gives the best-ranked
+    key of any key range in O(log n). The matches of a prefix are then
+    produced best first by splitting its key range around each best key, so
+    the first k cost O(k * log n) however many keys match.
+    """
+
+    def __init__(self, keyed: List[tuple], rank):
+        self.keys = [key for key, _ in keyed]
+        self.ids = array('I', [place_id for _, place_id in keyed])
+
+        by_rank = sorted(range(len(keyed)), key=lambda position: rank(*keyed[position]))
+        self.position_of = array('I', by_rank)
+        ranks = array('I', bytes(4 * len(keyed)))
+        for order, position in enumerate(by_rank):
+            ranks[position] = order
+
+        size = max(len(keyed), 1)
+        self._size = size
+        self._tree = array('I', [0xFFFFFFFF]) * (2 * size)
+        self._tree[size:size + len(keyed)] = ranks
+        for node in range(size - 1, 0, -1):
+            self._tree[node] = min(self._tree[2 * node], self._tree[2 * node + 1])
+
+    def _best(self, lo: int, hi: int) -> int:
+        """Lowest rank among key positions [lo, hi)"""
+        tree, best = self._tree, 0xFFFFFFFF
+        lo += self._size
+        hi += self._size
+        while lo < hi:
+            if lo & 1:
+                best = min(best, tree[lo])
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                best = min(best, tree[hi])
+            lo >>= 1
+            hi >>= 1
+        return best
+
+    def matches(self, prefix: str) -> Iterator[int]:
+        """Place ids of the keys starting with `prefix`, best-ranked first (a place may repeat)"""
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_left(self.keys, prefix + '\U0010ffff', lo)
+        heap = [(self._best(lo, hi), lo, hi)] if lo < hi else []
+        while heap:
+            best, lo, hi = heapq.heappop(heap)
+            position = self.position_of[best]
+            if lo < position:
+                heapq.heappush(heap, (self._best(lo, position), lo, position))
+            if position + 1 < hi:
+                heapq.heappush(heap, (self._best(position + 1, hi), position + 1, hi))
+            yield self.ids[position]
+
+
+class GeoIndex:
+    """Search keys over the places of one data version
+
+    Keys are held once over every place and once per level, each a
+    RankedKeys, so a search restricted to a level never walks past
+    better-ranked matches of other levels: both cost O(limit * log n).
+    """
+
+    def __init__(self, places: List[Dict[str, Any]], version=None):
+        self.places = places
+        self.version = version
+        names = [normalize(place['name']) for place in places]
+        keyed = []
+        for place_id, place in enumerate(places):
+            words = names[place_id].split()
+            for start in range(len(words)):
+                keyed.append((' '.join(words[start:]), place_id))
+            if place['code']:
+                keyed.append((place['code'], place_id))
+        keyed.sort()
+
+        # Whole-name (or code) matches first, then higher levels, more households, name
+        def rank(key, place_id):
+            place = places[place_id]
+            partial = key != names[place_id] and key != place['code']
+            return (partial, LEVELS.index(place['level']), -place['households'], place['name'])
+
+        self.all_keys = RankedKeys(keyed, rank)
+        self.level_keys = {
+            level: RankedKeys([entry for entry in keyed if places[entry[1]]['level'] == level], rank)
+            for level in LEVELS
+        }
+
+    def search(self, query: str, limit: int = 10, level: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Places with a name word or code starting with `query`, best first
+
+        Ranked: whole-name prefix matches first, then higher levels
+        (province before city before barangay), then more households.
+        """
+        prefix = normalize(query)
+        if not prefix:
+            return []
+
+        keys = self.all_keys if level is None else self.level_keys[level]
+        matches, seen = [], set()
+        for place_id in keys.matches(prefix):
+            # A place can match through several keys (a name word and its code)
+            if place_id in seen:
+                continue
+            seen.add(place_id)
+            matches.append(self.places[place_id])
+            if len(matches) == limit:
+                break
+        return matches
+
+    @classmethod
+    def from_rows(cls, rows, version=None) -> 'GeoIndex':
+        """Build from (region, province, city, barangay, psgc province/municipality/barangay, households) rows"""
+        places: Dict[tuple, Dict[str, Any]] = {}
+
+        def add(level: int, path: tuple, code, households: int):
+            place = places.get(path)
+            if place is None:
+                place = places[path] = {
+                    'level': LEVELS[level],
+                    'name': path[-1],
+                    'code': str(code) if code else None,
+                    'households': 0,
+                    **{NAME_COLUMNS[i]: path[i] if i < len(path) else None for i in range(len(NAME_COLUMNS))}
+                }
+            place['households'] += households
+
+        for region, province, city, barangay, psgc_province, psgc_municipality, psgc_barangay, households in rows:
+            add(0, (region,), None, households)
+            add(1, (region, province), psgc_province, households)
+            add(2, (region, province, city), psgc_municipality, households)
+            add(3, (region, province, city, barangay), psgc_barangay, households)
+
+        ordered = [place for place in places.values() if place['name']]
+        for place in ordered:
+            level = LEVELS.index(place['level'])
+            # Exact-match filters from the province down (the region is implied by it)
+            columns = NAME_COLUMNS[:1] if level == 0 else NAME_COLUMNS[1:level + 1]
+            place['filters'] = {column: [place[column]] for column in columns}
+        return cls(ordered, version)
+
+
+_index: Optional[GeoIndex] = None
+_build_lock = threading.Lock()
+_rebuild_lock = threading.Lock()  # Held while a background rebuild runs
+
+
+def _build() -> GeoIndex:
+    global _index
+    version = query_cache.data_version('poverty_data')
+    client = get_clickhouse_client()
+    result = client.query("""
+        SELECT region_name, province_name, city_name, barangay_name,
+               any(psgc_province), any(psgc_municipality), any(psgc_barangay), count()
+        FROM poverty_data
+        GROUP BY region_name, province_name, city_name, barangay_name
+    """)
+    _index = GeoIndex.from_rows(result.result_rows, version)
+    return _index
+
+
+def build_index() -> GeoIndex:
+    """Read the geographic hierarchy from poverty_data and swap in a new index (e.g. after an ingest)"""
+    with _build_lock:
+        return _build()
+
+
+def _rebuild_in_background():
+    if not _rebuild_lock.acquire(blocking=False):
+        return
+
+    def run():
+        try:
+            build_index()
+        finally:
+            _rebuild_lock.release()
+
+    threading.Thread(target=run, name='geo-index', daemon=True).start()
+
+
+def get_index() -> GeoIndex:
+    """Current index; built now if there is none, refreshed in the background if the data changed"""
+    index = _index
+    if index is None:
+        with _build_lock:
+            # Concurrent first requests wait for one build
+            return _index if _index is not None else _build()
+    version = query_cache.data_version('poverty_data')
+    if version is not None and version != index.version:
+        _rebuild_in_background()
+    return index
+
+
+def search(query: str, limit: int = 10, level: Optional[str] = None) -> Dict[str, Any]:
+    """Typeahead matches for `query`, with how long the index lookup took"""
+    index = get_index()
+    started = time.perf_counter()
+    matches = index.search(query, limit, level)
+    return {
+        'query': query,
+        'matches': matches,
+        'took_us': round((time.perf_counter() - started) * 1e6, 1),
+        'places': len(index.places)
+    }
@@ -0,0 +1,350 @@
+"""In-process job queue for long-running work (exports, training, scoring).
+
+Jobs run on small worker pools outside the request, one pool per lane:
+'interactive' for short user-facing work such as exports, and 'batch' for
+training and roster-wide passes. Heavy batch work therefore never occupies
+more than its own workers. Within a lane, higher priority runs first.
+
+Every job has a directory under settings.jobs_dir holding job.json (its
+status record) and its result file, so results survive restarts.
+Cancellation is immediate for queued jobs. Running jobs stop at their next
+progress report. Exclusive job types (cluster_train, which replaces a
+shared model file) accept one queued or running job at a time; submitting
+another raises JobConflict.
+"""
+import csv
+import itertools
+import json
+import os
+import pickle
+import queue
+import shutil
+import threading
+import traceback
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from app.config import settings
+
+LANES = ('interactive', 'batch')
+FINISHED = ('completed', 'failed', 'cancelled')
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when cancellation was requested"""
+
+
+class JobConflict(Exception):
+    """Raised when submitting an exclusive job type that already has a job queued or running"""
+
+
+class JobContext:
+    """What a running job sees: progress reporting, cancellation, its result dir"""
+
+    def __init__(self, job_id: str, result_dir: str):
+        self.job_id = job_id
+        self.result_dir = result_dir
+
+    def progress(self, fraction: float, message: str = None):
+        """Report progress; raises JobCancelled if the job was cancelled"""
+        _update(self.job_id, progress=round(min(max(float(fraction), 0.0), 1.0), 3), message=message)
+        self.check_cancelled()
+
+    def check_cancelled(self):
+        with _lock:
+            if self.job_id in _cancel_requested:
+                raise JobCancelled()
+
+
+_jobs: Dict[str, dict] = {}
+_cancel_requested = set()
+_lock = threading.Lock()
+_queues = {lane: queue.PriorityQueue() for lane in LANES}
+_sequence = itertools.count()
+_started = False
+
+
+def _job_dir(job_id: str) -> str:
+    return os.path.join(settings.jobs_dir, job_id)
+
+
+def _persist(job: dict):
+    """Write job.json atomically"""
+    path = os.path.join(_job_dir(job['job_id']), 'job.json')
+    # Per-thread temp name: a request thread may persist while the worker does
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(job, f, indent=2, default=str)
+    os.replace(tmp_path, path)
+
+
+def _update(job_id: str, **fields):
+    if fields.get('message', '') is None:
+        # Progress without a message keeps the last one
+        del fields['message']
+    with _lock:
+        job = _jobs[job_id]
+        job.update(fields)
+        snapshot = dict(job)
+    _persist(snapshot)
+
+
+def _load_existing():
+    """Pick up jobs from earlier runs; anything unfinished was interrupted"""
+    if not os.path.isdir(settings.jobs_dir):
+        return
+    for job_id in os.listdir(settings.jobs_dir):
+        path = os.path.join(settings.jobs_dir, job_id, 'job.json')
+        try:
+            with open(path) as f:
+                job = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if job['status'] not in FINISHED:
+            job.update(status='failed', error="Interrupted by a server restart",
+                       finished_at=datetime.now().isoformat())
+            _persist(job)
+        _jobs[job_id] = job
+
+
+def _worker(lane: str):
+    while True:
+        _, _, job_id = _queues[lane].get()
+        with _lock:
+            job = _jobs[job_id]
+            if job['status'] != 'queued':
+                # Cancelled while waiting in the queue
+                continue
+            job.update(status='running', started_at=datetime.now().isoformat())
+            snapshot = dict(job)
+        _persist(snapshot)
+        _run(job_id)
+
+
+def _run(job_id: str):
+    job = _jobs[job_id]
+    context = JobContext(job_id, _job_dir(job_id))
+    try:
+        result = JOB_TYPES[job['type']]['handler'](job['params'], context)
+        context.check_cancelled()
+    except JobCancelled:
+        _update(job_id, status='cancelled', finished_at=datetime.now().isoformat())
+        return
+    except Exception as e:
+        traceback.print_exc()
+        _update(job_id, status='failed', error=f"{type(e).__name__}: {e}",
+                finished_at=datetime.now().isoformat())
+        return
+    finally:
+        with _lock:
+            _cancel_requested.discard(job_id)
+
+    # Handlers either write their own result file or return a JSON-able summary
+    if isinstance(result, str):
+        result_file = os.path.basename(result)
+        summary = None
+    else:
+        result_file = 'result.json'
+        summary = result
+        with open(os.path.join(context.result_dir, result_file), 'w') as f:
+            json.dump(result, f, indent=2, default=str)
+
+    _update(job_id, status='completed', progress=1.0, result_file=result_file, result=summary,
+            finished_at=datetime.now().isoformat())
+
+
+def _ensure_started():
+    """Start the lane workers on first use rather than at import time"""
+    global _started
+    with _lock:
+        if _started:
+            return
+        _started = True
+        os.makedirs(settings.jobs_dir, exist_ok=True)
+        _load_existing()
+        workers = {'interactive': settings.jobs_interactive_workers, 'batch': settings.jobs_batch_workers}
+        for lane, count in workers.items():
+            for i in range(count):
+                threading.Thread(target=_worker, args=(lane,), name=f"job-{lane}-{i}", daemon=True).start()
+
+
+def submit_job(job_type: str, params: Optional[dict] = None, priority: int = 0,
+               lane: Optional[str] = None) -> dict:
+    """Queue a job; higher priority runs first within its lane. Raises JobConflict for a busy exclusive type"""
+    if job_type not in JOB_TYPES:
+        raise ValueError(f"Unknown job type: {job_type}. Available: {sorted(JOB_TYPES)}")
+    lane = lane or JOB_TYPES[job_type]['lane']
+    if lane not in LANES:
+        raise ValueError(f"Unknown lane: {lane}. Available: {list(LANES)}")
+    _ensure_started()
+
+    job_id = uuid.uuid4().hex
+    job = {
+        'job_id': job_id,
+        'type': job_type,
+        'lane': lane,
+        'priority': priority,
+        'params': params or {},
+        'status': 'queued',
+        'progress': 0.0,
+        'message': None,
+        'created_at': datetime.now().isoformat(),
+        'started_at': None,
+        'finished_at': None,
+        'result_file': None,
+        'result': None,
+        'error': None
+    }
+    with _lock:
+        # Checked and registered under one lock, so concurrent submits cannot both pass
+        if JOB_TYPES[job_type].get('exclusive') and any(
+            j['type'] == job_type and j['status'] not in FINISHED for j in _jobs.values()
+        ):
+            raise JobConflict(f"A {job_type} job is already queued or running")
+        _jobs[job_id] = job
+    os.makedirs(_job_dir(job_id), exist_ok=True)
+    _persist(job)
+    _queues[lane].put((-priority, next(_sequence), job_id))
+    return dict(job)
+
+
+def get_job(job_id: str) -> Optional[dict]:
+    _ensure_started()
+    with _lock:
+        job = _jobs.get(job_id)
+        return dict(job) if job else None
+
+
+def list_jobs(status: Optional[str] = None, job_type: Optional[str] = None, limit: int = 100) -> List[dict]:
+    """Most recent jobs first"""
+    _ensure_started()
+    with _lock:
+        jobs = [dict(j) for j in _jobs.values()
+                if (status is None or j['status'] == status) and (job_type is None or j['type'] == job_type)]
+    return sorted(jobs, key=lambda j: j['created_at'], reverse=True)[:limit]
+
+
+def cancel_job(job_id: str) -> Optional[dict]:
+    """Cancel a queued job now, or ask a running one to stop"""
+    _ensure_started()
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is None:
+            return None
+        if job['status'] == 'queued':
+            job.update(status='cancelled', finished_at=datetime.now().isoformat())
+        elif job['status'] == 'running':
+            _cancel_requested.add(job_id)
+            job['message'] = 'Cancellation requested'
+        snapshot = dict(job)
+    _persist(snapshot)
+    return snapshot
+
+
+def get_result_path(job_id: str) -> Optional[str]:
+    job = get_job(job_id)
+    if job is None or job['status'] != 'completed' or not job['result_file']:
+        return None
+    return os.path.join(_job_dir(job_id), job['result_file'])
+
+
+def delete_job(job_id: str) -> bool:
+    """Remove a finished job and its files"""
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is None or job['status'] not in FINISHED:
+            return False
+        del _jobs[job_id]
+    shutil.rmtree(_job_dir(job_id), ignore_errors=True)
+    return True
+
+
+# Job handlers: (params, context) -> JSON-able summary, or path of a file in context.result_dir
+
+def _export_job(params: dict, context: JobContext) -> str:
+    """Full CSV export (no row cap), streamed to disk"""
+    from app.services.data_service import build_export_query
+    from app.database import get_clickhouse_client
+
+    table_name = params.get('table', 'poverty_data')
+    columns, query, count_query = build_export_query(table_name, params.get('columns'), params.get('filters'))
+    client = get_clickhouse_client()
+    total = client.query(count_query).result_rows[0][0]
+
+    path = os.path.join(context.result_dir, f"{table_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv")
+    rows = 0
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(columns)
+        with client.query_column_block_stream(query) as stream:
+            for block in stream:
+                writer.writerows(zip(*block))
+                rows += len(block[0]) if block else 0
+                context.progress(rows / max(total, 1), f"{rows} of {total} rows")
+    return path
+
+
+# (start, weight) of each training stage in the job's progress
+TRAIN_STAGE_WEIGHTS = {
+    'preprocessing': (0.0, 0.05),
+    'training': (0.05, 0.75),
+    'calibrating': (0.8, 0.1),
+    'evaluating': (0.9, 0.1)
+}
+
+
+def _train_job(params: dict, context: JobContext) -> dict:
+    """Train the poverty SVM from ClickHouse; the artifact is the job's model.pkl"""
+    from app.ml.training import train
+
+    def progress(stage, fraction):
+        start, weight = TRAIN_STAGE_WEIGHTS[stage]
+        context.progress(start + weight * fraction, stage)
+
+    options = {k: v for k, v in params.items()
+               if k in ('estimator', 'C', 'alpha', 'epochs', 'batch_size', 'version')}
+    model_data = train(progress=progress, **options)
+    with open(os.path.join(context.result_dir, 'model.pkl'), 'wb') as f:
+        pickle.dump(model_data, f)
+    return {
+        'version': model_data['version'],
+        'accuracy': model_data['accuracy'],
+        'training_rows': model_data['training_rows'],
+        'artifact': 'model.pkl'
+    }
+
+
+def _score_roster_job(params: dict, context: JobContext) -> dict:
+    from app.ml.scoring import score_roster
+
+    context.progress(0.0, "Scoring roster")
+    return score_roster(
+        method=params.get('method', 'auto'),
+        progress=lambda done, total: context.progress(done / max(total, 1), f"{done} of {total} households")
+    )
+
+
+def _cluster_train_job(params: dict, context: JobContext) -> dict:
+    from app.ml.clustering import train_clustering
+    from app.services.clustering_service import STAGE_WEIGHTS, summarize_model
+
+    def progress(stage, fraction):
+        start, weight = STAGE_WEIGHTS[stage]
+        context.progress(start + weight * fraction, stage)
+
+    model_data = train_clustering(
+        n_clusters=params.get('n_clusters', 5),
+        features=params.get('features'),
+        sample_size=params.get('sample_size', 100000),
+        n_init=params.get('n_init', 8),
+        progress=progress
+    )
+    return summarize_model(model_data)
+
+
+JOB_TYPES: Dict[str, Dict[str, Any]] = {
+    'export': {'handler': _export_job, 'lane': 'interactive'},
+    'train': {'handler': _train_job, 'lane': 'batch'},
+    'score_roster': {'handler': _score_roster_job, 'lane': 'batch'},
+    'cluster_train': {'handler': _cluster_train_job, 'lane': 'batch', 'exclusive': True}
+}
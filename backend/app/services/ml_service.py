@@ -1,39 +1,88 @@
-import numpy as np
+"""Poverty predictions for questionnaires.
+
+Model outputs are memoized per questionnaire: field deployments resubmit
+the same households and common profiles often, and a repeat skips
+encoding, scaling and scoring (it is still counted by the drift monitor
+and written to the prediction log, which both take the raw answers).
+Entries are keyed on the model version plus the questionnaire's feature values in model order (numbers
+compared by value, so 1 and 1.0 share an entry). The memo holds at most
+settings.prediction_cache_size entries, least recently used evicted first,
+each for settings.prediction_cache_ttl_s. It is emptied whenever a new
+model is loaded, even one with the same version string. Every prediction
+still gets its own prediction_id and is logged to poverty_predictions
+(prediction_log_service).
+
+With explain=True each prediction also carries its exact feature
+attributions. The model is a linear SVM over standardized features, so
+its decision score is intercept + sum(coef * scaled_x), and each term is
+one feature's contribution (positive pushes toward Poor). They come from
+the same scaled matrix as the scores, at the cost of one multiply.
+"""
+import threading
+import time
 import uuid
-from app.ml.model_loader import load_svm_model
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from app.config import settings
+from app.services import drift_service, prediction_log_service
+from app.utils.metrics import PREDICTION_CACHE_ENTRIES, PREDICTION_CACHE_LOOKUPS, stage_timer
 
-def predict_poverty(input_data: dict):
-    """Predict poverty status"""
-    model_data = load_svm_model()
+class PredictionMemo:
+    """Bounded LRU of (predicted class, class probabilities) with a TTL, for one model at a time"""
+
+    def __init__(self):
+        self._entries: 'OrderedDict[tuple, Tuple[float, tuple]]' = OrderedDict()
+        self._model = None
+        self._lock = threading.Lock()
+
+    def bind(self, model_data: dict):
+        """Forget every entry when the model is not the one they were computed with"""
+        with self._lock:
+            if model_data is not self._model:
+                self._entries.clear()
+                self._model = model_data
+                PREDICTION_CACHE_ENTRIES.set(0)
+
+    def get(self, key: tuple) -> Optional[tuple]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
 
-    # Encode province
-    province_encoded = model_data['province_encoder'].transform([input_data['province_name']])[0]
-
-    # Prepare features
-    # Order must match training: province_encoded, urb_rur, no_of_indiv, etc.
-    features = np.array([[
-        province_encoded,
-        input_data['urb_rur'],
-        input_data['no_of_indiv'],
-        input_data['no_sleeping_rooms'],
-        input_data['house_type'],
-        input_data['has_electricity'],
-        input_data['television'],
-        input_data['ref'],
-        input_data['motorcycle']
-    ]])
-
-    # Scale
-    features_scaled = model_data['scaler'].transform(features)
-
-    # Predict
-    prediction = model_data['model'].predict(features_scaled)[0]
-    probabilities = model_data['model'].predict_proba(features_scaled)[0]
-
-    # Convert prediction to integer for indexing
-    pred_idx = int(prediction)
-
-    # Format response
+    def put(self, key: tuple, value: tuple):
+        max_entries = settings.prediction_cache_size
+        if max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + settings.prediction_cache_ttl_s, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > max_entries:
+                self._entries.popitem(last=False)
+            PREDICTION_CACHE_ENTRIES.set(len(self._entries))
+
+
+_memo = PredictionMemo()
+
+# Largest contributions listed as a prediction's top drivers
+TOP_DRIVERS = 3
+
+def _canonical(value: Any) -> Any:
+    # Numbers compare by value (1 == 1.0 == True), so key them as floats
+    if isinstance(value, (int, float)):
+        return float(value)
+    return value
+
+def _memo_key(columns: List[str], model_version: str, row: dict) -> tuple:
+    return (model_version,) + tuple(_canonical(row.get(column)) for column in columns)
+
+def _format_prediction(pred_idx: int, probabilities, model_version: str) -> dict:
+    """Build the response dict for one scored household"""
     return {
         'prediction_id': str(uuid.uuid4()),
         'predicted_status': pred_idx,
@@ -41,6 +90,99 @@ def predict_poverty(input_data: dict):
         'probability': float(probabilities[pred_idx]),
         'probability_poor': float(probabilities[1]),
         'probability_nonpoor': float(probabilities[0]),
-        'model_version': model_data['version'],
+        'model_version': model_version,
         'recommendation': 'Eligible for 4Ps program' if pred_idx == 1 else 'Not eligible for 4Ps'
     }
+
+def _scale(model_data: dict, inputs: List[dict]):
+    """Encode and order features exactly as the model was trained, then standardize"""
+    with stage_timer('feature_encoding'):
+        features = model_data['feature_pipeline'].transform(inputs)
+        return model_data['scaler'].transform(features)
+
+def _score(model_data: dict, features_scaled) -> List[tuple]:
+    """(predicted class, class probabilities) per row, in one vectorized pass"""
+    with stage_timer('model_inference'):
+        predictions = model_data['model'].predict(features_scaled)
+        probabilities = model_data['model'].predict_proba(features_scaled)
+
+    return [
+        (int(prediction), tuple(float(p) for p in probs))
+        for prediction, probs in zip(predictions, probabilities)
+    ]
+
+def _explain(model_data: dict, features_scaled, inputs: List[dict]) -> List[dict]:
+    """Per-feature contributions to each row's decision score, largest first in top_drivers"""
+    from app.ml.linear import linear_parameters
+    # Raises ValueError for a model that is not linear
+    coef, intercept = linear_parameters(model_data['model'])
+    columns = model_data['feature_pipeline'].columns
+
+    with stage_timer('explanation'):
+        contributions = features_scaled * coef
+        scores = intercept + contributions.sum(axis=1)
+        top = (-abs(contributions)).argsort(axis=1)[:, :TOP_DRIVERS]
+
+    explanations = []
+    for row, row_contributions, score, row_top in zip(inputs, contributions.tolist(), scores.tolist(), top.tolist()):
+        explanations.append({
+            'base_value': intercept,
+            'decision_score': score,
+            'contributions': dict(zip(columns, row_contributions)),
+            'top_drivers': [
+                {'feature': columns[i], 'value': row.get(columns[i]), 'contribution': row_contributions[i]}
+                for i in row_top
+            ]
+        })
+    return explanations
+
+def predict_poverty_batch(inputs: List[dict], explain: bool = False) -> List[dict]:
+    """Predict poverty status for many households, scoring only those not memoized"""
+    if not inputs:
+        # Nothing to scale or explain either
+        return []
+    # Imported on first prediction (or by the startup warmup), not with the app
+    from app.ml.model_loader import load_svm_model
+    model_data = load_svm_model()
+    version = model_data['version']
+    _memo.bind(model_data)
+
+    columns = model_data['feature_pipeline'].columns
+    keys = [_memo_key(columns, version, row) for row in inputs]
+    outputs = [_memo.get(key) for key in keys]
+
+    # Each distinct questionnaire not in the memo is scored once; repeats
+    # within the batch count as hits since they skip inference too
+    pending: Dict[tuple, List[int]] = {}
+    for index, output in enumerate(outputs):
+        if output is None:
+            pending.setdefault(keys[index], []).append(index)
+    if len(inputs) > len(pending):
+        PREDICTION_CACHE_LOOKUPS.labels('hit').inc(len(inputs) - len(pending))
+
+    # Explanations need every row scaled; scoring reuses those rows
+    scaled = _scale(model_data, inputs) if explain else None
+    if pending:
+        PREDICTION_CACHE_LOOKUPS.labels('miss').inc(len(pending))
+        first_rows = [indexes[0] for indexes in pending.values()]
+        if scaled is not None:
+            scored = _score(model_data, scaled[first_rows])
+        else:
+            scored = _score(model_data, _scale(model_data, [inputs[index] for index in first_rows]))
+        for (key, indexes), output in zip(pending.items(), scored):
+            _memo.put(key, output)
+            for index in indexes:
+                outputs[index] = output
+
+    predictions = [_format_prediction(pred_idx, probs, version) for pred_idx, probs in outputs]
+    if explain:
+        for prediction, explanation in zip(predictions, _explain(model_data, scaled, inputs)):
+            prediction['explanation'] = explanation
+    # After scoring, so only answers the model accepted are counted
+    drift_service.record(inputs, columns)
+    prediction_log_service.record(inputs, predictions)
+    return predictions
+
+def predict_poverty(input_data: dict, explain: bool = False):
+    """Predict poverty status"""
+    return predict_poverty_batch([input_data], explain)[0]
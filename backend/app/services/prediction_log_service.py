@@ -0,0 +1,138 @@
+"""Prediction log: every prediction served is written to poverty_predictions.
+
+poverty_predictions feeds the prediction_rollups materialized views behind
+/api/v1/predict/stats, and the data viewer's predictions table. Rows are
+buffered in the API process and inserted in batches by a background
+thread, every settings.prediction_log_flush_s or as soon as
+settings.prediction_log_batch_rows are waiting, so serving a prediction
+never waits on ClickHouse.
+
+While ClickHouse is unreachable rows stay buffered, up to
+settings.prediction_log_max_rows; beyond that the oldest are dropped.
+Rows whose answers do not fit poverty_predictions' UInt8 columns are set
+aside before inserting, so one bad row never costs the rest of the batch;
+a batch ClickHouse still rejects is dropped rather than retried. All are
+counted in PREDICTION_LOG_ROWS. Rows still buffered are flushed at shutdown.
+"""
+import logging
+import threading
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import List, Optional
+
+from app.config import settings
+from app.database import get_clickhouse_client
+from app.utils.metrics import PREDICTION_LOG_ROWS
+
+log = logging.getLogger('app.prediction_log')
+
+# Questionnaire answers stored with each prediction
+INPUT_COLUMNS = [
+    'province_name', 'urb_rur', 'no_of_indiv', 'no_sleeping_rooms', 'house_type',
+    'has_electricity', 'television', 'ref', 'motorcycle'
+]
+LOG_COLUMNS = (['prediction_id', 'prediction_date'] + INPUT_COLUMNS
+               + ['predicted_poverty_status', 'prediction_probability', 'model_version'])
+# Positions of the UInt8 columns in a row
+UINT8_POSITIONS = [LOG_COLUMNS.index(column) for column in INPUT_COLUMNS[1:] + ['predicted_poverty_status']]
+
+
+def _fits(row: list) -> bool:
+    return all(isinstance(row[i], int) and 0 <= row[i] <= 255 for i in UINT8_POSITIONS)
+
+
+class PredictionLog:
+    """Bounded buffer of poverty_predictions rows waiting to be inserted"""
+
+    def __init__(self):
+        self._rows: deque = deque()
+        self._lock = threading.Lock()
+        self.ready = threading.Event()  # Set when a full batch is waiting
+
+    def _trim(self):
+        overflow = len(self._rows) - settings.prediction_log_max_rows
+        for _ in range(overflow):
+            self._rows.popleft()
+        if overflow > 0:
+            PREDICTION_LOG_ROWS.labels('dropped').inc(overflow)
+
+    def append(self, rows: List[list]):
+        with self._lock:
+            self._rows.extend(rows)
+            self._trim()
+            if len(self._rows) >= settings.prediction_log_batch_rows:
+                self.ready.set()
+
+    def take(self) -> List[list]:
+        with self._lock:
+            rows = list(self._rows)
+            self._rows.clear()
+            self.ready.clear()
+        return rows
+
+    def requeue(self, rows: List[list]):
+        """Put back rows that could not be inserted, ahead of newer ones"""
+        with self._lock:
+            self._rows.extendleft(reversed(rows))
+            self._trim()
+
+
+_log = PredictionLog()
+_writer: Optional[threading.Thread] = None
+
+
+def record(inputs: List[dict], predictions: List[dict]):
+    """Buffer served predictions for poverty_predictions"""
+    if not settings.prediction_log_enabled:
+        return
+    # prediction_date is a DateTime: whole seconds
+    now = datetime.now().replace(microsecond=0)
+    _log.append([
+        [uuid.UUID(prediction['prediction_id']), now]
+        + [row[column] for column in INPUT_COLUMNS]
+        + [prediction['predicted_status'], prediction['probability'], prediction['model_version']]
+        for row, prediction in zip(inputs, predictions)
+    ])
+
+
+def flush() -> int:
+    """Insert every buffered row now; returns the number written"""
+    from clickhouse_connect.driver.exceptions import OperationalError
+
+    rows = _log.take()
+    bad = [row for row in rows if not _fits(row)]
+    if bad:
+        rows = [row for row in rows if _fits(row)]
+        PREDICTION_LOG_ROWS.labels('rejected').inc(len(bad))
+        log.warning("Skipped %d prediction log rows with out-of-range answers, e.g. %s", len(bad), bad[0])
+    if not rows:
+        return 0
+    try:
+        get_clickhouse_client().insert('poverty_predictions', rows, column_names=LOG_COLUMNS)
+    except OperationalError:
+        # ClickHouse unreachable: keep the rows for the next flush
+        _log.requeue(rows)
+        raise
+    except Exception:
+        PREDICTION_LOG_ROWS.labels('failed').inc(len(rows))
+        raise
+    PREDICTION_LOG_ROWS.labels('written').inc(len(rows))
+    return len(rows)
+
+
+def _run_writer():
+    while True:
+        _log.ready.wait(settings.prediction_log_flush_s)
+        try:
+            flush()
+        except Exception as e:
+            log.warning("Prediction log flush failed: %s: %s", type(e).__name__, e)
+
+
+def start_writer() -> threading.Thread:
+    global _writer
+    if _writer is None:
+        _writer = threading.Thread(target=_run_writer, name='prediction-log', daemon=True)
+        _writer.start()
+    return _writer
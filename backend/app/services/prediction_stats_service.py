@@ -0,0 +1,78 @@
+"""Prediction analytics from the prediction_rollups table.
+
+poverty_predictions (written by prediction_log_service for every prediction
+served) is rolled up by materialized views
+(database/init/03_prediction_rollups.sql) into hourly and daily buckets per
+province and model version: prediction count, predicted-Poor count, sum of
+probabilities and a t-digest of the probabilities. Stats are read from
+those rollups only, so their cost follows the number of buckets asked for,
+not the number of predictions stored.
+"""
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from app.database import get_clickhouse_client
+
+# Must match the quantilesTDigest levels of prediction_rollups.probability_quantiles
+PROBABILITY_QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+DIMENSIONS = ('province_name', 'model_version')
+# Range used when the request gives no start
+DEFAULT_SPAN = {'hour': timedelta(hours=48), 'day': timedelta(days=30)}
+
+
+def get_prediction_stats(grain: str = 'day', start: Optional[datetime] = None, end: Optional[datetime] = None,
+                         by: Optional[List[str]] = None, province: Optional[str] = None,
+                         model_version: Optional[str] = None) -> Dict[str, Any]:
+    """Per-bucket prediction counts, Poor share and probability quantiles, split by `by`"""
+    by = list(DIMENSIONS) if by is None else by
+    invalid = [d for d in by if d not in DIMENSIONS]
+    if invalid:
+        raise ValueError(f"Cannot group by: {', '.join(invalid)} (choose from {', '.join(DIMENSIONS)})")
+
+    # Buckets are whole seconds (DateTime)
+    end = (end or datetime.now()).replace(microsecond=0)
+    start = (start or end - DEFAULT_SPAN[grain]).replace(microsecond=0)
+    conditions = ["grain = {grain:String}", "bucket >= {start:DateTime}", "bucket < {end:DateTime}"]
+    parameters: Dict[str, Any] = {'grain': grain, 'start': start, 'end': end}
+    if province is not None:
+        conditions.append("province_name = {province:String}")
+        parameters['province'] = province
+    if model_version is not None:
+        conditions.append("model_version = {model_version:String}")
+        parameters['model_version'] = model_version
+
+    levels = ', '.join(str(level) for level in PROBABILITY_QUANTILES)
+    group_by = ', '.join(['bucket'] + by)
+    query = f"""
+        SELECT
+            {group_by},
+            sum(predictions) AS total,
+            sum(predicted_poor) AS poor,
+            sum(probability_sum) AS probability_sum,
+            quantilesTDigestMerge({levels})(probability_quantiles) AS quantiles
+        FROM prediction_rollups
+        WHERE {' AND '.join(conditions)}
+        GROUP BY {group_by}
+        ORDER BY {group_by}
+    """
+
+    client = get_clickhouse_client()
+    buckets = []
+    for row in client.query(query, parameters=parameters).result_rows:
+        bucket, dimensions = row[0], dict(zip(by, row[1:1 + len(by)]))
+        total, poor, probability_sum, quantiles = row[1 + len(by):]
+        buckets.append({
+            'bucket': bucket,
+            'province_name': dimensions.get('province_name'),
+            'model_version': dimensions.get('model_version'),
+            'predictions': total,
+            'predicted_poor': poor,
+            'poor_share': round(poor / total, 4) if total else 0.0,
+            'mean_probability': round(probability_sum / total, 4) if total else 0.0,
+            'probability_quantiles': {
+                f"p{int(level * 100)}": round(float(value), 4)
+                for level, value in zip(PROBABILITY_QUANTILES, quantiles)
+            }
+        })
+
+    return {'grain': grain, 'start': start, 'end': end, 'buckets': buckets}
@@ -1,7 +1,55 @@
+from typing import Optional
 from app.database import get_clickhouse_client
+from app.utils import sampling
+
+def _approx_coverage(table: str, fraction: float):
+    """Coverage by province estimated from a sample of households, with 95% margins"""
+    client = get_clickhouse_client()
+
+    query = f"""
+        SELECT
+            province_name,
+            count() as total_households,
+            countIf(poor = 1) as total_poor,
+            countIf(poor = 1 AND received_pppp = 1) as poor_with_pppp,
+            countIf(poor = 1 AND received_pppp = 0) as unmet_need,
+            any(_sample_factor) as sample_factor
+        FROM {table} SAMPLE {fraction}
+        GROUP BY province_name
+    """
+
+    rows = []
+    for province, households, poor, poor_with_pppp, unmet_need, sample_factor in client.query(query).result_rows:
+        used = 1 / sample_factor
+        coverage_rate = poor_with_pppp / poor if poor else 0.0
+        estimates = {
+            'total_households': sampling.estimate_count(households, used),
+            'total_poor': sampling.estimate_count(poor, used),
+            'poor_with_pppp': sampling.estimate_count(poor_with_pppp, used),
+            'unmet_need': sampling.estimate_count(unmet_need, used)
+        }
+        rows.append({
+            "location": province,
+            "province_name": province,
+            "city_name": None,
+            **{name: estimate for name, (estimate, _) in estimates.items()},
+            "coverage_rate": round(coverage_rate, 3),
+            "approximate": True,
+            "sample_fraction": used,
+            "margins": {
+                **{name: margin for name, (_, margin) in estimates.items()},
+                "coverage_rate": sampling.rate_margin(coverage_rate, poor)
+            }
+        })
+    return sorted(rows, key=lambda row: row['coverage_rate'])
+
+def get_coverage_by_province(accuracy: str = 'exact', sample_fraction: Optional[float] = None):
+    """Calculate 4Ps coverage by province (estimated from a sample with accuracy='approx')"""
+    if accuracy == 'approx':
+        table = sampling.sampled_table('poverty_data')
+        if table is not None:
+            return _approx_coverage(table, sampling.sample_fraction(sample_fraction))
 
-def get_coverage_by_province():
-    """Calculate 4Ps coverage by province"""
     client = get_clickhouse_client()
 
     query = """
@@ -34,8 +82,54 @@ def get_coverage_by_province():
         for row in rows
     ]
 
-def get_efficiency_by_province():
-    """Calculate targeting efficiency by province"""
+def _approx_efficiency(table: str, fraction: float):
+    """Targeting efficiency by province estimated from a sample of households, with 95% margins"""
+    client = get_clickhouse_client()
+
+    query = f"""
+        SELECT
+            province_name,
+            count() as total_recipients,
+            countIf(poor = 1) as poor_recipients,
+            countIf(poor = 0) as nonpoor_recipients,
+            any(_sample_factor) as sample_factor
+        FROM {table} SAMPLE {fraction}
+        WHERE received_pppp = 1
+        GROUP BY province_name
+    """
+
+    rows = []
+    for province, recipients, poor, nonpoor, sample_factor in client.query(query).result_rows:
+        used = 1 / sample_factor
+        accuracy_rate = poor / recipients
+        leakage_rate = nonpoor / recipients
+        estimates = {
+            'total_recipients': sampling.estimate_count(recipients, used),
+            'poor_recipients': sampling.estimate_count(poor, used),
+            'nonpoor_recipients': sampling.estimate_count(nonpoor, used)
+        }
+        rows.append({
+            "location": province,
+            **{name: estimate for name, (estimate, _) in estimates.items()},
+            "targeting_accuracy": round(accuracy_rate, 3),
+            "leakage_rate": round(leakage_rate, 3),
+            "approximate": True,
+            "sample_fraction": used,
+            "margins": {
+                **{name: margin for name, (_, margin) in estimates.items()},
+                "targeting_accuracy": sampling.rate_margin(accuracy_rate, recipients),
+                "leakage_rate": sampling.rate_margin(leakage_rate, recipients)
+            }
+        })
+    return sorted(rows, key=lambda row: -row['leakage_rate'])
+
+def get_efficiency_by_province(accuracy: str = 'exact', sample_fraction: Optional[float] = None):
+    """Calculate targeting efficiency by province (estimated from a sample with accuracy='approx')"""
+    if accuracy == 'approx':
+        table = sampling.sampled_table('poverty_data')
+        if table is not None:
+            return _approx_efficiency(table, sampling.sample_fraction(sample_fraction))
+
     client = get_clickhouse_client()
 
     query = """
@@ -66,3 +160,42 @@ def get_efficiency_by_province():
         }
         for row in rows
     ]
+
+def get_eligible_not_enrolled_by_province():
+    """Households the model scores as poor that are not 4Ps recipients, by province"""
+    client = get_clickhouse_client()
+
+    # FINAL collapses re-scored households to their latest score
+    query = """
+        SELECT
+            d.province_name,
+            COUNT(*) as scored_households,
+            SUM(s.predicted_poor) as predicted_poor,
+            SUM(CASE WHEN s.predicted_poor = 1 AND d.received_pppp = 0 THEN 1 ELSE 0 END) as eligible_not_enrolled,
+            ROUND(SUM(CASE WHEN s.predicted_poor = 1 AND d.received_pppp = 0 THEN 1 ELSE 0 END) / SUM(s.predicted_poor), 3) as eligible_not_enrolled_rate,
+            SUM(CASE WHEN s.predicted_poor = 1 AND d.received_pppp = 0 AND d.poor = 0 THEN 1 ELSE 0 END) as missed_by_roster,
+            ROUND(AVG(s.probability_poor), 3) as avg_probability_poor
+        FROM poverty_data AS d
+        INNER JOIN (
+            SELECT hh_id, predicted_poor, probability_poor
+            FROM household_scores FINAL
+        ) AS s ON d.hh_id = s.hh_id
+        GROUP BY d.province_name
+        ORDER BY eligible_not_enrolled DESC
+    """
+
+    result = client.query(query)
+    rows = result.result_rows
+
+    return [
+        {
+            "location": row[0],
+            "scored_households": row[1],
+            "predicted_poor": row[2],
+            "eligible_not_enrolled": row[3],
+            "eligible_not_enrolled_rate": float(row[4]) if row[2] else 0.0,
+            "missed_by_roster": row[5],
+            "avg_probability_poor": float(row[6])
+        }
+        for row in rows
+    ]
@@ -0,0 +1,211 @@
+"""Prometheus metrics for requests, ClickHouse queries and processing stages.
+
+- PrometheusMiddleware: per-route latency histograms, labelled with the
+  route template (not the raw path) to keep cardinality bounded.
+- observe_query: called by the instrumented ClickHouse client for every
+  query. It records wall time, ClickHouse's read_rows / read_bytes /
+  elapsed from the query summary, and rows returned. Queries slower than
+  settings.slow_query_ms go to the 'app.slow_query' log with their SQL and
+  the filter shape of the request.
+- stage_timer: times named in-process stages (row_conversion,
+  serialization, model_inference, ...).
+- Profiled requests (see profiling.py) also get their queries and stages
+  recorded in their profile.
+- Hits, misses and size of the data-viewer result cache (query_cache.py)
+  and of the prediction memo (ml_service.py).
+- Predictions written to poverty_predictions, dropped or rejected
+  (prediction_log_service.py).
+- PSI of prediction inputs against the roster per province and feature
+  (drift_service.py).
+
+Everything is exposed on /metrics.
+"""
+import contextvars
+import json
+import logging
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, Dict, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from starlette.responses import JSONResponse, Response
+
+from app.config import settings
+from app.utils.profiling import current_profile, profile_segment
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+ROW_BUCKETS = (1, 10, 100, 1000, 10000, 100000, 1000000, 10000000)
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'HTTP request latency', ['method', 'route', 'status'],
+    buckets=LATENCY_BUCKETS
+)
+QUERY_LATENCY = Histogram(
+    'clickhouse_query_duration_seconds', 'ClickHouse round trip as seen by the client', ['operation', 'route'],
+    buckets=LATENCY_BUCKETS
+)
+QUERY_SERVER_ELAPSED = Histogram(
+    'clickhouse_query_server_elapsed_seconds', 'Server-side elapsed time from the query summary', ['route'],
+    buckets=LATENCY_BUCKETS
+)
+QUERY_READ_ROWS = Counter('clickhouse_read_rows_total', 'Rows read by ClickHouse', ['route'])
+QUERY_READ_BYTES = Counter('clickhouse_read_bytes_total', 'Bytes read by ClickHouse', ['route'])
+QUERY_RESULT_ROWS = Histogram(
+    'clickhouse_result_rows', 'Rows returned to the client per query', ['route'], buckets=ROW_BUCKETS
+)
+SLOW_QUERIES = Counter('clickhouse_slow_queries_total', 'Queries slower than the slow-query threshold', ['route'])
+STAGE_LATENCY = Histogram(
+    'app_stage_duration_seconds', 'In-process processing stages', ['stage', 'route'],
+    buckets=LATENCY_BUCKETS
+)
+QUERY_CACHE_LOOKUPS = Counter(
+    'app_query_cache_lookups_total', 'Result cache lookups', ['table', 'kind', 'result']
+)
+QUERY_CACHE_BYTES = Gauge('app_query_cache_bytes', 'Estimated size of the cached results')
+PREDICTION_CACHE_LOOKUPS = Counter(
+    'app_prediction_cache_lookups_total', 'Prediction memo lookups, one per household', ['result']
+)
+PREDICTION_CACHE_ENTRIES = Gauge('app_prediction_cache_entries', 'Questionnaires held in the prediction memo')
+PREDICTION_LOG_ROWS = Counter(
+    'app_prediction_log_rows_total', 'Served predictions by outcome of their poverty_predictions insert', ['result']
+)
+DRIFT_PSI = Gauge(
+    'app_input_drift_psi', 'PSI of recent prediction inputs against the roster', ['province', 'feature']
+)
+
+slow_query_log = logging.getLogger('app.slow_query')
+
+# Resolver for the route template of the request being served, and the
+# shape of its filters; both are visible from the threadpool the handler runs in
+_route = contextvars.ContextVar('route', default=None)
+_filter_shape = contextvars.ContextVar('filter_shape', default=None)
+
+
+def current_route() -> str:
+    """Route template of the current request, '-' outside requests (e.g. jobs)"""
+    resolve = _route.get()
+    return resolve() if resolve is not None else '-'
+
+
+def filter_shape(filters: Optional[Dict[str, Any]]) -> Optional[Dict[str, str]]:
+    """Column -> kind of filter, without the values (e.g. {'poor': 'eq', 'city_name': 'in[3]'})"""
+    if not filters:
+        return None
+    shape = {}
+    for key, value in filters.items():
+        if value is None or value == "":
+            continue
+        if isinstance(value, dict):
+            shape[key] = 'range'
+        elif isinstance(value, list):
+            shape[key] = f"in[{len(value)}]"
+        elif isinstance(value, str):
+            shape[key] = 'like'
+        else:
+            shape[key] = 'eq'
+    return shape
+
+
+def set_filter_shape(filters: Optional[Dict[str, Any]]):
+    """Remember the current request's filter shape for the slow-query log"""
+    _filter_shape.set(filter_shape(filters))
+
+
+def observe_query(operation: str, sql: str, seconds: float, summary: Optional[dict] = None,
+                  result_rows: Optional[int] = None):
+    """Record one ClickHouse call; called by the instrumented client"""
+    route = current_route()
+    QUERY_LATENCY.labels(operation, route).observe(seconds)
+    profile = current_profile()
+    if profile is not None:
+        profile.record_query(operation, sql, seconds)
+
+    if summary:
+        QUERY_READ_ROWS.labels(route).inc(int(summary.get('read_rows', 0) or 0))
+        QUERY_READ_BYTES.labels(route).inc(int(summary.get('read_bytes', 0) or 0))
+        if 'elapsed_ns' in summary:
+            QUERY_SERVER_ELAPSED.labels(route).observe(int(summary['elapsed_ns']) / 1e9)
+    if result_rows is not None:
+        QUERY_RESULT_ROWS.labels(route).observe(result_rows)
+
+    if seconds * 1000 >= settings.slow_query_ms:
+        SLOW_QUERIES.labels(route).inc()
+        slow_query_log.warning(json.dumps({
+            'route': route,
+            'operation': operation,
+            'seconds': round(seconds, 4),
+            'read_rows': int((summary or {}).get('read_rows', 0) or 0),
+            'read_bytes': int((summary or {}).get('read_bytes', 0) or 0),
+            'result_rows': result_rows,
+            'filter_shape': _filter_shape.get(),
+            'sql': ' '.join(sql.split())[:settings.slow_query_max_sql]
+        }))
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """Time an in-process stage of the current request (and sample it if the request is profiled)"""
+    started = time.perf_counter()
+    segment = profile_segment(stage) if current_profile() is not None else nullcontext()
+    try:
+        with segment:
+            yield
+    finally:
+        STAGE_LATENCY.labels(stage, current_route()).observe(time.perf_counter() - started)
+
+
+class TimedJSONResponse(JSONResponse):
+    """JSONResponse that records how long rendering the body takes"""
+
+    def render(self, content: Any) -> bytes:
+        with stage_timer('serialization'):
+            return super().render(content)
+
+
+class PrometheusMiddleware:
+    """Pure ASGI middleware (no BaseHTTPMiddleware overhead) timing every HTTP request"""
+
+    def __init__(self, app):
+        self.app = app
+        self._templates = None
+
+    def _route_template(self, scope) -> str:
+        endpoint = scope.get('endpoint')
+        if endpoint is None:
+            return 'unmatched'
+        if self._templates is None:
+            # Routes are final once the app serves requests
+            self._templates = {
+                route.endpoint: route.path
+                for route in scope['app'].routes if hasattr(route, 'endpoint')
+            }
+        return self._templates.get(endpoint, 'unmatched')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status = {'code': 500}
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                status['code'] = message['status']
+            await send(message)
+
+        # The router fills scope['endpoint'] in this same dict before the
+        # handler runs, so queries resolve the template lazily
+        token = _route.set(lambda: self._route_template(scope))
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = self._route_template(scope)
+            REQUEST_LATENCY.labels(scope['method'], route, str(status['code'])).observe(
+                time.perf_counter() - started
+            )
+            _route.reset(token)
+
+
+def metrics_response() -> Response:
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,406 @@
+"""On-demand request profiling.
+
+Off unless settings.profiling_enabled. When off, install_profiling is never
+called: no middleware, no wrapped endpoints, no sampler thread.
+
+When on, a request is profiled if it carries
+`X-Profile: <settings.profiling_token>`, or if it is picked at
+settings.profiling_sample_rate. For a profiled request:
+- A background thread samples the Python stack every
+  settings.profiling_interval_ms. Only threads currently doing work for
+  that request are sampled: the endpoint, response validation and
+  serialization, and the stage_timer stages. These segments are
+  synchronous, so their threads serve no other request meanwhile.
+- The ClickHouse queries it runs and its stage durations are recorded.
+
+A profile is saved when it was requested by header, or when a sampled
+request took at least settings.profiling_min_ms. Each saved profile is
+written to settings.profiling_dir as three files:
+- {id}.json: a summary;
+- {id}.speedscope.json: open it at https://www.speedscope.app;
+- {id}.folded: collapsed stacks for flamegraph.pl.
+"""
+import contextvars
+import hmac
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from functools import wraps
+from typing import Any, Dict, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+
+PROFILE_HEADER = 'x-profile'
+# Never profiled: the profile endpoints themselves (they take the same header) and scrapes
+EXCLUDED_PATHS = ('/api/v1/profiles', '/metrics')
+
+_current = contextvars.ContextVar('request_profile', default=None)
+
+
+def current_profile() -> Optional['RequestProfile']:
+    return _current.get()
+
+
+class RequestProfile:
+    """Samples, queries and stage timings collected for one request"""
+
+    def __init__(self, method: str, path: str, query: str, trigger: str):
+        self.profile_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.created_at = datetime.now().isoformat(timespec='seconds')
+        self.method = method
+        self.path = path
+        self.query = query
+        self.trigger = trigger
+        self.route = None
+        self.frames: Dict[tuple, int] = {}
+        self.stacks: Counter = Counter()
+        self.queries: List[Dict[str, Any]] = []
+        self.stages: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _frame_index(self, key: tuple) -> int:
+        index = self.frames.get(key)
+        if index is None:
+            index = self.frames[key] = len(self.frames)
+        return index
+
+    def add_sample(self, label: str, frame, stop_frame):
+        """Record the stack from `frame` up to (not including) `stop_frame`, under a `label` root"""
+        stack = []
+        while frame is not None and frame is not stop_frame:
+            code = frame.f_code
+            stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+            frame = frame.f_back
+        stack.append((label, '', 0))
+        with self._lock:
+            self.stacks[tuple(self._frame_index(key) for key in reversed(stack))] += 1
+
+    def record_query(self, operation: str, sql: str, seconds: float):
+        with self._lock:
+            self.queries.append({
+                'operation': operation,
+                'ms': round(seconds * 1000, 3),
+                'sql': ' '.join(sql.split())[:settings.slow_query_max_sql]
+            })
+
+    def record_stage(self, stage: str, seconds: float):
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def summary(self, status_code: int, duration: float) -> Dict[str, Any]:
+        return {
+            'profile_id': self.profile_id,
+            'created_at': self.created_at,
+            'method': self.method,
+            'path': self.path,
+            'query': self.query,
+            'route': self.route,
+            'status_code': status_code,
+            'duration_ms': round(duration * 1000, 3),
+            'trigger': self.trigger,
+            'samples': sum(self.stacks.values()),
+            'interval_ms': settings.profiling_interval_ms,
+            'stages': {stage: round(seconds * 1000, 3) for stage, seconds in self.stages.items()},
+            'query_ms': round(sum(q['ms'] for q in self.queries), 3),
+            'queries': self.queries
+        }
+
+    def speedscope(self) -> Dict[str, Any]:
+        frames = [{'name': name, 'file': path, 'line': line} for name, path, line in self.frames]
+        stacks = list(self.stacks.items())
+        interval = settings.profiling_interval_ms
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': f"{self.method} {self.path}",
+            'exporter': 'dswd-poverty-api',
+            'shared': {'frames': frames},
+            'profiles': [{
+                'type': 'sampled',
+                'name': f"{self.method} {self.path} ({self.profile_id})",
+                'unit': 'milliseconds',
+                'startValue': 0,
+                'endValue': sum(count for _, count in stacks) * interval,
+                'samples': [list(stack) for stack, _ in stacks],
+                'weights': [count * interval for _, count in stacks]
+            }]
+        }
+
+    def folded(self) -> str:
+        names = [f"{name} ({os.path.basename(path)}:{line})" if path else name
+                 for name, path, line in self.frames]
+        return ''.join(
+            f"{';'.join(names[i] for i in stack)} {count}\n" for stack, count in self.stacks.items()
+        )
+
+
+class _Sampler:
+    """Single background thread sampling the threads attached to profiled requests
+
+    Runs only while at least one thread is attached.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._attached: Dict[int, list] = {}  # thread ident -> [profile, label, stop frame, depth]
+        self._thread = None
+
+    def attach(self, profile: RequestProfile, label: str, stop_frame):
+        ident = threading.get_ident()
+        with self._lock:
+            entry = self._attached.get(ident)
+            if entry is not None:
+                # Nested segment (e.g. a stage inside the endpoint): the outer one owns the thread
+                entry[3] += 1
+                return
+            self._attached[ident] = [profile, label, stop_frame, 1]
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+                self._thread.start()
+
+    def detach(self):
+        ident = threading.get_ident()
+        with self._lock:
+            entry = self._attached.get(ident)
+            if entry is None:
+                return
+            entry[3] -= 1
+            if entry[3] == 0:
+                del self._attached[ident]
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._attached:
+                    self._thread = None
+                    return
+                attached = {ident: tuple(entry[:3]) for ident, entry in self._attached.items()}
+            frames = sys._current_frames()
+            for ident, (profile, label, stop_frame) in attached.items():
+                frame = frames.get(ident)
+                if frame is not None:
+                    profile.add_sample(label, frame, stop_frame)
+            del frames
+            time.sleep(settings.profiling_interval_ms / 1000)
+
+
+_sampler = _Sampler()
+
+
+class profile_segment:
+    """Sample the current thread and time `label` while it does synchronous work for a profiled request
+
+    A no-op outside profiled requests.
+    """
+
+    def __init__(self, label: str):
+        self.label = label
+        self.profile = None
+
+    def __enter__(self):
+        self.profile = _current.get()
+        if self.profile is not None:
+            self.started = time.perf_counter()
+            _sampler.attach(self.profile, self.label, sys._getframe(1))
+        return self
+
+    def __exit__(self, *exc):
+        if self.profile is not None:
+            _sampler.detach()
+            self.profile.record_stage(self.label, time.perf_counter() - self.started)
+        return False
+
+
+def _segment_wrapper(func, label: str):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if _current.get() is None:
+            return func(*args, **kwargs)
+        with profile_segment(label):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def _profiles_dir() -> str:
+    return settings.profiling_dir
+
+
+def _write_json(path: str, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def save_profile(profile: RequestProfile, status_code: int, duration: float) -> Dict[str, Any]:
+    """Write the summary, speedscope and folded files, then prune old profiles"""
+    directory = _profiles_dir()
+    os.makedirs(directory, exist_ok=True)
+    base = os.path.join(directory, profile.profile_id)
+    with open(f"{base}.folded", 'w') as f:
+        f.write(profile.folded())
+    _write_json(f"{base}.speedscope.json", profile.speedscope())
+    # Summary last: its presence marks a complete profile
+    summary = profile.summary(status_code, duration)
+    _write_json(f"{base}.json", summary)
+    _prune(directory)
+    return summary
+
+
+def _prune(directory: str):
+    ids = sorted(name[:-len('.json')] for name in os.listdir(directory)
+                 if name.endswith('.json') and not name.endswith('.speedscope.json'))
+    for profile_id in ids[:max(0, len(ids) - settings.profiling_keep)]:
+        delete_profile(profile_id)
+
+
+def list_profiles(limit: int = 50, min_ms: float = 0, route: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Saved profile summaries, most recent first (without the per-query list)"""
+    directory = _profiles_dir()
+    if not os.path.isdir(directory):
+        return []
+    ids = sorted((name[:-len('.json')] for name in os.listdir(directory)
+                  if name.endswith('.json') and not name.endswith('.speedscope.json')), reverse=True)
+    profiles = []
+    for profile_id in ids:
+        summary = get_profile(profile_id)
+        if summary is None or summary['duration_ms'] < min_ms or (route and summary['route'] != route):
+            continue
+        summary.pop('queries', None)
+        profiles.append(summary)
+        if len(profiles) >= limit:
+            break
+    return profiles
+
+
+def _valid_id(profile_id: str) -> bool:
+    return bool(profile_id) and all(c.isalnum() or c == '-' for c in profile_id)
+
+
+def get_profile(profile_id: str) -> Optional[Dict[str, Any]]:
+    if not _valid_id(profile_id):
+        return None
+    try:
+        with open(os.path.join(_profiles_dir(), f"{profile_id}.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def get_profile_file(profile_id: str, kind: str) -> Optional[str]:
+    """Path of the 'speedscope' or 'folded' file of a profile"""
+    if not _valid_id(profile_id):
+        return None
+    suffix = {'speedscope': '.speedscope.json', 'folded': '.folded'}[kind]
+    path = os.path.join(_profiles_dir(), f"{profile_id}{suffix}")
+    return path if os.path.exists(path) else None
+
+
+def delete_profile(profile_id: str) -> bool:
+    if not _valid_id(profile_id):
+        return False
+    deleted = False
+    for suffix in ('.json', '.speedscope.json', '.folded'):
+        try:
+            os.remove(os.path.join(_profiles_dir(), f"{profile_id}{suffix}"))
+            deleted = True
+        except FileNotFoundError:
+            pass
+    return deleted
+
+
+def token_matches(value: Optional[str]) -> bool:
+    """True when `value` is the configured profiling token (never when no token is set)"""
+    return bool(settings.profiling_token) and value is not None and hmac.compare_digest(
+        value.encode(), settings.profiling_token.encode()
+    )
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware choosing which requests to profile"""
+
+    def __init__(self, app):
+        self.app = app
+
+    def _trigger(self, scope) -> Optional[str]:
+        if scope['path'].startswith(EXCLUDED_PATHS):
+            return None
+        for name, value in scope['headers']:
+            if name == PROFILE_HEADER.encode():
+                return 'header' if token_matches(value.decode('latin-1')) else None
+        if settings.profiling_sample_rate > 0 and random.random() < settings.profiling_sample_rate:
+            return 'sample'
+        return None
+
+    async def __call__(self, scope, receive, send):
+        trigger = self._trigger(scope) if scope['type'] == 'http' else None
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope['method'], scope['path'], scope.get('query_string', b'').decode('latin-1'),
+                                 trigger)
+        status = {'code': 500}
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                status['code'] = message['status']
+                if trigger == 'header':
+                    message['headers'] = list(message.get('headers', [])) + [
+                        (b'x-profile-id', profile.profile_id.encode())
+                    ]
+            await send(message)
+
+        token = _current.set(profile)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - started
+            _current.reset(token)
+            endpoint = scope.get('endpoint')
+            if endpoint is not None:
+                profile.route = getattr(endpoint, '__name__', None)
+                for route in scope['app'].routes:
+                    if getattr(route, 'endpoint', None) is endpoint:
+                        profile.route = route.path
+                        break
+            if trigger == 'header' or duration * 1000 >= settings.profiling_min_ms:
+                await run_in_threadpool(save_profile, profile, status['code'], duration)
+
+
+def install_profiling(app):
+    """Wrap endpoints and response models for sampling and add the middleware
+
+    Called once, after all routers are included.
+    """
+    from fastapi.routing import APIRoute
+
+    for route in app.routes:
+        if not isinstance(route, APIRoute):
+            continue
+        call = route.dependant.call
+        # Sync endpoints run alone on a threadpool thread; async ones share the
+        # event loop with other requests and are only timed by the middleware
+        if not getattr(call, '_profiled', False) and not _is_coroutine(call):
+            route.dependant.call = _segment_wrapper(call, 'endpoint')
+            route.dependant.call._profiled = True
+        field = route.secure_cloned_response_field
+        if field is not None and not getattr(field, '_profiled', False):
+            field.validate = _segment_wrapper(field.validate, 'response_validation')
+            if hasattr(field, 'serialize'):
+                field.serialize = _segment_wrapper(field.serialize, 'response_serialization')
+            field._profiled = True
+    app.add_middleware(ProfilingMiddleware)
+
+
+def _is_coroutine(func) -> bool:
+    import asyncio
+    return asyncio.iscoroutinefunction(func)
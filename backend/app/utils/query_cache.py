@@ -0,0 +1,269 @@
+"""Result cache for data-viewer pages and counts.
+
+Entries are keyed by a canonical form of the request (table, kind, columns,
+normalized filters, ordering, page) plus the table's data version, so
+equivalent requests share an entry whatever their filter key order or
+IN-list order.
+
+- Data version: read from system.parts (highest block number, highest
+  mutation version and row count of the active parts). Any INSERT,
+  mutation or TRUNCATE changes it, and entries of the old version are
+  dropped. It is re-read at most every settings.query_cache_version_ttl_s,
+  which bounds how stale a cached page can be. With settings.clickhouse_cluster
+  set it is summed over the <table>_local parts of every node.
+- Size: bounded by settings.query_cache_max_bytes (estimated), evicting
+  least recently used entries first. 0 disables the cache entirely.
+- Payloads are columnar (one list per column) rather than row dicts.
+- prefetch() loads a page in a background thread (used for the next page
+  while the user reads the current one). A request arriving while its page
+  is being prefetched waits for it instead of querying again.
+"""
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from app.config import settings
+from app.database import get_clickhouse_client
+from app.utils.metrics import QUERY_CACHE_BYTES, QUERY_CACHE_LOOKUPS
+
+# Prefetches beyond this many in flight are skipped rather than queued
+MAX_PREFETCH_IN_FLIGHT = 4
+
+
+def enabled() -> bool:
+    return settings.query_cache_max_bytes > 0
+
+
+def normalize_filters(filters: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Filters with empty values dropped and IN lists sorted, as seen by build_where_clause"""
+    normalized = {}
+    for key, value in (filters or {}).items():
+        if value is None or value == "":
+            continue
+        if isinstance(value, dict):
+            value = {bound: value[bound] for bound in ('min', 'max') if value.get(bound) is not None}
+        elif isinstance(value, list):
+            if not value:
+                continue
+            value = sorted(value, key=str)
+        normalized[key] = value
+    return normalized
+
+
+def make_key(table: str, kind: str, version: Hashable, **parts) -> tuple:
+    """Cache key; parts are canonicalized so equivalent requests share a key"""
+    if 'filters' in parts:
+        parts['filters'] = normalize_filters(parts['filters'])
+    return (table, kind, version, json.dumps(parts, sort_keys=True, default=str))
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate memory held by a cached value; per-value sizes are sampled for long columns"""
+    if isinstance(value, list):
+        if not value:
+            return sys.getsizeof(value)
+        if isinstance(value[0], list):
+            return sys.getsizeof(value) + sum(estimate_size(column) for column in value)
+        sample = value[:64]
+        per_value = sum(sys.getsizeof(v) for v in sample) / len(sample)
+        return sys.getsizeof(value) + int(per_value * len(value))
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value.values())
+    return sys.getsizeof(value)
+
+
+class QueryCache:
+    """Byte-bounded LRU of query results"""
+
+    def __init__(self):
+        self._entries: 'OrderedDict[tuple, tuple]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple):
+        """(True, value) on a hit, (False, None) on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            self._entries.move_to_end(key)
+            return True, entry[0]
+
+    def __contains__(self, key: tuple) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def put(self, key: tuple, value: Any):
+        size = estimate_size(value)
+        max_bytes = settings.query_cache_max_bytes
+        if size > max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+            QUERY_CACHE_BYTES.set(self._bytes)
+
+    def drop_table(self, table: str, keep_version: Hashable = None):
+        """Remove a table's entries, except those of `keep_version`"""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == table and k[2] != keep_version]:
+                self._bytes -= self._entries.pop(key)[1]
+            QUERY_CACHE_BYTES.set(self._bytes)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            QUERY_CACHE_BYTES.set(0)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._bytes,
+                    'max_bytes': settings.query_cache_max_bytes}
+
+
+_cache = QueryCache()
+_versions: Dict[str, tuple] = {}  # table -> (checked at, version)
+_versions_lock = threading.Lock()
+_in_flight: Dict[tuple, Any] = {}  # key -> Future of a running prefetch
+_in_flight_lock = threading.Lock()
+_prefetch_pool = None
+
+
+def _read_versions(tables) -> Dict[str, tuple]:
+    client = get_clickhouse_client()
+    versions = {table: (0, 0, 0) for table in tables}
+    if settings.clickhouse_cluster:
+        return _read_cluster_versions(client, tables, versions)
+
+    table_list = ', '.join(f"'{t}'" for t in tables)
+    result = client.query(f"""
+        SELECT table, max(max_block_number), max(data_version), sum(rows)
+        FROM system.parts
+        WHERE database = currentDatabase() AND active AND table IN ({table_list})
+        GROUP BY table
+    """)
+    for table, block, mutation, rows in result.result_rows:
+        versions[table] = (int(block), int(mutation), int(rows))
+    return versions
+
+
+def _read_cluster_versions(client, tables, versions) -> Dict[str, tuple]:
+    # A Distributed table has no parts: its data lives in <table>_local on every
+    # node. Block numbers are per shard, so each node's maxima are summed.
+    local_list = ', '.join(f"'{t}_local'" for t in tables)
+    result = client.query(f"""
+        SELECT table, sum(node_block), sum(node_mutation), sum(node_rows)
+        FROM (
+            SELECT hostName() AS host, table, max(max_block_number) AS node_block,
+                   max(data_version) AS node_mutation, sum(rows) AS node_rows
+            FROM clusterAllReplicas('{settings.clickhouse_cluster}', system.parts)
+            WHERE database = {{db:String}} AND active AND table IN ({local_list})
+            GROUP BY host, table
+        )
+        GROUP BY table
+    """, parameters={'db': settings.clickhouse_db})
+    for table, block, mutation, rows in result.result_rows:
+        versions[table[:-len('_local')]] = (int(block), int(mutation), int(rows))
+    return versions
+
+
+def data_version(table: str) -> Optional[tuple]:
+    """Current data version of `table` (None when the cache is disabled)"""
+    if not enabled():
+        return None
+    now = time.monotonic()
+    with _versions_lock:
+        checked = _versions.get(table)
+        if checked is not None and now - checked[0] < settings.query_cache_version_ttl_s:
+            return checked[1]
+
+    version = _read_versions([table])[table]
+    with _versions_lock:
+        previous = _versions.get(table)
+        _versions[table] = (now, version)
+    if previous is not None and previous[1] != version:
+        _cache.drop_table(table, keep_version=version)
+    return version
+
+
+def read_data_version(table: str) -> tuple:
+    """Data version of `table` read now, whether or not the cache is enabled"""
+    return _read_versions([table])[table]
+
+
+def invalidate(table: Optional[str] = None):
+    """Forget cached results (of one table, or all) and their data versions, e.g. after a write"""
+    with _versions_lock:
+        if table is None:
+            _versions.clear()
+        else:
+            _versions.pop(table, None)
+    if table is None:
+        _cache.clear()
+    else:
+        _cache.drop_table(table)
+
+
+def get_or_load(key: tuple, loader: Callable[[], Any]) -> Any:
+    """Cached value for `key`, loading (and caching) it on a miss"""
+    table, kind = key[0], key[1]
+    if not enabled():
+        return loader()
+
+    hit, value = _cache.get(key)
+    if hit:
+        QUERY_CACHE_LOOKUPS.labels(table, kind, 'hit').inc()
+        return value
+
+    with _in_flight_lock:
+        pending = _in_flight.get(key)
+    if pending is not None:
+        try:
+            value = pending.result()
+            QUERY_CACHE_LOOKUPS.labels(table, kind, 'prefetched').inc()
+            return value
+        except Exception:
+            pass  # The prefetch failed; load it here and let any error surface
+
+    QUERY_CACHE_LOOKUPS.labels(table, kind, 'miss').inc()
+    value = loader()
+    _cache.put(key, value)
+    return value
+
+
+def _run_prefetch(key: tuple, loader: Callable[[], Any]):
+    try:
+        value = loader()
+        _cache.put(key, value)
+        return value
+    finally:
+        with _in_flight_lock:
+            _in_flight.pop(key, None)
+
+
+def prefetch(key: tuple, loader: Callable[[], Any]):
+    """Load `key` in the background unless it is cached or already being loaded"""
+    global _prefetch_pool
+    if not enabled() or not settings.query_cache_prefetch or key in _cache:
+        return
+    with _in_flight_lock:
+        if key in _in_flight or len(_in_flight) >= MAX_PREFETCH_IN_FLIGHT:
+            return
+        if _prefetch_pool is None:
+            _prefetch_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='page-prefetch')
+        _in_flight[key] = _prefetch_pool.submit(_run_prefetch, key, loader)
+
+
+def stats() -> Dict[str, int]:
+    return _cache.stats()
@@ -0,0 +1,84 @@
+"""Approximate aggregates over sampled tables, with error bounds.
+
+Tables with a SAMPLE BY key can answer `SELECT ... FROM t SAMPLE 0.05` from
+about 5% of their granules. The sample is a hash of the row key, so it
+behaves like a Bernoulli sample with rate f (ClickHouse reports the rate
+it used as _sample_factor = 1/f). Estimates from n sampled rows:
+- a count is n / f, with standard error sqrt(n * (1 - f)) / f;
+- a rate a / b is estimated on the sampled rows, with standard error
+  sqrt(p * (1 - p) / b).
+Margins are the 95% half-widths (1.96 standard errors).
+
+accuracy=progressive answers as server-sent events: an 'approx' event
+right away, then an 'exact' event when the full scan finishes.
+"""
+import json
+import logging
+import math
+import time
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from app.config import settings
+from app.database import get_clickhouse_client
+
+log = logging.getLogger('app.sampling')
+
+ACCURACY_PATTERN = '^(exact|approx|progressive)$'
+Z_95 = 1.96
+
+# Sampled variant of each table (database/init/02_poverty_data_sampled.sql)
+SAMPLED_TABLES = {'poverty_data': 'poverty_data_sampled'}
+
+_available: Dict[str, float] = {}  # sampled table -> when it was last seen to exist
+
+
+def sampled_table(table: str) -> Optional[str]:
+    """The sampling-enabled variant of `table`, or None if it is not set up"""
+    sampled = SAMPLED_TABLES.get(table)
+    if sampled is None:
+        return None
+    # Rechecked now and then, so creating the table later needs no restart
+    if time.monotonic() - _available.get(sampled, -math.inf) < 60:
+        return sampled
+    client = get_clickhouse_client()
+    exists = client.query(
+        "SELECT count() FROM system.tables WHERE database = currentDatabase() AND name = {name:String}",
+        parameters={'name': sampled}
+    ).result_rows[0][0]
+    if not exists:
+        log.warning("%s has no sampled variant %s; answering exactly", table, sampled)
+        return None
+    _available[sampled] = time.monotonic()
+    return sampled
+
+
+def sample_fraction(requested: Optional[float] = None) -> float:
+    return requested if requested is not None else settings.approx_sample_fraction
+
+
+def estimate_count(sampled: int, fraction: float) -> tuple:
+    """(estimated total, 95% margin) from a count over a sample of rate `fraction`"""
+    estimate = sampled / fraction
+    margin = Z_95 * math.sqrt(sampled * (1 - fraction)) / fraction
+    return round(estimate), round(margin)
+
+
+def rate_margin(rate: float, denominator: int) -> float:
+    """95% margin of a rate estimated over `denominator` sampled rows"""
+    if denominator <= 0:
+        return 1.0
+    return round(Z_95 * math.sqrt(max(rate * (1 - rate), 0.0) / denominator), 4)
+
+
+def _event(name: str, data: Any) -> str:
+    return f"event: {name}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def progressive_events(compute: Callable[[str], Any]) -> Iterator[str]:
+    """SSE stream of compute('approx') then compute('exact'); errors become an 'error' event"""
+    try:
+        yield _event('approx', compute('approx'))
+        yield _event('exact', compute('exact'))
+    except Exception as e:
+        log.warning("Progressive answer failed: %s: %s", type(e).__name__, e)
+        yield _event('error', {'detail': str(e)})
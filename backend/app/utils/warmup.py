@@ -0,0 +1,65 @@
+"""Background warmup of the lazily imported parts of the app.
+
+The app module imports only what routing needs, so it starts fast. The heavy
+parts load on first use instead: the ClickHouse driver (with pandas), the
+poverty model (NumPy plus scikit-learn through its pickle), the geographic
+search index and the clustering code. warmup() loads them in a daemon
+thread started at startup, so the server accepts connections while it works. Requests that arrive
+before a step finishes just do that step themselves. A step that fails
+(for example, no model trained yet) is logged and skipped.
+"""
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+
+log = logging.getLogger('app.warmup')
+
+# step -> seconds taken, or the error it raised
+status: Dict[str, object] = {}
+
+
+def _connect_clickhouse():
+    from app.database import get_clickhouse_client
+    get_clickhouse_client().query("SELECT 1")
+
+
+def _load_poverty_model():
+    from app.ml.model_loader import load_svm_model
+    load_svm_model()
+
+
+def _build_geo_index():
+    from app.services.geo_service import get_index
+    get_index()
+
+
+def _import_clustering():
+    import app.ml.clustering  # noqa: F401
+
+
+STEPS: List[Tuple[str, Callable[[], None]]] = [
+    ('clickhouse', _connect_clickhouse),
+    ('poverty_model', _load_poverty_model),
+    ('geo_index', _build_geo_index),
+    ('clustering', _import_clustering)
+]
+
+
+def warmup():
+    for name, step in STEPS:
+        started = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            status[name] = f"{type(e).__name__}: {e}"
+            log.warning("Warmup step %s failed: %s", name, status[name])
+        else:
+            status[name] = round(time.perf_counter() - started, 3)
+            log.info("Warmup step %s took %.3fs", name, status[name])
+
+
+def start_warmup() -> threading.Thread:
+    thread = threading.Thread(target=warmup, name='warmup', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,7 @@
+import os
+import sys
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+# Embedded ClickHouse stand-in used by the benchmarks
+sys.path.insert(0, os.path.join(os.path.dirname(BACKEND), 'benchmarks'))
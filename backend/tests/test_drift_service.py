@@ -0,0 +1,92 @@
+import random
+
+import pytest
+
+from app.config import settings
+from app.ml.features import build_feature_spec
+from app.services import drift_service
+
+pytest.importorskip('chdb')
+
+PROVINCES = ['MARINDUQUE', 'PALAWAN']
+
+
+def roster_rows(n, seed=0):
+    """poverty_data-style rows: yes/no answers coded 1=Yes/2=No"""
+    rng = random.Random(seed)
+    return [{
+        'province_name': rng.choice(PROVINCES),
+        'urb_rur': rng.choice([1, 2]),
+        'no_of_indiv': rng.randint(1, 9),
+        'no_sleeping_rooms': rng.randint(0, 3),
+        'house_type': rng.randint(1, 5),
+        'has_electricity': rng.choices([1, 2], weights=[3, 1])[0],
+        'television': rng.choice([0, 1]),
+        'ref': rng.choice([0, 1]),
+        'motorcycle': rng.choice([0, 1])
+    } for _ in range(n)]
+
+
+@pytest.fixture
+def reference(tmp_path):
+    from chdb_client import ChdbClient
+    from app import database
+
+    spec = build_feature_spec(PROVINCES)
+    client = ChdbClient(path=str(tmp_path / 'chdb'))
+    client.command("CREATE DATABASE IF NOT EXISTS drift_test")
+    client.use_database('drift_test')
+    columns = ', '.join(f"{name} {'String' if name == 'province_name' else 'UInt8'}" for name in spec.columns)
+    client.command(f"CREATE TABLE poverty_data ({columns}) ENGINE = MergeTree ORDER BY tuple()")
+    rows = roster_rows(4000)
+    client.insert('poverty_data', [[row[name] for name in spec.columns] for row in rows],
+                  column_names=spec.columns)
+
+    database.set_client_factory(lambda: client)
+    try:
+        yield spec, drift_service._reference_counts(spec)
+    finally:
+        database.set_client_factory(None)
+
+
+def test_form_coded_inputs_are_stable(reference):
+    spec, counts = reference
+    # The prediction form sends has_electricity as 1=Yes/0=No
+    inputs = roster_rows(2000, seed=1)
+    for row in inputs:
+        row['has_electricity'] = 0 if row['has_electricity'] == 2 else 1
+
+    features = {f.name: f for f in spec.features}
+    monitor = drift_service.DriftMonitor()
+    monitor.record(inputs, spec.columns)
+    _, recent = monitor.merged()
+    for (province, feature), raw in recent.items():
+        histogram = drift_service._encode(features[feature], raw)
+        value = drift_service.psi(counts[(province, feature)], histogram)
+        assert value < settings.drift_psi_warn, (province, feature, value)
+
+
+def test_shifted_inputs_drift(reference):
+    spec, counts = reference
+    inputs = roster_rows(2000, seed=1)
+    for row in inputs:
+        row['no_of_indiv'] += 4
+
+    monitor = drift_service.DriftMonitor()
+    monitor.record(inputs, spec.columns)
+    _, recent = monitor.merged()
+    histogram = drift_service._encode(spec.features[spec.columns.index('no_of_indiv')],
+                                      recent[('PALAWAN', 'no_of_indiv')])
+    assert drift_service.psi(counts[('PALAWAN', 'no_of_indiv')], histogram) >= settings.drift_psi_alert
+
+
+def test_unseen_answers_share_overflow_bin():
+    spec = build_feature_spec(PROVINCES)
+    monitor = drift_service.DriftMonitor()
+    inputs = [dict(roster_rows(1)[0], no_of_indiv=i) for i in range(drift_service.MAX_VALUES + 5)]
+    monitor.record(inputs, spec.columns)
+    _, recent = monitor.merged()
+    histogram = recent[(inputs[0]['province_name'], 'no_of_indiv')]
+    assert len(histogram) == drift_service.MAX_VALUES + 1
+    assert histogram[drift_service.OVERFLOW] == 5
+    assert sum(histogram.values()) == len(inputs)
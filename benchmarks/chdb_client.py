@@ -0,0 +1,136 @@
+"""In-process ClickHouse stand-in for benchmarks, built on chDB.
+
+ChdbClient implements the slice of the clickhouse-connect client API the
+backend uses (query, command, query_df, insert, query_column_block_stream).
+Installed with app.database.set_client_factory, it runs the unchanged
+services against the embedded ClickHouse engine: same SQL dialect, same
+MergeTree tables, no server to start.
+
+Differences from a real server, all irrelevant to the roster tables:
+DateTime columns come back as epoch seconds and UUIDs as strings.
+Tuples come back as tuples, as with clickhouse-connect.
+"""
+import uuid
+
+import pyarrow as pa
+from chdb import session as chdb_session
+
+
+class ChdbResult:
+    """Mimics clickhouse_connect QueryResult"""
+
+    def __init__(self, table, raw=None):
+        self.column_names = tuple(table.column_names) if table is not None else ()
+        self.result_columns = [_to_python(col) for col in table.columns] if table is not None else []
+        self.row_count = table.num_rows if table is not None else 0
+        self.summary = {
+            'read_rows': str(raw.rows_read()) if raw is not None else '0',
+            'read_bytes': str(raw.bytes_read()) if raw is not None else '0',
+            'elapsed_ns': str(int(raw.elapsed() * 1e9)) if raw is not None else '0'
+        }
+        self._rows = None
+
+    @property
+    def result_rows(self):
+        if self._rows is None:
+            self._rows = list(zip(*self.result_columns))
+        return self._rows
+
+    def first_row(self):
+        return self.result_rows[0]
+
+
+def _has_struct(arrow_type) -> bool:
+    if isinstance(arrow_type, pa.StructType):
+        return True
+    return pa.types.is_list(arrow_type) and _has_struct(arrow_type.value_type)
+
+
+def _as_tuples(value):
+    # Arrow structs come back as dicts; clickhouse-connect returns Tuple values as tuples
+    if isinstance(value, dict):
+        return tuple(_as_tuples(v) for v in value.values())
+    if isinstance(value, list):
+        return [_as_tuples(v) for v in value]
+    return value
+
+
+def _to_python(column):
+    if isinstance(column.type, pa.FixedSizeBinaryType) and column.type.byte_width == 16:
+        return [str(uuid.UUID(bytes=v)) if v is not None else None for v in column.to_pylist()]
+    if _has_struct(column.type):
+        return [_as_tuples(v) for v in column.to_pylist()]
+    return column.to_pylist()
+
+
+def _read_arrow(raw):
+    data = raw.bytes()
+    if not data:
+        return None
+    return pa.ipc.open_file(pa.BufferReader(data)).read_all()
+
+
+def _with_settings(sql, settings):
+    if not settings:
+        return sql
+    rendered = ', '.join(f"{k} = {v!r}" if isinstance(v, str) else f"{k} = {v}" for k, v in settings.items())
+    return f"{sql}\nSETTINGS {rendered}"
+
+
+class ChdbClient:
+    """clickhouse-connect compatible client over a chDB session"""
+
+    def __init__(self, path: str = None, database: str = 'default'):
+        self._session = chdb_session.Session(path) if path else chdb_session.Session()
+        self.database = database
+        self.use_database(database)
+
+    def use_database(self, database: str):
+        self._session.query(f"CREATE DATABASE IF NOT EXISTS {database}")
+        self._session.query(f"USE {database}")
+        self.database = database
+
+    def query(self, query, parameters=None, settings=None, **kwargs):
+        raw = self._session.query(_with_settings(query, settings), 'Arrow', params=parameters)
+        return ChdbResult(_read_arrow(raw), raw)
+
+    def command(self, cmd, parameters=None, settings=None, **kwargs):
+        raw = self._session.query(_with_settings(cmd, settings), 'CSV', params=parameters)
+        text = raw.bytes().decode().strip()
+        return text if text else ChdbResult(None, raw)
+
+    def query_df(self, query, parameters=None, settings=None, **kwargs):
+        return self._session.query(_with_settings(query, settings), 'DataFrame', params=parameters)
+
+    def query_column_block_stream(self, query, parameters=None, settings=None, **kwargs):
+        block_size = int((settings or {}).get('max_block_size', 65536))
+        stream = self._session.send_query(query, 'Arrow', params=parameters)
+        return _BlockStream(stream.record_batch(rows_per_batch=block_size), stream)
+
+    def insert(self, table, data, column_names='*', column_oriented=False, **kwargs):
+        columns = list(data) if column_oriented else [list(c) for c in zip(*data)]
+        # Arrow has no UUID type; ClickHouse parses them back from strings
+        columns = [[str(v) for v in col] if len(col) and isinstance(col[0], uuid.UUID) else col for col in columns]
+        arrow_table = pa.table({name: pa.array(list(col)) for name, col in zip(column_names, columns)})  # noqa: F841
+        # chDB reads the local variable through the Python() table function
+        self._session.query(
+            f"INSERT INTO {table} ({', '.join(column_names)}) SELECT * FROM Python(arrow_table)"
+        )
+
+    def close(self):
+        self._session.close()
+
+
+class _BlockStream:
+    """Context manager yielding lists of column lists, like clickhouse-connect"""
+
+    def __init__(self, reader, stream):
+        self._reader = reader
+        self._stream = stream
+
+    def __enter__(self):
+        return ([_to_python(col) for col in batch.columns] for batch in self._reader)
+
+    def __exit__(self, *exc):
+        self._stream.close()
+        return False
@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+HTTP load test replaying dashboard sessions against a running backend.
+
+Each virtual user loops over sessions drawn from a weighted mix. Every
+session issues the same request bursts as the frontend page it mimics:
+- data_viewer: both /columns calls together, then the first page (count +
+  page), then paging and a filter change.
+- analytics: coverage and efficiency together.
+- prediction: a few /predict/poverty submissions with form edits in between.
+
+Users think between steps (exponential, --think-time mean), so the
+concurrency is the number of open dashboard tabs, not requests in flight.
+
+Reported per endpoint: throughput, p50/p90/p99/max latency and error rate.
+Resource usage is sampled during the run:
+- Backend: process CPU seconds and resident memory, from its /metrics.
+- ClickHouse: query CPU time, rows read and peak tracked memory, from the
+  system tables over its HTTP interface.
+
+Usage (from the repository root, backend on localhost:8000):
+    pip install -r benchmarks/requirements.txt
+    python benchmarks/load_test.py --users 20 --duration 60
+    python benchmarks/load_test.py --users 50 --mix data_viewer=1 --think-time 0.2
+    python benchmarks/load_test.py --clickhouse-url http://localhost:8123 --output results/load.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import time
+from datetime import datetime
+
+import httpx
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_MIX = {'data_viewer': 0.5, 'analytics': 0.3, 'prediction': 0.2}
+
+# DataViewerPage's initial column selection
+DEFAULT_COLUMNS = ['hh_id', 'province_name', 'city_name', 'barangay_name', 'urb_rur', 'no_of_indiv',
+                   'no_sleeping_rooms', 'house_type', 'has_electricity', 'television', 'ref', 'motorcycle',
+                   'poverty_status', 'poor']
+PROVINCES = ['MARINDUQUE', 'OCCIDENTAL MINDORO', 'ORIENTAL MINDORO', 'PALAWAN', 'ROMBLON']
+
+CLICKHOUSE_EVENTS = ['Query', 'SelectQuery', 'SelectedRows', 'SelectedBytes', 'OSCPUVirtualTimeMicroseconds']
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))]
+
+
+class Recorder:
+    """Latency and outcome of every request, keyed by endpoint label"""
+
+    def __init__(self):
+        self.samples = {}
+
+    def add(self, endpoint, seconds, ok):
+        self.samples.setdefault(endpoint, []).append((seconds, ok))
+
+    def summary(self, elapsed):
+        report = {}
+        for endpoint, samples in sorted(self.samples.items()):
+            latencies = sorted(s for s, _ in samples)
+            errors = sum(1 for _, ok in samples if not ok)
+            report[endpoint] = {
+                'requests': len(samples),
+                'errors': errors,
+                'error_rate': round(errors / len(samples), 4),
+                'throughput_rps': round(len(samples) / elapsed, 2),
+                'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+                'p90_ms': round(percentile(latencies, 0.90) * 1000, 2),
+                'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+                'max_ms': round(latencies[-1] * 1000, 2)
+            }
+        return report
+
+
+class Session:
+    """One virtual user's view of the dashboard"""
+
+    def __init__(self, client, recorder, rng, think_time):
+        self.client = client
+        self.recorder = recorder
+        self.rng = rng
+        self.think_time = think_time
+
+    async def request(self, method, endpoint, **kwargs):
+        """Issue one request; `endpoint` is the route template used for reporting"""
+        path = kwargs.pop('path', endpoint)
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, path, **kwargs)
+            await response.aread()
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        self.recorder.add(f"{method} {endpoint}", time.perf_counter() - started, ok)
+
+    async def think(self):
+        if self.think_time > 0:
+            await asyncio.sleep(self.rng.expovariate(1 / self.think_time))
+
+    def page_params(self, page, limit, filters=None):
+        params = {'page': page, 'limit': limit, 'columns': ','.join(DEFAULT_COLUMNS)}
+        if filters:
+            params['filters'] = json.dumps(filters)
+        return params
+
+    async def data_viewer(self):
+        await asyncio.gather(
+            self.request('GET', '/data-viewer/poverty-data/columns'),
+            self.request('GET', '/data-viewer/predictions/columns')
+        )
+        limit = self.rng.choice([100, 100, 100, 250, 500])
+        filters = {}
+        await self.request('GET', '/data-viewer/poverty-data', params=self.page_params(1, limit))
+        for _ in range(self.rng.randint(1, 4)):
+            await self.think()
+            action = self.rng.random()
+            if action < 0.5:
+                page = self.rng.randint(2, 20)
+            else:
+                # Typing a province name or picking Poor / Non-Poor resets to page 1
+                page = 1
+                if self.rng.random() < 0.6:
+                    filters['province_name'] = self.rng.choice(PROVINCES)[:self.rng.randint(3, 8)]
+                else:
+                    filters['poor'] = self.rng.randint(0, 1)
+            await self.request('GET', '/data-viewer/poverty-data', params=self.page_params(page, limit, filters))
+
+    async def analytics(self):
+        await asyncio.gather(
+            self.request('GET', '/targeting/coverage'),
+            self.request('GET', '/targeting/efficiency')
+        )
+
+    async def prediction(self):
+        form = {
+            'province_name': self.rng.choice(PROVINCES), 'urb_rur': self.rng.randint(1, 2),
+            'no_of_indiv': self.rng.randint(1, 12), 'no_sleeping_rooms': self.rng.randint(0, 4),
+            'house_type': self.rng.randint(1, 6), 'has_electricity': self.rng.randint(0, 1),
+            'television': self.rng.randint(0, 2), 'ref': self.rng.randint(0, 2),
+            'motorcycle': self.rng.randint(0, 2)
+        }
+        for _ in range(self.rng.randint(1, 3)):
+            await self.request('POST', '/predict/poverty', json=form)
+            await self.think()
+            field = self.rng.choice(['no_of_indiv', 'television', 'ref', 'motorcycle'])
+            form[field] = max(0, form[field] + self.rng.choice([-1, 1]))
+
+
+async def virtual_user(user_id, client, recorder, mix, deadline, think_time, seed, session_counts):
+    rng = random.Random(f"{seed}-{user_id}")
+    session = Session(client, recorder, rng, think_time)
+    names, weights = zip(*mix.items())
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        started = time.perf_counter()
+        await getattr(session, name)()
+        session_counts.setdefault(name, []).append(time.perf_counter() - started)
+        await session.think()
+
+
+def parse_prometheus(text, names):
+    """Values of unlabelled samples in a Prometheus text exposition"""
+    values = {}
+    for line in text.splitlines():
+        match = re.match(r'^([a-zA-Z_:][a-zA-Z0-9_:]*) ([0-9.eE+-]+)$', line)
+        if match and match.group(1) in names:
+            values[match.group(1)] = float(match.group(2))
+    return values
+
+
+class ResourceSampler:
+    """Backend process and ClickHouse usage while the load runs"""
+
+    BACKEND_METRICS = ('process_cpu_seconds_total', 'process_resident_memory_bytes')
+
+    def __init__(self, metrics_url, clickhouse_url=None, clickhouse_auth=None, interval=1.0):
+        self.metrics_url = metrics_url
+        self.clickhouse_url = clickhouse_url
+        self.clickhouse_auth = clickhouse_auth
+        self.interval = interval
+        self.backend = []
+        self.clickhouse_memory = []
+        self.events = {}
+
+    async def _backend_sample(self, client):
+        try:
+            response = await client.get(self.metrics_url)
+            return parse_prometheus(response.text, self.BACKEND_METRICS)
+        except httpx.HTTPError:
+            return {}
+
+    async def _clickhouse(self, client, sql):
+        try:
+            response = await client.post(self.clickhouse_url, content=sql + ' FORMAT JSONEachRow',
+                                         auth=self.clickhouse_auth)
+            response.raise_for_status()
+            return [json.loads(line) for line in response.text.splitlines() if line]
+        except httpx.HTTPError:
+            return []
+
+    async def _clickhouse_events(self, client):
+        names = ', '.join(f"'{e}'" for e in CLICKHOUSE_EVENTS)
+        rows = await self._clickhouse(client, f"SELECT event, value FROM system.events WHERE event IN ({names})")
+        return {row['event']: int(row['value']) for row in rows}
+
+    async def run(self, stop):
+        async with httpx.AsyncClient(timeout=10) as client:
+            if self.clickhouse_url:
+                self.events['start'] = await self._clickhouse_events(client)
+            while not stop.is_set():
+                sample = await self._backend_sample(client)
+                if sample:
+                    self.backend.append(sample)
+                if self.clickhouse_url:
+                    rows = await self._clickhouse(
+                        client, "SELECT value FROM system.metrics WHERE metric = 'MemoryTracking'")
+                    if rows:
+                        self.clickhouse_memory.append(int(rows[0]['value']))
+                try:
+                    await asyncio.wait_for(stop.wait(), self.interval)
+                except asyncio.TimeoutError:
+                    pass
+            self.backend.append(await self._backend_sample(client))
+            if self.clickhouse_url:
+                self.events['end'] = await self._clickhouse_events(client)
+
+    def summary(self, elapsed):
+        report = {}
+        cpu = [s['process_cpu_seconds_total'] for s in self.backend if 'process_cpu_seconds_total' in s]
+        memory = [s['process_resident_memory_bytes'] for s in self.backend if 'process_resident_memory_bytes' in s]
+        if len(cpu) >= 2:
+            report['backend'] = {
+                'cpu_seconds': round(cpu[-1] - cpu[0], 2),
+                'cpu_utilization': round((cpu[-1] - cpu[0]) / elapsed, 3),
+                'peak_rss_mb': round(max(memory) / 1e6, 1) if memory else None
+            }
+        if self.events.get('start') and self.events.get('end'):
+            delta = {e: self.events['end'].get(e, 0) - self.events['start'].get(e, 0) for e in CLICKHOUSE_EVENTS}
+            # The sampler's own queries are included (a few per second)
+            report['clickhouse'] = {
+                'queries': delta['Query'],
+                'selected_rows': delta['SelectedRows'],
+                'selected_bytes': delta['SelectedBytes'],
+                'cpu_seconds': round(delta['OSCPUVirtualTimeMicroseconds'] / 1e6, 2),
+                'cpu_utilization': round(delta['OSCPUVirtualTimeMicroseconds'] / 1e6 / elapsed, 3),
+                'peak_memory_mb': round(max(self.clickhouse_memory) / 1e6, 1) if self.clickhouse_memory else None
+            }
+        return report
+
+
+async def run(base_url, users, duration, mix, think_time, ramp_up, seed, timeout, sampler):
+    recorder = Recorder()
+    session_counts = {}
+    limits = httpx.Limits(max_connections=users * 2, max_keepalive_connections=users * 2)
+    stop = asyncio.Event()
+    sampler_task = asyncio.create_task(sampler.run(stop))
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        started = time.perf_counter()
+        deadline = started + duration
+        tasks = []
+        for user_id in range(users):
+            tasks.append(asyncio.create_task(virtual_user(
+                user_id, client, recorder, mix, deadline, think_time, seed, session_counts
+            )))
+            if ramp_up:
+                await asyncio.sleep(ramp_up / users)
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    stop.set()
+    await sampler_task
+
+    total = sum(len(s) for s in recorder.samples.values())
+    errors = sum(1 for s in recorder.samples.values() for _, ok in s if not ok)
+    return {
+        'elapsed_seconds': round(elapsed, 2),
+        'total_requests': total,
+        'throughput_rps': round(total / elapsed, 2),
+        'error_rate': round(errors / total, 4) if total else None,
+        'endpoints': recorder.summary(elapsed),
+        'sessions': {
+            name: {
+                'count': len(times),
+                'p50_ms': round(percentile(sorted(times), 0.5) * 1000, 1),
+                'p99_ms': round(percentile(sorted(times), 0.99) * 1000, 1)
+            } for name, times in sorted(session_counts.items())
+        },
+        'resources': sampler.summary(elapsed)
+    }
+
+
+def print_report(report):
+    print(f"\n{report['total_requests']} requests in {report['elapsed_seconds']}s "
+          f"({report['throughput_rps']} req/s, error rate {report['error_rate']})\n")
+    print(f"  {'endpoint':<44} {'req':>6} {'req/s':>8} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} "
+          f"{'max ms':>9} {'errors':>7}")
+    for endpoint, s in report['endpoints'].items():
+        print(f"  {endpoint:<44} {s['requests']:>6} {s['throughput_rps']:>8} {s['p50_ms']:>9} {s['p90_ms']:>9} "
+              f"{s['p99_ms']:>9} {s['max_ms']:>9} {s['error_rate']:>7.2%}")
+    print("\n  sessions: " + ', '.join(
+        f"{name} x{s['count']} (p50 {s['p50_ms']} ms, p99 {s['p99_ms']} ms)" for name, s in report['sessions'].items()
+    ))
+    for component, usage in report['resources'].items():
+        print(f"  {component}: " + ', '.join(f"{k}={v}" for k, v in usage.items()))
+
+
+def parse_mix(values):
+    if not values:
+        return DEFAULT_MIX
+    mix = {}
+    for item in values:
+        name, _, weight = item.partition('=')
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"Unknown session '{name}' (choose from {sorted(DEFAULT_MIX)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay dashboard sessions against the API")
+    parser.add_argument('--base-url', default=os.getenv('API_URL', 'http://localhost:8000/api/v1'))
+    parser.add_argument('--metrics-url', default=None, help="Backend /metrics (default: derived from --base-url)")
+    parser.add_argument('--users', type=int, default=10, help="Concurrent virtual users")
+    parser.add_argument('--duration', type=float, default=60, help="Seconds to run")
+    parser.add_argument('--ramp-up', type=float, default=5, help="Seconds to start all users over")
+    parser.add_argument('--think-time', type=float, default=1.0, help="Mean pause between user actions (s)")
+    parser.add_argument('--mix', nargs='+', metavar='SESSION=WEIGHT',
+                        help="Session weights, e.g. data_viewer=2 analytics=1 (default: 0.5/0.3/0.2)")
+    parser.add_argument('--timeout', type=float, default=60)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--clickhouse-url', default=None, help="ClickHouse HTTP interface for resource sampling")
+    parser.add_argument('--clickhouse-user', default=os.getenv('CLICKHOUSE_USER', 'admin'))
+    parser.add_argument('--clickhouse-password', default=os.getenv('CLICKHOUSE_PASSWORD', 'admin123'))
+    parser.add_argument('--output', default=None, help="Report JSON (default: benchmarks/results/load_<time>.json)")
+    args = parser.parse_args()
+
+    try:
+        mix = parse_mix(args.mix)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    metrics_url = args.metrics_url or re.sub(r'/api/v\d+/?$', '', args.base_url.rstrip('/')) + '/metrics'
+    sampler = ResourceSampler(metrics_url, args.clickhouse_url, (args.clickhouse_user, args.clickhouse_password))
+
+    print(f"{args.users} users for {args.duration:.0f}s against {args.base_url} (mix {mix})")
+    report = asyncio.run(run(args.base_url, args.users, args.duration, mix, args.think_time, args.ramp_up,
+                             args.seed, args.timeout, sampler))
+    report['meta'] = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'base_url': args.base_url,
+        'users': args.users,
+        'duration': args.duration,
+        'think_time': args.think_time,
+        'mix': mix,
+        'seed': args.seed
+    }
+    print_report(report)
+
+    output = args.output or os.path.join(BENCH_DIR, 'results', f"load_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport saved to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""Schema setup and a synthetic poverty_data roster for benchmarks.
+
+Tables come from database/init/01_create_tables.sql. The roster is generated
+inside ClickHouse with one INSERT ... SELECT FROM numbers(n). Every value
+is a hash of (row number, seed, column), so a given size and seed always
+produce the same table. Poverty depends on house type, assets and household
+size, which gives the model and the targeting queries realistic selectivity.
+"""
+import os
+import re
+
+SCHEMA_SQL = os.path.join(os.path.dirname(__file__), '..', 'database', 'init', '01_create_tables.sql')
+
+PROVINCES = ['MARINDUQUE', 'OCCIDENTAL MINDORO', 'ORIENTAL MINDORO', 'PALAWAN', 'ROMBLON']
+PROVINCE_WEIGHTS = [0.08, 0.17, 0.27, 0.37, 0.11]
+
+
+def create_schema(client):
+    """Create the app tables in the client's current database"""
+    with open(SCHEMA_SQL) as f:
+        sql = f.read()
+    sql = re.sub(r'--[^\n]*', '', sql)
+    for statement in sql.split(';'):
+        statement = statement.strip()
+        if statement.upper().startswith('CREATE TABLE'):
+            client.command(statement)
+
+
+def _rand(seed: int, column: int, modulo: int) -> str:
+    return f"(cityHash64(number, {seed}, {column}) % {modulo})"
+
+
+def roster_insert_sql(rows: int, seed: int = 42) -> str:
+    """INSERT ... SELECT generating `rows` households"""
+    r = lambda column, modulo: _rand(seed, column, modulo)  # noqa: E731
+
+    # Province by cumulative weight on a 0-999 draw
+    cumulative, bounds = 0, []
+    for weight in PROVINCE_WEIGHTS[:-1]:
+        cumulative += weight
+        bounds.append(int(cumulative * 1000))
+    province_index = ' + '.join(f"({r(1, 1000)} >= {b})" for b in bounds)
+    provinces = ', '.join(f"'{p}'" for p in PROVINCES)
+
+    return f"""
+    INSERT INTO poverty_data
+    SELECT
+        hh_id, region_name, province_name, city_name, barangay_name,
+        psgc_province, psgc_municipality, psgc_barangay, district, urb_rur, purok_sitio,
+        no_of_indiv, no_of_families, no_sleeping_rooms, l_stay,
+        house_type, roof_mat, out_wall, toilet_facilities, has_electricity, water_supply,
+        radio, television, ref, motorcycle, phone, pc,
+        received_pppp, received_philhealth, received_scholarship, received_livelihood,
+        if(poor = 1, 'Poor', 'Non-Poor') AS poverty_status, poor AS poverty_status2, poor
+    FROM (
+        SELECT
+            concat('17', leftPad(toString(number), 10, '0')) AS hh_id,
+            'MIMAROPA' AS region_name,
+            {province_index} AS p,
+            [{provinces}][p + 1] AS province_name,
+            {r(2, 30)} AS city,
+            concat('CITY ', toString(p), '-', toString(city)) AS city_name,
+            {r(3, 60)} AS brgy,
+            concat('BRGY ', toString(p), '-', toString(city), '-', toString(brgy)) AS barangay_name,
+            1740 + p AS psgc_province,
+            (1740 + p) * 100 + city AS psgc_municipality,
+            ((1740 + p) * 100 + city) * 1000 + brgy AS psgc_barangay,
+            concat('District ', toString(city % 2 + 1)) AS district,
+            toUInt8(if({r(4, 100)} < 30, 1, 2)) AS urb_rur,
+            '' AS purok_sitio,
+            toUInt8(1 + {r(5, 6)} + {r(6, 5)}) AS no_of_indiv,
+            toUInt8(1 + ({r(7, 10)} = 0)) AS no_of_families,
+            toUInt8({r(8, 4)}) AS no_sleeping_rooms,
+            toUInt16({r(9, 60)}) AS l_stay,
+            -- Latent wealth drives housing and assets
+            {r(10, 100)} AS wealth,
+            toUInt8(least(6, greatest(1, 6 - intDiv(wealth, 20) + {r(11, 2)}))) AS house_type,
+            toUInt8(1 + {r(12, 6)}) AS roof_mat,
+            toUInt8(1 + {r(13, 6)}) AS out_wall,
+            toUInt8(1 + {r(14, 4)}) AS toilet_facilities,
+            toUInt8(if(wealth + {r(15, 40)} > 35, 1, 2)) AS has_electricity,
+            toUInt8(1 + {r(16, 4)}) AS water_supply,
+            toUInt8(wealth + {r(17, 60)} > 70) AS radio,
+            toUInt8(wealth + {r(18, 60)} > 60) AS television,
+            toUInt8(wealth + {r(19, 60)} > 85) AS ref,
+            toUInt8(wealth + {r(20, 60)} > 80) AS motorcycle,
+            toUInt8(wealth + {r(21, 60)} > 50) AS phone,
+            toUInt8(wealth + {r(22, 60)} > 110) AS pc,
+            toUInt8(wealth + no_of_indiv * 5 + {r(23, 30)} < 55) AS poor,
+            toUInt8(if(poor = 1, {r(24, 100)} < 60, {r(24, 100)} < 12)) AS received_pppp,
+            toUInt8({r(25, 100)} < 45) AS received_philhealth,
+            toUInt8({r(26, 100)} < 8) AS received_scholarship,
+            toUInt8({r(27, 100)} < 5) AS received_livelihood
+        FROM numbers({int(rows)})
+    )
+    """
+
+
+def ensure_roster(client, rows: int, seed: int = 42) -> bool:
+    """Create the schema and (re)generate poverty_data unless it already has `rows` rows
+
+    Returns True when the roster was generated.
+    """
+    create_schema(client)
+    existing = client.query("SELECT count() FROM poverty_data").result_rows[0][0]
+    if existing == rows:
+        return False
+    client.command("TRUNCATE TABLE poverty_data")
+    client.command("TRUNCATE TABLE household_scores")
+    client.command(roster_insert_sql(rows, seed))
+    return True
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Benchmark the API hot paths against a synthetic roster.
+
+Runs the real service functions (no HTTP) with ClickHouse provided either by
+chDB in-process (default, nothing to start) or by a ClickHouse server.
+Each size gets its own database (bench_100k, bench_1m, ...), which is reused
+across runs when the row count matches.
+
+Usage (from the repository root):
+    pip install -r benchmarks/requirements.txt
+    python benchmarks/run.py --rows 100k 1m
+    python benchmarks/run.py --rows 100k --save-baseline local
+    python benchmarks/run.py --rows 100k --compare benchmarks/baselines/local.json
+    python benchmarks/run.py --backend server --rows 10m   # uses CLICKHOUSE_* settings
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import product
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+sys.path.append(os.path.dirname(__file__))
+
+from app import database  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.ml import model_loader  # noqa: E402
+from app.services import data_service, ml_service, targeting_service  # noqa: E402
+from roster import ensure_roster  # noqa: E402
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Instrumentation stays on (it is part of the measured path); its log output does not
+logging.getLogger('app.slow_query').disabled = True
+
+SAMPLE_HOUSEHOLD = {
+    'province_name': 'PALAWAN', 'urb_rur': 2, 'no_of_indiv': 6, 'no_sleeping_rooms': 1,
+    'house_type': 5, 'has_electricity': 1, 'television': 0, 'ref': 0, 'motorcycle': 0
+}
+
+# Distinct households for the batch cases, so duplicates within a batch are not folded
+BATCH_HOUSEHOLDS = [
+    dict(SAMPLE_HOUSEHOLD, urb_rur=urb_rur, no_of_indiv=indiv, no_sleeping_rooms=rooms, house_type=house_type)
+    for urb_rur, indiv, rooms, house_type in product((1, 2), range(1, 21), range(6), range(1, 7))
+]
+
+WHERE_FILTERS = {
+    'province_name': ['PALAWAN', 'ROMBLON'],
+    'city_name': 'CITY 3',
+    'no_of_indiv': {'min': 3, 'max': 8},
+    'poor': 1
+}
+
+
+def parse_size(text: str) -> int:
+    text = text.lower()
+    multiplier = {'k': 1_000, 'm': 1_000_000}.get(text[-1], 1)
+    return int(float(text.rstrip('km')) * multiplier)
+
+
+def size_label(rows: int) -> str:
+    if rows % 1_000_000 == 0:
+        return f"{rows // 1_000_000}m"
+    if rows % 1_000 == 0:
+        return f"{rows // 1_000}k"
+    return str(rows)
+
+
+def build_cases():
+    """name -> (callable, rows handled per call, calls per timed sample)"""
+    return {
+        'build_where_clause': (lambda: data_service.build_where_clause(WHERE_FILTERS), None, 1000),
+        'get_poverty_data_page': (lambda: data_service.get_poverty_data(page=1, limit=100), 100, 1),
+        'get_poverty_data_1000_filtered': (
+            lambda: data_service.get_poverty_data(
+                page=2, limit=1000, filters={'province_name': ['PALAWAN'], 'no_of_indiv': {'min': 5}}
+            ), 1000, 1),
+        'generate_csv_export': (
+            lambda: data_service.generate_csv_export('poverty_data', filters={'province_name': ['ROMBLON']}),
+            None, 1),
+        'targeting_coverage': (targeting_service.get_coverage_by_province, None, 1),
+        'targeting_efficiency': (targeting_service.get_efficiency_by_province, None, 1),
+        'targeting_eligible_not_enrolled': (targeting_service.get_eligible_not_enrolled_by_province, None, 1),
+        'predict_single': (lambda: ml_service.predict_poverty(SAMPLE_HOUSEHOLD), 1, 1),
+        'predict_batch_100': (lambda: ml_service.predict_poverty_batch(BATCH_HOUSEHOLDS[:100]), 100, 1),
+        'predict_batch_1000': (lambda: ml_service.predict_poverty_batch(BATCH_HOUSEHOLDS[:1000]), 1000, 1)
+    }
+
+
+@contextmanager
+def record_stages(modules):
+    """Capture every stage_timer duration (row_conversion, model_inference, ...) in the given modules"""
+    durations = {}
+
+    @contextmanager
+    def timer(stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            durations.setdefault(stage, []).append(time.perf_counter() - started)
+
+    originals = {m: m.stage_timer for m in modules}
+    for m in modules:
+        m.stage_timer = timer
+    try:
+        yield durations
+    finally:
+        for m, original in originals.items():
+            m.stage_timer = original
+
+
+def summarize(samples, per_sample: int = 1, rows: int = None) -> dict:
+    """Latency percentiles (ms per call) and throughput"""
+    per_call = sorted(s / per_sample for s in samples)
+
+    def percentile(q):
+        return per_call[min(len(per_call) - 1, int(round(q * (len(per_call) - 1))))] * 1000
+
+    mean = statistics.fmean(per_call)
+    result = {
+        'iterations': len(per_call),
+        'p50_ms': round(percentile(0.50), 4),
+        'p99_ms': round(percentile(0.99), 4),
+        'mean_ms': round(mean * 1000, 4),
+        'ops_per_sec': round(1 / mean, 1) if mean > 0 else None
+    }
+    if rows:
+        result['rows_per_sec'] = round(rows / mean, 1) if mean > 0 else None
+    return result
+
+
+def time_case(func, per_sample: int, repeat: int, warmup: int, max_seconds: float):
+    for _ in range(warmup):
+        func()
+    samples = []
+    deadline = time.perf_counter() + max_seconds
+    while len(samples) < repeat and (len(samples) < 3 or time.perf_counter() < deadline):
+        started = time.perf_counter()
+        for _ in range(per_sample):
+            func()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def prepare_model(rows: int, model_data: dict = None):
+    """Serve predictions from a benchmark model and score the roster into household_scores
+
+    The model is trained once (SGD, on the first roster) and reused for
+    larger sizes; only scoring depends on the roster size.
+    """
+    from app.ml.features import load_feature_spec
+    from app.ml.scoring import score_roster
+    from app.ml.training import train
+
+    if model_data is None:
+        print("Training benchmark model...")
+        model_data = train(estimator='sgd', epochs=2, version=f"bench_{size_label(rows)}")
+        model_data['feature_pipeline'] = load_feature_spec(model_data)
+    # Serve predictions from this model instead of /app/models
+    model_loader.set_model(model_data)
+    score_roster(model_data, method='sql')
+    return model_data
+
+
+def connect(backend: str, database_name: str, data_dir: str = None):
+    """Point app.database at the benchmark database; returns the raw client"""
+    if backend == 'chdb':
+        from chdb_client import ChdbClient
+        client = getattr(connect, '_chdb', None)
+        if client is None:
+            client = connect._chdb = ChdbClient(path=data_dir)
+        client.use_database(database_name)
+        database.set_client_factory(lambda: client)
+        return client
+
+    import clickhouse_connect
+    admin = clickhouse_connect.get_client(
+        host=settings.clickhouse_host, port=settings.clickhouse_port,
+        username=settings.clickhouse_user, password=settings.clickhouse_password
+    )
+    admin.command(f"CREATE DATABASE IF NOT EXISTS {database_name}")
+    settings.clickhouse_db = database_name
+    database.set_client_factory(None)
+    return database._connect()
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run(sizes, backend: str, cases: list, repeat: int, warmup: int, max_seconds: float, data_dir: str = None):
+    results = {}
+    model_data = None
+    for rows in sizes:
+        label = size_label(rows)
+        print(f"\n=== {label} rows ({backend}) ===")
+        client = connect(backend, f"bench_{label}", data_dir)
+
+        started = time.perf_counter()
+        if ensure_roster(client, rows):
+            print(f"Generated roster in {time.perf_counter() - started:.1f}s")
+        model_data = prepare_model(rows, model_data)
+
+        all_cases = build_cases()
+        results[label] = {}
+        for name in cases:
+            func, case_rows, per_sample = all_cases[name]
+            with record_stages([data_service, ml_service]) as stages:
+                samples = time_case(func, per_sample, repeat, warmup, max_seconds)
+            summary = summarize(samples, per_sample, case_rows)
+            if stages:
+                summary['stages'] = {stage: summarize(d) for stage, d in stages.items()}
+            results[label][name] = summary
+            print(f"  {name:<34} p50 {summary['p50_ms']:>10.3f} ms   p99 {summary['p99_ms']:>10.3f} ms"
+                  f"   {summary['ops_per_sec'] or 0:>10.1f} ops/s")
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Cases whose p50 grew by more than `threshold` x versus the baseline"""
+    regressions = []
+    print(f"\n=== Comparison with baseline ({baseline['meta'].get('git_revision')}) ===")
+    for label, cases in results.items():
+        for name, current in cases.items():
+            previous = baseline['results'].get(label, {}).get(name)
+            if previous is None:
+                continue
+            ratio = current['p50_ms'] / previous['p50_ms'] if previous['p50_ms'] else float('inf')
+            flag = ' REGRESSION' if ratio > threshold else ''
+            print(f"  {label:>5} {name:<34} {previous['p50_ms']:>10.3f} -> {current['p50_ms']:>10.3f} ms"
+                  f"  ({ratio:.2f}x){flag}")
+            if flag:
+                regressions.append((label, name, ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark API hot paths on a synthetic roster")
+    parser.add_argument('--rows', nargs='+', default=['100k'], help="Roster sizes, e.g. 100k 1m 10m")
+    parser.add_argument('--backend', choices=['chdb', 'server'], default='chdb')
+    parser.add_argument('--data-dir', default=os.path.join(BENCH_DIR, '.data'),
+                        help="chDB storage, reused between runs")
+    parser.add_argument('--cases', nargs='+', default=None, help="Subset of cases to run")
+    parser.add_argument('--repeat', type=int, default=30, help="Timed samples per case")
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--max-seconds', type=float, default=20.0, help="Time budget per case")
+    parser.add_argument('--output', default=None, help="Results JSON (default: benchmarks/results/<time>.json)")
+    parser.add_argument('--save-baseline', metavar='NAME', help="Also write benchmarks/baselines/NAME.json")
+    parser.add_argument('--compare', metavar='BASELINE', help="Baseline JSON to diff against")
+    parser.add_argument('--threshold', type=float, default=1.25, help="p50 ratio counted as a regression")
+    parser.add_argument('--query-cache', action='store_true',
+                        help="Keep the data-viewer result cache on (off by default so cases measure queries)")
+    parser.add_argument('--prediction-cache', action='store_true',
+                        help="Keep the prediction memo on (off by default so cases measure scoring)")
+    args = parser.parse_args()
+
+    cases = args.cases or list(build_cases())
+    unknown = set(cases) - set(build_cases())
+    if unknown:
+        parser.error(f"Unknown cases: {sorted(unknown)}")
+
+    if not args.query_cache:
+        settings.query_cache_max_bytes = 0
+    if not args.prediction_cache:
+        settings.prediction_cache_size = 0
+    # Background services of the API process, not part of the measured paths
+    settings.drift_enabled = False
+    settings.prediction_log_enabled = False
+    sizes = [parse_size(s) for s in args.rows]
+    results = run(sizes, args.backend, cases, args.repeat, args.warmup, args.max_seconds, args.data_dir)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'git_revision': git_revision(),
+            'backend': args.backend,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'repeat': args.repeat,
+            'query_cache': args.query_cache,
+            'prediction_cache': args.prediction_cache
+        },
+        'results': results
+    }
+
+    output = args.output or os.path.join(BENCH_DIR, 'results', f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    paths = [output]
+    if args.save_baseline:
+        paths.append(os.path.join(BENCH_DIR, 'baselines', f"{args.save_baseline}.json"))
+    for path in paths:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults saved to {path}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.threshold}x")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Startup-time budget check for the backend.
+
+Imports app.main in fresh interpreters under `python -X importtime` and
+fails (exit 1) when:
+- the median import time is over --budget-ms; or
+- a module that should load lazily (see app/utils/warmup.py) is imported
+  at startup.
+With --serve it also starts uvicorn and times how long it takes until
+/health answers.
+
+Usage (from the repository root):
+    python benchmarks/startup.py
+    python benchmarks/startup.py --budget-ms 1500 --runs 7 --top 20
+    python benchmarks/startup.py --serve
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend')
+
+# Loaded on first use or by the warmup thread, never by importing the app
+LAZY_MODULES = ['numpy', 'pandas', 'scipy', 'sklearn', 'joblib', 'clickhouse_connect']
+
+
+def import_profile():
+    """(cumulative us per top-level import, self us per module) for one `import app.main`"""
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-W', 'ignore', '-c', 'import app.main'],
+        cwd=BACKEND_DIR, capture_output=True, text=True, env={**os.environ, 'WARMUP_ENABLED': 'false'}
+    )
+    if proc.returncode != 0:
+        sys.exit(f"Importing app.main failed:\n{proc.stderr}")
+
+    self_us, total_us = {}, 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_part, cumulative_part, name = line[len('import time:'):].split('|')
+        module = name.strip()
+        self_us[module] = int(self_part)
+        if not name.startswith('  '):
+            # Top-level imports; their cumulative times add up to the whole startup
+            total_us += int(cumulative_part)
+    return total_us, self_us
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def time_to_serve(timeout: float = 30.0) -> float:
+    """Seconds from launching uvicorn until /health returns 200"""
+    port = free_port()
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'app.main:app', '--port', str(port), '--log-level', 'warning'],
+        cwd=BACKEND_DIR
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.02)
+        raise TimeoutError(f"/health did not answer within {timeout}s")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check backend startup time against a budget")
+    parser.add_argument('--budget-ms', type=float, default=1500.0, help="Median import time allowed")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15, help="Slowest modules to list (self time)")
+    parser.add_argument('--serve', action='store_true', help="Also time uvicorn until /health answers")
+    args = parser.parse_args()
+
+    totals, self_us = [], {}
+    for _ in range(args.runs):
+        total_us, self_us = import_profile()
+        totals.append(total_us / 1000)
+    median_ms = statistics.median(totals)
+
+    print(f"import app.main: median {median_ms:.0f} ms over {args.runs} runs "
+          f"(min {min(totals):.0f}, max {max(totals):.0f}), budget {args.budget_ms:.0f} ms")
+    print("\nSlowest modules (self time, last run):")
+    for module, us in sorted(self_us.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {us / 1000:>8.1f} ms  {module}")
+
+    failures = []
+    if median_ms > args.budget_ms:
+        failures.append(f"median import time {median_ms:.0f} ms is over the {args.budget_ms:.0f} ms budget")
+    eager = [m for m in LAZY_MODULES if m in self_us]
+    if eager:
+        failures.append(f"imported at startup but should be lazy: {', '.join(eager)}")
+
+    if args.serve:
+        print(f"\nuvicorn to first /health response: {time_to_serve():.2f} s")
+
+    if failures:
+        print()
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+-- Sharded schema (docker-compose.cluster.yml). Runs on every node at first
+-- start; {shard} and {replica} come from each node's macros.
+--
+-- Each table is split in two:
+-- - <table>_local: the rows of this shard, in a Replicated*MergeTree kept in
+--   sync with the shard's other replicas through ClickHouse Keeper;
+-- - <table>: a Distributed table over the *_local tables of every shard,
+--   under the single-node name, so the API queries it unchanged.
+-- Everything is sharded by province, so a household's roster row, score and
+-- segment live on the same shard (joins and FINAL stay shard-local).
+
+CREATE DATABASE IF NOT EXISTS poverty_db;
+
+USE poverty_db;
+
+CREATE TABLE IF NOT EXISTS poverty_data_local (
+    -- Primary Key
+    hh_id String,
+
+    -- Geographic
+    region_name String,
+    province_name String,
+    city_name String,
+    barangay_name String,
+    psgc_province UInt64,
+    psgc_municipality UInt64,
+    psgc_barangay UInt64,
+    district String,
+    urb_rur UInt8,
+    purok_sitio String,
+
+    -- Demographics
+    no_of_indiv UInt8,
+    no_of_families UInt8,
+    no_sleeping_rooms UInt8,
+    l_stay UInt16,
+
+    -- Housing
+    house_type UInt8,
+    roof_mat UInt8,
+    out_wall UInt8,
+    toilet_facilities UInt8,
+    has_electricity UInt8,
+    water_supply UInt8,
+
+    -- Assets
+    radio UInt8,
+    television UInt8,
+    ref UInt8,
+    motorcycle UInt8,
+    phone UInt8,
+    pc UInt8,
+
+    -- Program Participation
+    received_pppp UInt8,
+    received_philhealth UInt8,
+    received_scholarship UInt8,
+    received_livelihood UInt8,
+
+    -- Target Variables
+    poverty_status String,
+    poverty_status2 UInt8,
+    poor UInt8
+
+) ENGINE = ReplicatedMergeTree('/clickhouse/tables/{shard}/poverty_db/poverty_data_local', '{replica}')
+ORDER BY (province_name, city_name, barangay_name, hh_id)
+PARTITION BY province_name;
+
+CREATE TABLE IF NOT EXISTS poverty_data AS poverty_data_local
+ENGINE = Distributed(poverty_cluster, poverty_db, poverty_data_local, cityHash64(province_name));
+
+-- Predictions table
+CREATE TABLE IF NOT EXISTS poverty_predictions_local (
+    prediction_id UUID DEFAULT generateUUIDv4(),
+    prediction_date DateTime DEFAULT now(),
+
+    -- Input features
+    province_name String,
+    urb_rur UInt8,
+    no_of_indiv UInt8,
+    no_sleeping_rooms UInt8,
+    house_type UInt8,
+    has_electricity UInt8,
+    television UInt8,
+    ref UInt8,
+    motorcycle UInt8,
+
+    -- Prediction output
+    predicted_poverty_status UInt8,
+    prediction_probability Float32,
+
+    -- Metadata
+    model_version String
+
+) ENGINE = ReplicatedMergeTree('/clickhouse/tables/{shard}/poverty_db/poverty_predictions_local', '{replica}')
+ORDER BY (prediction_date, prediction_id)
+PARTITION BY toYYYYMM(prediction_date);
+
+CREATE TABLE IF NOT EXISTS poverty_predictions AS poverty_predictions_local
+ENGINE = Distributed(poverty_cluster, poverty_db, poverty_predictions_local, cityHash64(province_name));
+
+-- Roster-wide model scores (written by app.ml.scoring)
+CREATE TABLE IF NOT EXISTS household_scores_local (
+    hh_id String,
+
+    -- Copied from poverty_data so scores can be sliced without a join
+    province_name String,
+    city_name String,
+    barangay_name String,
+
+    -- Model output
+    decision_score Float32,
+    probability_poor Float32,
+    predicted_poor UInt8,
+
+    -- Metadata
+    model_version String,
+    scored_at DateTime DEFAULT now()
+
+) ENGINE = ReplicatedReplacingMergeTree('/clickhouse/tables/{shard}/poverty_db/household_scores_local', '{replica}', scored_at)
+ORDER BY (province_name, city_name, barangay_name, hh_id)
+PARTITION BY province_name;
+
+CREATE TABLE IF NOT EXISTS household_scores AS household_scores_local
+ENGINE = Distributed(poverty_cluster, poverty_db, household_scores_local, cityHash64(province_name));
+
+-- K-Prototypes segment per household (written by app.ml.clustering)
+CREATE TABLE IF NOT EXISTS household_clusters_local (
+    hh_id String,
+
+    -- Copied from poverty_data so segments can be sliced without a join
+    province_name String,
+    city_name String,
+    barangay_name String,
+
+    -- Model output
+    cluster_id UInt8,
+    cluster_distance Float32,
+    cluster_probability Float32,
+
+    -- Metadata
+    model_version String,
+    assigned_at DateTime DEFAULT now(),
+
+    -- Single-household lookups filter on hh_id, which is last in the sort key
+    INDEX idx_hh_id hh_id TYPE bloom_filter GRANULARITY 4
+
+) ENGINE = ReplicatedReplacingMergeTree('/clickhouse/tables/{shard}/poverty_db/household_clusters_local', '{replica}', assigned_at)
+ORDER BY (province_name, city_name, barangay_name, hh_id)
+PARTITION BY province_name;
+
+CREATE TABLE IF NOT EXISTS household_clusters AS household_clusters_local
+ENGINE = Distributed(poverty_cluster, poverty_db, household_clusters_local, cityHash64(province_name));
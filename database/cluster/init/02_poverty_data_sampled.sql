@@ -0,0 +1,17 @@
+USE poverty_db;
+
+-- Sharded version of database/init/02_poverty_data_sampled.sql: each shard
+-- samples its own rows, and SAMPLE on the Distributed table is applied on
+-- every shard.
+CREATE TABLE IF NOT EXISTS poverty_data_sampled_local AS poverty_data_local
+ENGINE = ReplicatedMergeTree('/clickhouse/tables/{shard}/poverty_db/poverty_data_sampled_local', '{replica}')
+ORDER BY (province_name, cityHash64(hh_id))
+PARTITION BY province_name
+SAMPLE BY cityHash64(hh_id);
+
+-- Fires on the replica that receives each insert; replication copies the result
+CREATE MATERIALIZED VIEW IF NOT EXISTS poverty_data_sampled_mv TO poverty_data_sampled_local
+AS SELECT * FROM poverty_data_local;
+
+CREATE TABLE IF NOT EXISTS poverty_data_sampled AS poverty_data_sampled_local
+ENGINE = Distributed(poverty_cluster, poverty_db, poverty_data_sampled_local, cityHash64(province_name));
@@ -0,0 +1,49 @@
+USE poverty_db;
+
+-- Sharded version of database/init/03_prediction_rollups.sql: each shard
+-- rolls up its own predictions; the Distributed table merges the states of
+-- every shard at read time.
+CREATE TABLE IF NOT EXISTS prediction_rollups_local (
+    grain Enum8('hour' = 1, 'day' = 2),
+    bucket DateTime,
+    province_name LowCardinality(String),
+    model_version LowCardinality(String),
+
+    predictions SimpleAggregateFunction(sum, UInt64),
+    predicted_poor SimpleAggregateFunction(sum, UInt64),
+    probability_sum SimpleAggregateFunction(sum, Float64),
+    -- Levels must match PROBABILITY_QUANTILES in app/services/prediction_stats_service.py
+    probability_quantiles AggregateFunction(quantilesTDigest(0.1, 0.25, 0.5, 0.75, 0.9), Float32)
+
+) ENGINE = ReplicatedAggregatingMergeTree('/clickhouse/tables/{shard}/poverty_db/prediction_rollups_local', '{replica}')
+ORDER BY (grain, bucket, province_name, model_version)
+PARTITION BY toYYYYMM(bucket);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS prediction_rollups_hourly_mv TO prediction_rollups_local
+AS SELECT
+    'hour' AS grain,
+    toStartOfHour(prediction_date) AS bucket,
+    province_name,
+    model_version,
+    count() AS predictions,
+    countIf(predicted_poverty_status = 1) AS predicted_poor,
+    sum(toFloat64(prediction_probability)) AS probability_sum,
+    quantilesTDigestState(0.1, 0.25, 0.5, 0.75, 0.9)(prediction_probability) AS probability_quantiles
+FROM poverty_predictions_local
+GROUP BY grain, bucket, province_name, model_version;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS prediction_rollups_daily_mv TO prediction_rollups_local
+AS SELECT
+    'day' AS grain,
+    toStartOfDay(prediction_date) AS bucket,
+    province_name,
+    model_version,
+    count() AS predictions,
+    countIf(predicted_poverty_status = 1) AS predicted_poor,
+    sum(toFloat64(prediction_probability)) AS probability_sum,
+    quantilesTDigestState(0.1, 0.25, 0.5, 0.75, 0.9)(prediction_probability) AS probability_quantiles
+FROM poverty_predictions_local
+GROUP BY grain, bucket, province_name, model_version;
+
+CREATE TABLE IF NOT EXISTS prediction_rollups AS prediction_rollups_local
+ENGINE = Distributed(poverty_cluster, poverty_db, prediction_rollups_local, cityHash64(province_name));
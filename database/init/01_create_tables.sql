@@ -81,3 +81,50 @@ CREATE TABLE IF NOT EXISTS poverty_predictions (
 ) ENGINE = MergeTree()
 ORDER BY (prediction_date, prediction_id)
 PARTITION BY toYYYYMM(prediction_date);
+
+-- Roster-wide model scores (written by app.ml.scoring)
+CREATE TABLE IF NOT EXISTS household_scores (
+    hh_id String,
+
+    -- Copied from poverty_data so scores can be sliced without a join
+    province_name String,
+    city_name String,
+    barangay_name String,
+
+    -- Model output
+    decision_score Float32,
+    probability_poor Float32,
+    predicted_poor UInt8,
+
+    -- Metadata
+    model_version String,
+    scored_at DateTime DEFAULT now()
+
+) ENGINE = ReplacingMergeTree(scored_at)
+ORDER BY (province_name, city_name, barangay_name, hh_id)
+PARTITION BY province_name;
+
+-- K-Prototypes segment per household (written by app.ml.clustering)
+CREATE TABLE IF NOT EXISTS household_clusters (
+    hh_id String,
+
+    -- Copied from poverty_data so segments can be sliced without a join
+    province_name String,
+    city_name String,
+    barangay_name String,
+
+    -- Model output
+    cluster_id UInt8,
+    cluster_distance Float32,
+    cluster_probability Float32,
+
+    -- Metadata
+    model_version String,
+    assigned_at DateTime DEFAULT now(),
+
+    -- Single-household lookups filter on hh_id, which is last in the sort key
+    INDEX idx_hh_id hh_id TYPE bloom_filter GRANULARITY 4
+
+) ENGINE = ReplacingMergeTree(assigned_at)
+ORDER BY (province_name, city_name, barangay_name, hh_id)
+PARTITION BY province_name;
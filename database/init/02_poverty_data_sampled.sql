@@ -0,0 +1,19 @@
+USE poverty_db;
+
+-- Sampling-enabled copy of poverty_data for approximate analytics
+-- (accuracy=approx on the targeting endpoints). The sampling key leads the
+-- sort key after the province, so SAMPLE 0.05 reads ~5% of the granules of
+-- each province instead of scanning the table.
+CREATE TABLE IF NOT EXISTS poverty_data_sampled AS poverty_data
+ENGINE = MergeTree()
+ORDER BY (province_name, cityHash64(hh_id))
+PARTITION BY province_name
+SAMPLE BY cityHash64(hh_id);
+
+-- Every insert into poverty_data is copied. Mutations and TRUNCATE are not:
+-- after those, rebuild with
+--   TRUNCATE TABLE poverty_data_sampled;
+--   INSERT INTO poverty_data_sampled SELECT * FROM poverty_data;
+-- (the same INSERT backfills a database created before this file existed)
+CREATE MATERIALIZED VIEW IF NOT EXISTS poverty_data_sampled_mv TO poverty_data_sampled
+AS SELECT * FROM poverty_data;
@@ -0,0 +1,55 @@
+USE poverty_db;
+
+-- Hourly and daily rollups of poverty_predictions per province and model
+-- version, read by /api/v1/predict/stats instead of the raw predictions.
+-- Rows of the same bucket are merged in the background; readers still
+-- GROUP BY (sum / quantilesTDigestMerge) since merges are eventual.
+CREATE TABLE IF NOT EXISTS prediction_rollups (
+    grain Enum8('hour' = 1, 'day' = 2),
+    bucket DateTime,
+    province_name LowCardinality(String),
+    model_version LowCardinality(String),
+
+    predictions SimpleAggregateFunction(sum, UInt64),
+    predicted_poor SimpleAggregateFunction(sum, UInt64),
+    probability_sum SimpleAggregateFunction(sum, Float64),
+    -- Levels must match PROBABILITY_QUANTILES in app/services/prediction_stats_service.py
+    probability_quantiles AggregateFunction(quantilesTDigest(0.1, 0.25, 0.5, 0.75, 0.9), Float32)
+
+) ENGINE = AggregatingMergeTree()
+ORDER BY (grain, bucket, province_name, model_version)
+PARTITION BY toYYYYMM(bucket);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS prediction_rollups_hourly_mv TO prediction_rollups
+AS SELECT
+    'hour' AS grain,
+    toStartOfHour(prediction_date) AS bucket,
+    province_name,
+    model_version,
+    count() AS predictions,
+    countIf(predicted_poverty_status = 1) AS predicted_poor,
+    sum(toFloat64(prediction_probability)) AS probability_sum,
+    quantilesTDigestState(0.1, 0.25, 0.5, 0.75, 0.9)(prediction_probability) AS probability_quantiles
+FROM poverty_predictions
+GROUP BY grain, bucket, province_name, model_version;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS prediction_rollups_daily_mv TO prediction_rollups
+AS SELECT
+    'day' AS grain,
+    toStartOfDay(prediction_date) AS bucket,
+    province_name,
+    model_version,
+    count() AS predictions,
+    countIf(predicted_poverty_status = 1) AS predicted_poor,
+    sum(toFloat64(prediction_probability)) AS probability_sum,
+    quantilesTDigestState(0.1, 0.25, 0.5, 0.75, 0.9)(prediction_probability) AS probability_quantiles
+FROM poverty_predictions
+GROUP BY grain, bucket, province_name, model_version;
+
+-- Predictions inserted before these views existed are not rolled up. Backfill
+-- them once with the views' SELECTs:
+--   INSERT INTO prediction_rollups SELECT 'hour', toStartOfHour(prediction_date), province_name, model_version,
+--       count(), countIf(predicted_poverty_status = 1), sum(toFloat64(prediction_probability)),
+--       quantilesTDigestState(0.1, 0.25, 0.5, 0.75, 0.9)(prediction_probability)
+--   FROM poverty_predictions GROUP BY 1, 2, 3, 4;
+-- and the same with 'day' / toStartOfDay.
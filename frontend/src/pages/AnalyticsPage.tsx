@@ -1,25 +1,36 @@
-import React from 'react';
-import { useQuery } from '@tanstack/react-query';
-import { targetingApi } from '../services/api';
+import React, { useEffect, useState } from 'react';
+import { streamProgressive } from '../services/api';
 import { Card, CardContent, Typography, Grid, CircularProgress, Alert, Box, Paper } from '@mui/material';
 import { BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer } from 'recharts';
 
-export default function AnalyticsPage() {
-  const { data: coverage, isLoading: loadingCoverage, error: errorCoverage } = useQuery({
-    queryKey: ['coverage'],
-    queryFn: async () => {
-      const response = await targetingApi.getCoverage();
-      return response.data;
-    },
+// Sampled estimate right away, replaced by the exact figures when the full scan finishes
+function useProgressive(path: string) {
+  const [state, setState] = useState<{ data?: any[]; exact: boolean; error: boolean }>({
+    exact: false,
+    error: false,
   });
 
-  const { data: efficiency, isLoading: loadingEfficiency, error: errorEfficiency } = useQuery({
-    queryKey: ['efficiency'],
-    queryFn: async () => {
-      const response = await targetingApi.getEfficiency();
-      return response.data;
-    },
-  });
+  useEffect(() => {
+    let received = false;
+    return streamProgressive(
+      path,
+      (data, exact) => {
+        received = true;
+        setState({ data, exact, error: false });
+      },
+      // Keep showing the estimate if only the refinement failed
+      () => setState((previous) => (received ? { ...previous, exact: true } : { ...previous, error: true })),
+    );
+  }, [path]);
+
+  return { data: state.data, exact: state.exact, isLoading: !state.data && !state.error, error: state.error };
+}
+
+export default function AnalyticsPage() {
+  const { data: coverage, exact: exactCoverage, isLoading: loadingCoverage, error: errorCoverage } =
+    useProgressive('/targeting/coverage');
+  const { data: efficiency, exact: exactEfficiency, isLoading: loadingEfficiency, error: errorEfficiency } =
+    useProgressive('/targeting/efficiency');
 
   if (loadingCoverage || loadingEfficiency) {
     return (
@@ -69,6 +80,11 @@ export default function AnalyticsPage() {
         >
           Analyze program effectiveness across MIMAROPA provinces
         </Typography>
+        {(!exactCoverage || !exactEfficiency) && (
+          <Typography variant="caption" color="text.secondary">
+            Estimated from a sample of households; exact figures are loading...
+          </Typography>
+        )}
       </Box>
 
       <Grid container spacing={3} sx={{ mb: 4 }}>
@@ -123,6 +123,19 @@ export default function DataViewerPage() {
     enabled: povertySelectedCols.length > 0,
   });
 
+  // Province values with counts under the other active filters
+  const { data: povertyFacets } = useQuery({
+    queryKey: ['poverty-data-facets', povertyFilters],
+    queryFn: async () => {
+      const response = await dataViewerApi.getPovertyDataFacets({
+        columns: ['province_name'],
+        filters: Object.keys(povertyFilters).length > 0 ? povertyFilters : undefined,
+      });
+      return response.data;
+    },
+  });
+  const provinceFacet = povertyFacets?.find((f: any) => f.column === 'province_name');
+
   // Fetch predictions data
   const {
     data: predictionsData,
@@ -281,14 +294,22 @@ export default function DataViewerPage() {
                 </Select>
               </FormControl>
 
-              {/* Province Filter */}
-              <TextField
-                label="Filter by Province"
-                value={povertyFilters.province_name || ''}
-                onChange={(e) => handlePovertyFilterChange('province_name', e.target.value)}
-                placeholder="e.g., PALAWAN"
-                sx={{ minWidth: 200 }}
-              />
+              {/* Province Filter: exact values, which hit the table's sort key */}
+              <FormControl sx={{ minWidth: 200 }}>
+                <InputLabel>Filter by Province</InputLabel>
+                <Select
+                  value={povertyFilters.province_name?.[0] || ''}
+                  onChange={(e) => handlePovertyFilterChange('province_name', e.target.value ? [e.target.value] : '')}
+                  label="Filter by Province"
+                >
+                  <MenuItem value="">All</MenuItem>
+                  {provinceFacet?.values.map((v: any) => (
+                    <MenuItem key={v.value} value={v.value}>
+                      {v.value} ({v.count.toLocaleString()})
+                    </MenuItem>
+                  ))}
+                </Select>
+              </FormControl>
 
               {/* Poverty Status Filter */}
               <FormControl sx={{ minWidth: 150 }}>
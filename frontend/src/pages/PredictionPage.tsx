@@ -35,7 +35,7 @@ export default function PredictionPage() {
   const [prediction, setPrediction] = useState<any>(null);
 
   const predictMutation = useMutation({
-    mutationFn: (data: any) => predictionApi.predictPoverty(data),
+    mutationFn: (data: any) => predictionApi.predictPoverty(data, true),
     onSuccess: (response) => {
       setPrediction(response.data);
     },
@@ -437,6 +437,31 @@ export default function PredictionPage() {
                 </Typography>
               </Box>
 
+              {prediction.explanation && (
+                <Box sx={{ mt: 3 }}>
+                  <Typography variant="body2" color="text.secondary" fontWeight={600} sx={{ mb: 1 }}>
+                    Main factors
+                  </Typography>
+                  {prediction.explanation.top_drivers.map((driver: any) => (
+                    <Box
+                      key={driver.feature}
+                      sx={{ display: 'flex', justifyContent: 'space-between', alignItems: 'center', py: 0.5 }}
+                    >
+                      <Typography variant="body2">
+                        {driver.feature} = {String(driver.value)}
+                      </Typography>
+                      <Typography
+                        variant="body2"
+                        fontWeight={600}
+                        color={driver.contribution > 0 ? 'error.main' : 'success.main'}
+                      >
+                        {driver.contribution > 0 ? 'toward Poor' : 'toward Non-Poor'} ({driver.contribution.toFixed(2)})
+                      </Typography>
+                    </Box>
+                  ))}
+                </Box>
+              )}
+
               <Box sx={{ mt: 3, textAlign: 'center' }}>
                 <Typography variant="caption" color="text.secondary">
                   Model: {prediction.model_version} • ID: {prediction.prediction_id}
@@ -15,10 +15,49 @@ export const targetingApi = {
   getEfficiency: () => api.get('/targeting/efficiency'),
 };
 
+// Progressive answers (accuracy=progressive): onData gets the estimate from a sample
+// first, then the exact figures. Returns a function that closes the stream.
+export const streamProgressive = (
+  path: string,
+  onData: (rows: any[], exact: boolean) => void,
+  onError: () => void,
+) => {
+  const source = new EventSource(`${API_BASE_URL}${path}?accuracy=progressive`);
+  source.addEventListener('approx', (e) => onData(JSON.parse((e as MessageEvent).data), false));
+  source.addEventListener('exact', (e) => {
+    onData(JSON.parse((e as MessageEvent).data), true);
+    source.close();
+  });
+  source.addEventListener('error', () => {
+    source.close();
+    onError();
+  });
+  return () => source.close();
+};
+
 // Prediction API
 export const predictionApi = {
   getQuestionnaire: () => api.get('/predict/questionnaire'),
-  predictPoverty: (data: any) => api.post('/predict/poverty', data),
+  predictPoverty: (data: any, explain = false) =>
+    api.post('/predict/poverty', data, explain ? { params: { explain: true } } : undefined),
+  getStats: (params: {
+    grain?: 'hour' | 'day';
+    start?: string;
+    end?: string;
+    by?: string;
+    province?: string;
+    model_version?: string;
+  } = {}) => api.get('/predict/stats', { params }),
+};
+
+// Geography API
+export const geoApi = {
+  search: (q: string, params: { limit?: number; level?: 'region' | 'province' | 'city' | 'barangay' } = {}) => {
+    const queryParams = new URLSearchParams({ q });
+    if (params.limit) queryParams.append('limit', params.limit.toString());
+    if (params.level) queryParams.append('level', params.level);
+    return api.get(`/geo/search?${queryParams.toString()}`);
+  },
 };
 
 // Data Viewer API
@@ -54,6 +93,34 @@ export const dataViewerApi = {
   getPovertyDataColumns: () => api.get('/data-viewer/poverty-data/columns'),
   getPredictionsColumns: () => api.get('/data-viewer/predictions/columns'),
 
+  getPovertyDataFacets: (params: {
+    columns: string[];
+    filters?: Record<string, any>;
+    limit?: number;
+  }) => {
+    const queryParams = new URLSearchParams();
+    queryParams.append('columns', params.columns.join(','));
+    if (params.filters) queryParams.append('filters', JSON.stringify(params.filters));
+    if (params.limit) queryParams.append('limit', params.limit.toString());
+    return api.get(`/data-viewer/poverty-data/facets?${queryParams.toString()}`);
+  },
+
+  getTableProfile: (table: 'poverty-data' | 'predictions', params: {
+    columns?: string[];
+    filters?: Record<string, any>;
+    bins?: number;
+    topK?: number;
+    correlation?: boolean;
+  } = {}) => {
+    const queryParams = new URLSearchParams();
+    if (params.columns?.length) queryParams.append('columns', params.columns.join(','));
+    if (params.filters) queryParams.append('filters', JSON.stringify(params.filters));
+    if (params.bins) queryParams.append('bins', params.bins.toString());
+    if (params.topK) queryParams.append('top_k', params.topK.toString());
+    if (params.correlation === false) queryParams.append('correlation', 'false');
+    return api.get(`/data-viewer/${table}/profile?${queryParams.toString()}`);
+  },
+
   exportPovertyDataCsv: (params: {
     columns?: string[];
     filters?: Record<string, any>;
@@ -1,17 +1,25 @@
+import os
+import sys
 import pickle
 from sklearn.svm import SVC
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 import numpy as np
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+from app.ml.features import attach_feature_spec, build_feature_spec
+
 print("Creating improved mock model...")
 
 # Create mock encoder for provinces
 province_encoder = LabelEncoder()
 province_encoder.classes_ = np.array(['MARINDUQUE', 'OCCIDENTAL MINDORO', 'ORIENTAL MINDORO', 'PALAWAN', 'ROMBLON'])
 
+# Shared feature spec: fixes the column order the mock data is generated in
+spec = build_feature_spec(province_encoder.classes_)
+
 # Create mock scaler with realistic parameters
 scaler = StandardScaler()
-# These should match the feature order after encoding
+# One entry per feature, in spec.columns order
 scaler.mean_ = np.array([2.0, 1.6, 5.2, 1.5, 3.8, 0.6, 0.4, 0.25, 0.15])
 scaler.scale_ = np.array([1.2, 0.5, 2.2, 0.9, 1.6, 0.49, 0.58, 0.48, 0.38])
 scaler.n_features_in_ = 9
@@ -21,7 +29,8 @@ scaler.n_samples_seen_ = 1000
 np.random.seed(42)
 
 # Generate realistic-looking training data
-# Features: province_encoded, urb_rur, no_of_indiv, no_sleeping_rooms, house_type, has_electricity, television, ref, motorcycle
+# Columns follow spec.columns: province_name (encoded), urb_rur, no_of_indiv,
+# no_sleeping_rooms, house_type, has_electricity, television, ref, motorcycle
 n_samples = 1000
 
 # Poor households: more people, fewer rooms, worse house, fewer assets
@@ -66,29 +75,17 @@ print("Training mock SVM...")
 svm = SVC(kernel='linear', C=1.0, probability=True, random_state=42)
 svm.fit(X_train_scaled, y_train)
 
-# Selected features
-selected_features = [
-    'province_name',
-    'urb_rur',
-    'no_of_indiv',
-    'no_sleeping_rooms',
-    'house_type',
-    'has_electricity',
-    'television',
-    'ref',
-    'motorcycle'
-]
-
 # Save mock model
 model_data = {
     'model': svm,
     'scaler': scaler,
     'province_encoder': province_encoder,
-    'features': selected_features,
     'accuracy': 0.85,  # Mock accuracy
     'version': 'svm_mock_v2.0'
 }
 
+attach_feature_spec(model_data, spec)
+
 with open('../backend/models/svm_poverty_predictor.pkl', 'wb') as f:
     pickle.dump(model_data, f)
 
@@ -97,7 +94,11 @@ print("Model saved to backend/models/svm_poverty_predictor.pkl")
 print("")
 print("Test prediction:")
 # Test with a sample poor household
-test_input = np.array([[2, 2, 7, 1, 5, 0, 0, 0, 0]])  # Should predict poor
+test_household = {
+    'province_name': 'ORIENTAL MINDORO', 'urb_rur': 2, 'no_of_indiv': 7, 'no_sleeping_rooms': 1,
+    'house_type': 5, 'has_electricity': 0, 'television': 0, 'ref': 0, 'motorcycle': 0
+}  # Should predict poor
+test_input = spec.transform(test_household)
 test_scaled = scaler.transform(test_input)
 pred = svm.predict(test_scaled)[0]
 prob = svm.predict_proba(test_scaled)[0]
@@ -5,17 +5,22 @@ This script generates daily aggregated metrics from the household survey data.
 """
 
 import pandas as pd
-import numpy as np
 import matplotlib.pyplot as plt
-import seaborn as sns
-from datetime import datetime, timedelta
 import warnings
+from metrics_engine import (
+    DAILY_METRICS, assign_pseudo_dates, compute_metrics, compute_metrics_clickhouse, metric_columns
+)
+from roster_loader import load_roster
 warnings.filterwarnings('ignore')
 
 class DailyMetricsAnalyzer:
-    def __init__(self, csv_path):
+    # Columns read from the CSV besides the metric inputs
+    EXTRA_COLUMNS = ['hh_id', 'poverty_status', 'province_name', 'city_name', 'barangay_name', 'n_hh']
+
+    def __init__(self, csv_path, engine='c'):
         """Initialize the analyzer with the CSV file path."""
         self.csv_path = csv_path
+        self.engine = engine
         self.df = None
         self.daily_metrics = None
         
@@ -23,19 +28,16 @@ class DailyMetricsAnalyzer:
         """Load and preprocess the CSV data."""
         print("Loading data...")
         try:
-            # Load the CSV file
-            self.df = pd.read_csv(self.csv_path)
+            # Load only the columns the metrics use, with compact dtypes
+            # (numeric columns are coerced by the loader; cached as Parquet)
+            columns = metric_columns(DAILY_METRICS) + self.EXTRA_COLUMNS
+            self.df = load_roster(self.csv_path, columns=columns, engine=self.engine)
             print(f"Data loaded successfully! Shape: {self.df.shape}")
+            print(f"Memory usage: {self.df.memory_usage(deep=True).sum() / 1e6:.1f} MB")
             
             # Basic data cleaning
             self.df = self.df.dropna(subset=['poverty_status'])
             
-            # Convert numeric columns
-            numeric_columns = ['n_hh', 'l_stay', 'no_sleeping_rooms', 'no_of_indiv', 'no_of_families']
-            for col in numeric_columns:
-                if col in self.df.columns:
-                    self.df[col] = pd.to_numeric(self.df[col], errors='coerce')
-            
             print("Data preprocessing completed!")
             return True
             
@@ -43,53 +45,29 @@ class DailyMetricsAnalyzer:
             print(f"Error loading data: {e}")
             return False
     
-    def generate_daily_metrics(self, days_back=30):
-        """Generate daily aggregated metrics for the specified number of days."""
+    def generate_daily_metrics(self, days_back=30, group_by=('date',)):
+        """Generate daily aggregated metrics for the specified number of days.
+
+        Extra group keys (e.g. ('date', 'province_name')) split each day further.
+        """
         print(f"Generating daily metrics for the last {days_back} days...")
         
-        # Create date range (assuming data is from recent period)
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=days_back)
-        date_range = pd.date_range(start=start_date, end=end_date, freq='D')
-        
-        daily_data = []
-        
-        for date in date_range:
-            # For demonstration, we'll use random sampling to simulate daily data
-            # In real scenarios, you'd have actual date fields
-            sample_size = min(1000, len(self.df))
-            daily_sample = self.df.sample(n=sample_size, random_state=int(date.timestamp()))
-            
-            daily_metrics = {
-                'date': date,
-                'total_households': len(daily_sample),
-                'avg_household_size': daily_sample['no_of_indiv'].mean(),
-                'avg_family_count': daily_sample['no_of_families'].mean(),
-                'poverty_rate': (daily_sample['poverty_status'].str.contains('Poor').sum() / len(daily_sample)) * 100,
-                'avg_length_of_stay': daily_sample['l_stay'].mean(),
-                'avg_sleeping_rooms': daily_sample['no_sleeping_rooms'].mean(),
-                'electricity_access_rate': (daily_sample['has_electricity'] == 1).sum() / len(daily_sample) * 100,
-                'water_access_rate': (daily_sample['water_supply'].isin([1, 2, 3])).sum() / len(daily_sample) * 100,
-                'displacement_rate': (daily_sample['experienced_displacement'] == 1).sum() / len(daily_sample) * 100,
-                'indigenous_rate': (daily_sample['is_indigenous'] == 1).sum() / len(daily_sample) * 100,
-                'program_participation_rate': (daily_sample['received_programs'] == 1).sum() / len(daily_sample) * 100,
-                'scholarship_rate': (daily_sample['received_scholarship'] == 1).sum() / len(daily_sample) * 100,
-                'daycare_rate': (daily_sample['received_day_care'] == 1).sum() / len(daily_sample) * 100,
-                'feeding_rate': (daily_sample['received_feeding'] == 1).sum() / len(daily_sample) * 100,
-                'rice_subsidy_rate': (daily_sample['received_rice'] == 1).sum() / len(daily_sample) * 100,
-                'philhealth_rate': (daily_sample['received_philhealth'] == 1).sum() / len(daily_sample) * 100,
-                'livelihood_rate': (daily_sample['received_livelihood'] == 1).sum() / len(daily_sample) * 100,
-                'housing_rate': (daily_sample['received_housing'] == 1).sum() / len(daily_sample) * 100,
-                'microcredit_rate': (daily_sample['received_microedit'] == 1).sum() / len(daily_sample) * 100,
-                'self_employment_rate': (daily_sample['received_self_employment'] == 1).sum() / len(daily_sample) * 100,
-                'cash_transfer_rate': (daily_sample['received_cash_transfer'] == 1).sum() / len(daily_sample) * 100,
-                'urban_rate': (daily_sample['urb_rur'] == 1).sum() / len(daily_sample) * 100,
-                'rural_rate': (daily_sample['urb_rur'] == 2).sum() / len(daily_sample) * 100
-            }
-            
-            daily_data.append(daily_metrics)
+        # The roster has no survey date, so households are spread over the
+        # window deterministically; all metrics for all days come from a
+        # single vectorized groupby pass (see metrics_engine.py)
+        dated = assign_pseudo_dates(self.df, days_back=days_back)
+        self.daily_metrics = compute_metrics(dated, DAILY_METRICS, group_by=group_by)
         
-        self.daily_metrics = pd.DataFrame(daily_data)
+        print("Daily metrics generated successfully!")
+        return self.daily_metrics
+    
+    def generate_metrics_from_clickhouse(self, client, days_back=30, group_by=('date',), table='dswd_roster'):
+        """Same metrics computed inside ClickHouse with one GROUP BY query."""
+        print(f"Querying daily metrics from ClickHouse table '{table}'...")
+        self.daily_metrics = compute_metrics_clickhouse(
+            client, DAILY_METRICS, group_by=group_by, table=table, days_back=days_back
+        )
+        self.daily_metrics['date'] = pd.to_datetime(self.daily_metrics['date'])
         print("Daily metrics generated successfully!")
         return self.daily_metrics
     
@@ -0,0 +1,596 @@
+#!/usr/bin/env python3
+"""
+Synthetic household roster generator for load and scale testing.
+
+Emits poverty_data-shaped rows (the ingested MVP subset) or dswd_roster-shaped
+rows (all 69 L2_dec_roster.csv columns) at any size, with no real PII.
+
+The data follows a *profile* that holds only aggregate statistics:
+- Households, poor rate and urban share per barangay. Barangays sit in the
+  real PSGC hierarchy (region 17 / province / municipality).
+- For every survey code column, its distribution among poor and among
+  non-poor households.
+- One latent-factor loading per column. The loadings reproduce the
+  within-class correlations, e.g. assets move together, and house type
+  moves against assets.
+
+A built-in MIMAROPA profile approximates the published roster (province
+totals, districts and municipality names are real; column distributions are
+rounded estimates). For faithful marginals, fit a profile from the real
+roster once. The profile JSON contains only aggregates and can be shared
+where the CSV cannot.
+
+Generation is vectorized with numpy and pyarrow in independent chunks:
+- Chunk i draws from SeedSequence([seed, i]). For a given seed and chunk
+  size the output is identical for any number of workers.
+- Each worker process writes its chunks as Parquet or CSV part files, or
+  inserts them into ClickHouse directly.
+
+Usage:
+    python scripts/generate_synthetic_roster.py --rows 10m --format parquet --output-dir data/synthetic
+    python scripts/generate_synthetic_roster.py --rows 10m --clickhouse --workers 8
+    python scripts/generate_synthetic_roster.py --schema dswd_roster --rows 1m --format csv
+    python scripts/generate_synthetic_roster.py --fit data/L2_dec_roster.csv --profile-out data/roster_profile.json
+    python scripts/generate_synthetic_roster.py --profile data/roster_profile.json --rows 5m --clickhouse
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from statistics import NormalDist
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+PROFILE_VERSION = 1
+REGION_NAME = 'REGION IV-B [MIMAROPA]'
+
+# L2_dec_roster.csv column order (= the dswd_roster table)
+ROSTER_COLUMNS = [
+    'region_name', 'psgc_province', 'psgc_municipality', 'province_name', 'city_name', 'barangay_name',
+    'psgc_barangay', 'district', 'urb_rur', 'purok_sitio', 'street_address', 'n_hh', 'telephone', 'l_stay',
+    'no_sleeping_rooms', 'house_type', 'roof_mat', 'out_wall', 'tenure_status', 'has_other_property',
+    'location_of_property', 'toilet_facilities', 'has_electricity', 'water_supply', 'radio', 'television',
+    'video', 'stereo', 'ref', 'wash_mach', 'aircon', 'sala_set', 'dining', 'car_jeep', 'phone', 'pc',
+    'microwave', 'motorcycle', 'experienced_displacement', 'displacement_manmade', 'displacement_armed',
+    'displacement_dev_project', 'displacement_other', 'received_programs', 'received_scholarship',
+    'received_day_care', 'received_feeding', 'received_rice', 'received_philhealth', 'received_livelihood',
+    'received_housing', 'received_microedit', 'received_self_employment', 'received_pppp',
+    'received_cash_transfer', 'received_other', 'is_indigenous', 'indigenous_group', 'respondent',
+    'type_of_household_id', 'server', 'hh_id', 'poverty_status2', 'no_of_indiv', 'no_of_families',
+    'indigenous', 'archive', 'poor', 'poverty_status'
+]
+
+# Geographic / identifier / free-text columns; every other roster column is a survey code
+NON_CODE_COLUMNS = {
+    'region_name', 'psgc_province', 'psgc_municipality', 'province_name', 'city_name', 'barangay_name',
+    'psgc_barangay', 'district', 'urb_rur', 'purok_sitio', 'street_address', 'telephone',
+    'location_of_property', 'hh_id', 'indigenous', 'poor', 'poverty_status'
+}
+CODE_COLUMNS = [c for c in ROSTER_COLUMNS if c not in NON_CODE_COLUMNS]
+
+# poverty_data: column -> arrow type, in table order (see database/init/01_create_tables.sql)
+POVERTY_DATA_TYPES = {
+    'hh_id': pa.string(), 'region_name': pa.string(), 'province_name': pa.string(),
+    'city_name': pa.string(), 'barangay_name': pa.string(), 'psgc_province': pa.uint64(),
+    'psgc_municipality': pa.uint64(), 'psgc_barangay': pa.uint64(), 'district': pa.string(),
+    'urb_rur': pa.uint8(), 'purok_sitio': pa.string(), 'no_of_indiv': pa.uint8(),
+    'no_of_families': pa.uint8(), 'no_sleeping_rooms': pa.uint8(), 'l_stay': pa.uint16(),
+    'house_type': pa.uint8(), 'roof_mat': pa.uint8(), 'out_wall': pa.uint8(),
+    'toilet_facilities': pa.uint8(), 'has_electricity': pa.uint8(), 'water_supply': pa.uint8(),
+    'radio': pa.uint8(), 'television': pa.uint8(), 'ref': pa.uint8(), 'motorcycle': pa.uint8(),
+    'phone': pa.uint8(), 'pc': pa.uint8(), 'received_pppp': pa.uint8(),
+    'received_philhealth': pa.uint8(), 'received_scholarship': pa.uint8(),
+    'received_livelihood': pa.uint8(), 'poverty_status': pa.string(), 'poverty_status2': pa.uint8(),
+    'poor': pa.uint8()
+}
+# Yes(1)/No(2) fields stored as 1/0 in poverty_data (same mapping as ingest_data.py)
+POVERTY_DATA_BINARY = ['has_electricity', 'received_pppp', 'received_philhealth',
+                       'received_scholarship', 'received_livelihood']
+
+POVERTY_STATUS = {0: '0 - Non Poor', 1: '1 - Poor'}
+PUROK_SITIO = ['CENTRO', 'PROPER', 'PUROK 1', 'PUROK 2', 'PUROK 3', 'PUROK 4', 'PUROK 5', 'MALIGAYA', '']
+PUROK_SITIO_WEIGHTS = [0.14, 0.12, 0.14, 0.13, 0.12, 0.1, 0.08, 0.07, 0.1]
+
+# Built-in geography: province -> (PSGC, households in the roster, [(municipality, district, relative size)])
+MIMAROPA = {
+    'MARINDUQUE': (174000000, 51010, [
+        ('BOAC (Capital)', 'Lone', 14), ('BUENAVISTA', 'Lone', 5), ('GASAN', 'Lone', 9),
+        ('MOGPOG', 'Lone', 9), ('SANTA CRUZ', 'Lone', 16), ('TORRIJOS', 'Lone', 9)]),
+    'OCCIDENTAL MINDORO': (175100000, 91707, [
+        ('ABRA DE ILOG', 'Lone', 7), ('CALINTAAN', 'Lone', 7), ('LOOC', 'Lone', 2), ('LUBANG', 'Lone', 4),
+        ('MAGSAYSAY', 'Lone', 8), ('MAMBURAO (Capital)', 'Lone', 9), ('PALUAN', 'Lone', 4),
+        ('RIZAL', 'Lone', 9), ('SABLAYAN', 'Lone', 17), ('SAN JOSE', 'Lone', 25), ('SANTA CRUZ', 'Lone', 8)]),
+    'ORIENTAL MINDORO': (175200000, 173288, [
+        ('BACO', '1st', 8), ('BANSUD', '2nd', 8), ('BONGABONG', '2nd', 17), ('BULALACAO', '2nd', 9),
+        ('CITY OF CALAPAN (Capital)', '1st', 23), ('GLORIA', '2nd', 10), ('MANSALAY', '2nd', 9),
+        ('NAUJAN', '1st', 23), ('PINAMALAYAN', '2nd', 18), ('POLA', '1st', 7), ('PUERTO GALERA', '1st', 7),
+        ('ROXAS', '2nd', 12), ('SAN TEODORO', '1st', 4), ('SOCORRO', '1st', 8), ('VICTORIA', '1st', 10)]),
+    'PALAWAN': (175300000, 209518, [
+        ('ABORLAN', '3rd', 8), ('AGUTAYA', '1st', 2), ('ARACELI', '1st', 3), ('BALABAC', '2nd', 9),
+        ('BATARAZA', '2nd', 16), ("BROOKE'S POINT", '2nd', 13), ('BUSUANGA', '1st', 5),
+        ('CAGAYANCILLO', '1st', 1), ('CORON', '1st', 9), ('CUYO', '1st', 4), ('DUMARAN', '1st', 5),
+        ('EL NIDO', '1st', 8), ('LINAPACAN', '1st', 3), ('MAGSAYSAY', '1st', 2), ('NARRA', '2nd', 13),
+        ('PUERTO PRINCESA CITY (Capital)', '3rd', 33), ('QUEZON', '2nd', 12), ('ROXAS', '1st', 13),
+        ('SAN VICENTE', '1st', 6), ('TAYTAY', '1st', 17), ('KALAYAAN', '1st', 1), ('CULION', '1st', 4),
+        ('RIZAL', '2nd', 11), ('SOFRONIO ESPAÑOLA', '2nd', 7)]),
+    'ROMBLON': (175900000, 59039, [
+        ('ALCANTARA', 'Lone', 3), ('BANTON', 'Lone', 1), ('CAJIDIOCAN', 'Lone', 5), ('CALATRAVA', 'Lone', 2),
+        ('CONCEPCION', 'Lone', 1), ('CORCUERA', 'Lone', 2), ('LOOC', 'Lone', 5), ('MAGDIWANG', 'Lone', 3),
+        ('ODIONGAN', 'Lone', 9), ('ROMBLON (Capital)', 'Lone', 8), ('SAN AGUSTIN', 'Lone', 5),
+        ('SAN ANDRES', 'Lone', 3), ('SAN FERNANDO', 'Lone', 5), ('SAN JOSE', 'Lone', 2),
+        ('SANTA FE', 'Lone', 3), ('FERROL', 'Lone', 2), ('SANTA MARIA', 'Lone', 2)]),
+}
+PROVINCE_POOR_RATE = {
+    'MARINDUQUE': 0.38, 'OCCIDENTAL MINDORO': 0.47, 'ORIENTAL MINDORO': 0.41, 'PALAWAN': 0.49, 'ROMBLON': 0.44
+}
+
+
+def _binned(mean, sd, low, high):
+    """Discretized normal over low..high (for counts and years of stay)"""
+    codes = np.arange(low, high + 1)
+    weights = np.exp(-0.5 * ((codes - mean) / sd) ** 2)
+    return [int(c) for c in codes], [round(float(w), 6) for w in weights / weights.sum()]
+
+
+def _yes_no(p_yes_nonpoor, p_yes_poor, loading=0.0):
+    """Yes(1)/No(2) column"""
+    return {'codes': [1, 2], 'nonpoor': [p_yes_nonpoor, 1 - p_yes_nonpoor],
+            'poor': [p_yes_poor, 1 - p_yes_poor], 'loading': loading}
+
+
+def _counts(nonpoor, poor, loading):
+    """Asset counts 0, 1, 2, ..."""
+    return {'codes': list(range(len(nonpoor))), 'nonpoor': nonpoor, 'poor': poor, 'loading': loading}
+
+
+def _default_columns():
+    # Latent factor = deprivation: positive loadings rise with poverty (higher
+    # house_type / roof / toilet codes, No(2) for electricity), assets load negatively
+    indiv_codes, indiv_nonpoor = _binned(3.9, 1.7, 1, 15)
+    _, indiv_poor = _binned(5.6, 2.0, 1, 15)
+    stay_codes, stay_nonpoor = _binned(26, 19, 0, 100)
+    _, stay_poor = _binned(22, 18, 0, 100)
+    return {
+        'n_hh': {'codes': [1, 2, 3], 'nonpoor': [0.94, 0.05, 0.01], 'poor': [0.94, 0.05, 0.01], 'loading': 0.0},
+        'l_stay': {'codes': stay_codes, 'nonpoor': stay_nonpoor, 'poor': stay_poor, 'loading': 0.0},
+        'no_sleeping_rooms': {'codes': [1, 2, 3, 4, 5], 'nonpoor': [0.52, 0.32, 0.11, 0.04, 0.01],
+                              'poor': [0.68, 0.25, 0.05, 0.015, 0.005], 'loading': -0.35},
+        'house_type': {'codes': [1, 2, 3, 4, 5], 'nonpoor': [0.95, 0.03, 0.01, 0.005, 0.005],
+                       'poor': [0.965, 0.02, 0.008, 0.004, 0.003], 'loading': 0.15},
+        'roof_mat': {'codes': [1, 2, 3, 4, 5, 6, 7], 'nonpoor': [0.55, 0.2, 0.05, 0.15, 0.02, 0.02, 0.01],
+                     'poor': [0.3, 0.2, 0.05, 0.35, 0.04, 0.04, 0.02], 'loading': 0.5},
+        'out_wall': {'codes': [1, 2, 3, 4, 5, 6, 7], 'nonpoor': [0.35, 0.3, 0.1, 0.15, 0.05, 0.03, 0.02],
+                     'poor': [0.15, 0.25, 0.12, 0.3, 0.1, 0.05, 0.03], 'loading': 0.5},
+        'tenure_status': {'codes': [1, 2, 3, 4, 5, 6, 7], 'nonpoor': [0.55, 0.15, 0.1, 0.05, 0.1, 0.03, 0.02],
+                          'poor': [0.45, 0.15, 0.12, 0.06, 0.15, 0.05, 0.02], 'loading': 0.2},
+        'has_other_property': _yes_no(0.08, 0.03, -0.2),
+        'toilet_facilities': {'codes': [1, 2, 3, 4, 5, 6, 7], 'nonpoor': [0.55, 0.25, 0.08, 0.05, 0.03, 0.02, 0.02],
+                              'poor': [0.25, 0.25, 0.12, 0.12, 0.1, 0.08, 0.08], 'loading': 0.45},
+        'has_electricity': _yes_no(0.9, 0.62, 0.55),
+        'water_supply': {'codes': [1, 2, 3, 4, 5, 6], 'nonpoor': [0.35, 0.25, 0.2, 0.1, 0.06, 0.04],
+                         'poor': [0.15, 0.2, 0.25, 0.2, 0.12, 0.08], 'loading': 0.35},
+        'radio': _counts([0.55, 0.42, 0.03], [0.65, 0.33, 0.02], -0.3),
+        'television': _counts([0.3, 0.64, 0.06], [0.62, 0.36, 0.02], -0.6),
+        'video': _counts([0.75, 0.24, 0.01], [0.9, 0.1, 0.0], -0.45),
+        'stereo': _counts([0.85, 0.15, 0.0], [0.94, 0.06, 0.0], -0.35),
+        'ref': _counts([0.55, 0.44, 0.01], [0.88, 0.12, 0.0], -0.65),
+        'wash_mach': _counts([0.7, 0.3, 0.0], [0.92, 0.08, 0.0], -0.55),
+        'aircon': _counts([0.96, 0.04, 0.0], [0.995, 0.005, 0.0], -0.4),
+        'sala_set': _counts([0.6, 0.4, 0.0], [0.82, 0.18, 0.0], -0.45),
+        'dining': _counts([0.55, 0.45, 0.0], [0.78, 0.22, 0.0], -0.45),
+        'car_jeep': _counts([0.94, 0.06, 0.0], [0.995, 0.005, 0.0], -0.45),
+        'phone': _counts([0.2, 0.5, 0.3], [0.4, 0.5, 0.1], -0.4),
+        'pc': _counts([0.85, 0.14, 0.01], [0.98, 0.02, 0.0], -0.5),
+        'microwave': _counts([0.93, 0.07, 0.0], [0.995, 0.005, 0.0], -0.45),
+        'motorcycle': _counts([0.6, 0.37, 0.03], [0.82, 0.17, 0.01], -0.4),
+        'experienced_displacement': _yes_no(0.03, 0.04),
+        'displacement_manmade': _yes_no(0.01, 0.01),
+        'displacement_armed': _yes_no(0.003, 0.005),
+        'displacement_dev_project': _yes_no(0.003, 0.003),
+        'displacement_other': _yes_no(0.01, 0.01),
+        'received_programs': _yes_no(0.35, 0.7, 0.3),
+        'received_scholarship': _yes_no(0.06, 0.08),
+        'received_day_care': _yes_no(0.1, 0.14),
+        'received_feeding': _yes_no(0.08, 0.12),
+        'received_rice': _yes_no(0.05, 0.07),
+        'received_philhealth': _yes_no(0.4, 0.5, 0.1),
+        'received_livelihood': _yes_no(0.04, 0.05),
+        'received_housing': _yes_no(0.01, 0.015),
+        'received_microedit': _yes_no(0.01, 0.015),
+        'received_self_employment': _yes_no(0.01, 0.02),
+        'received_pppp': _yes_no(0.12, 0.55, 0.3),
+        'received_cash_transfer': _yes_no(0.05, 0.08),
+        'received_other': _yes_no(0.02, 0.03),
+        'is_indigenous': _yes_no(0.1, 0.22, 0.2),
+        'indigenous_group': {'codes': [0, 1, 2, 3, 4, 5], 'nonpoor': [0.9, 0.03, 0.03, 0.02, 0.01, 0.01],
+                             'poor': [0.78, 0.07, 0.06, 0.05, 0.02, 0.02], 'loading': 0.2},
+        'respondent': {'codes': [1, 2, 3], 'nonpoor': [0.6, 0.35, 0.05], 'poor': [0.6, 0.35, 0.05], 'loading': 0.0},
+        'type_of_household_id': {'codes': [1, 2], 'nonpoor': [0.97, 0.03], 'poor': [0.97, 0.03], 'loading': 0.0},
+        'server': {'codes': [101], 'nonpoor': [1.0], 'poor': [1.0], 'loading': 0.0},
+        'poverty_status2': {'codes': [0, 1], 'nonpoor': [0.85, 0.15], 'poor': [0.45, 0.55], 'loading': 0.3},
+        'no_of_indiv': {'codes': indiv_codes, 'nonpoor': indiv_nonpoor, 'poor': indiv_poor, 'loading': 0.25},
+        'no_of_families': {'codes': [1, 2, 3], 'nonpoor': [0.9, 0.08, 0.02], 'poor': [0.86, 0.11, 0.03],
+                           'loading': 0.1},
+        'archive': {'codes': [0], 'nonpoor': [1.0], 'poor': [1.0], 'loading': 0.0},
+    }
+
+
+def default_profile():
+    """Built-in MIMAROPA profile (real PSGC hierarchy, approximate column distributions)"""
+    rng = np.random.default_rng(0)
+    barangays = {key: [] for key in ('psgc', 'province', 'psgc_province', 'municipality', 'psgc_municipality',
+                                     'name', 'district', 'households', 'poor_rate', 'urban_share')}
+    for province, (psgc_province, households, municipalities) in MIMAROPA.items():
+        total_size = sum(size for _, _, size in municipalities)
+        for m, (municipality, district, size) in enumerate(municipalities, start=1):
+            psgc_municipality = psgc_province + m * 1000
+            muni_households = households * size / total_size
+            count = int(np.clip(muni_households / 450, 8, 120))
+            # Poblacion is the largest barangay; the rest follow a Zipf-like spread
+            shares = 1 / np.arange(1, count + 1) ** 0.6
+            shares *= rng.uniform(0.6, 1.4, count)
+            shares /= shares.sum()
+            for b in range(count):
+                urban = b == 0 or rng.random() < 0.1
+                barangays['psgc'].append(psgc_municipality + b + 1)
+                barangays['province'].append(province)
+                barangays['psgc_province'].append(psgc_province)
+                barangays['municipality'].append(municipality)
+                barangays['psgc_municipality'].append(psgc_municipality)
+                barangays['name'].append('Poblacion' if b == 0 else f"Barangay {b + 1}")
+                barangays['district'].append(district)
+                barangays['households'].append(round(float(muni_households * shares[b]), 1))
+                rate = PROVINCE_POOR_RATE[province] * (0.7 if urban else 1.05) * rng.uniform(0.8, 1.2)
+                barangays['poor_rate'].append(round(float(min(rate, 0.95)), 4))
+                barangays['urban_share'].append(round(float(rng.uniform(0.6, 0.9) if urban
+                                                             else rng.uniform(0.0, 0.15)), 4))
+    return {'version': PROFILE_VERSION, 'source': 'built-in MIMAROPA defaults', 'region_name': REGION_NAME,
+            'barangays': barangays, 'columns': _default_columns()}
+
+
+def fit_profile(df, max_codes=200, correlation_sample=200000, seed=0):
+    """Fit a profile (aggregates only) from a roster DataFrame (e.g. roster_loader.load_roster)
+
+    Column distributions are tabulated per poor / non-poor class. Loadings are
+    the first principal factor of the within-class normal-score correlation
+    matrix, which is what the generator's Gaussian copula reproduces.
+    """
+    import pandas as pd
+    from scipy.special import ndtri
+
+    df = df.dropna(subset=['poor', 'psgc_barangay'])
+    poor = df['poor'].astype(int).clip(0, 1)
+
+    keys = ['psgc_barangay', 'province_name', 'psgc_province', 'city_name', 'psgc_municipality',
+            'barangay_name', 'district']
+    grouped = df.assign(_poor=poor, _urban=(df['urb_rur'] == 1).astype(float)).groupby(
+        keys, observed=True, dropna=False
+    ).agg(households=('_poor', 'size'), poor_rate=('_poor', 'mean'), urban_share=('_urban', 'mean')).reset_index()
+    barangays = {
+        'psgc': grouped['psgc_barangay'].astype(int).tolist(),
+        'province': grouped['province_name'].astype(str).tolist(),
+        'psgc_province': grouped['psgc_province'].astype(int).tolist(),
+        'municipality': grouped['city_name'].astype(str).tolist(),
+        'psgc_municipality': grouped['psgc_municipality'].astype(int).tolist(),
+        'name': grouped['barangay_name'].astype(str).tolist(),
+        'district': grouped['district'].astype(object).fillna('').astype(str).tolist(),
+        'households': grouped['households'].astype(float).tolist(),
+        'poor_rate': grouped['poor_rate'].round(4).tolist(),
+        'urban_share': grouped['urban_share'].round(4).tolist(),
+    }
+
+    columns = {}
+    for col in CODE_COLUMNS:
+        if col not in df.columns:
+            continue
+        values = df[col].astype('float64')
+        valid = values.notna()
+        counts = pd.crosstab(values[valid].astype(int), poor[valid]).reindex(columns=[0, 1], fill_value=0)
+        if len(counts) > max_codes:
+            counts = counts.loc[counts.sum(axis=1).nlargest(max_codes).index].sort_index()
+        totals = counts.sum().replace(0, 1)
+        columns[col] = {
+            'codes': [int(c) for c in counts.index],
+            'nonpoor': (counts[0] / totals[0]).round(6).tolist(),
+            'poor': (counts[1] / totals[1]).round(6).tolist(),
+            'loading': 0.0
+        }
+
+    # Normal scores within each class, so the class effect is not counted twice
+    sample = df.sample(min(len(df), correlation_sample), random_state=seed)
+    sample_poor = poor.loc[sample.index]
+    sizes = sample_poor.map(sample_poor.value_counts())
+    names = list(columns)
+    scores = np.zeros((len(sample), len(names)), dtype=np.float32)
+    for j, col in enumerate(names):
+        values = sample[col].astype('float64')
+        ranks = values.groupby(sample_poor).rank(pct=True)
+        u = (ranks - 0.5 / sizes).clip(1e-6, 1 - 1e-6).fillna(0.5)
+        scores[:, j] = ndtri(u.to_numpy())
+    with np.errstate(invalid='ignore', divide='ignore'):
+        correlation = np.nan_to_num(np.corrcoef(scores, rowvar=False))
+    np.fill_diagonal(correlation, 1.0)
+    eigenvalues, eigenvectors = np.linalg.eigh(correlation)
+    loadings = np.clip(eigenvectors[:, -1] * np.sqrt(max(eigenvalues[-1], 0.0)), -0.95, 0.95)
+    for col, loading in zip(names, loadings):
+        # Constant columns carry no correlation
+        columns[col]['loading'] = round(float(loading), 4) if len(columns[col]['codes']) > 1 else 0.0
+
+    region = df['region_name'].dropna()
+    return {'version': PROFILE_VERSION, 'source': f"fitted from {len(df)} households",
+            'region_name': str(region.iloc[0]) if len(region) else REGION_NAME,
+            'barangays': barangays, 'columns': columns}
+
+
+def load_profile(path=None):
+    if path is None:
+        return default_profile()
+    with open(path) as f:
+        profile = json.load(f)
+    if profile.get('version') != PROFILE_VERSION:
+        raise ValueError(f"Unsupported profile version {profile.get('version')} (expected {PROFILE_VERSION})")
+    return profile
+
+
+def compile_profile(profile):
+    """Arrays the chunk generator samples from"""
+    barangays = profile['barangays']
+    weights = np.asarray(barangays['households'], dtype=np.float64)
+    normal = NormalDist()
+
+    def cutpoints(probabilities, latent):
+        # Thresholds between consecutive codes, on the latent normal scale or,
+        # for columns without a loading, on a plain uniform draw
+        cumulative = np.cumsum(probabilities, dtype=np.float64)
+        cumulative = np.clip(cumulative[:-1] / cumulative[-1], 1e-12, 1 - 1e-12)
+        if not latent:
+            return cumulative.astype(np.float32)
+        return np.array([normal.inv_cdf(c) for c in cumulative], dtype=np.float32)
+
+    columns = {}
+    for col, spec in profile['columns'].items():
+        loading = float(spec.get('loading', 0.0))
+        codes = np.asarray(spec['codes'], dtype=np.int64)
+        cuts_nonpoor, cuts_poor = cutpoints(spec['nonpoor'], loading), cutpoints(spec['poor'], loading)
+        columns[col] = {
+            'codes': codes.astype(np.uint16 if codes.min() >= 0 and codes.max() < 65536 else np.int64),
+            'cuts_nonpoor': cuts_nonpoor,
+            'cut_shift': cuts_poor - cuts_nonpoor,
+            'cuts_poor': cuts_poor,
+            'same': np.array_equal(cuts_nonpoor, cuts_poor),
+            'loading': np.float32(loading),
+            'noise': np.float32(np.sqrt(1 - loading ** 2))
+        }
+    return {
+        'region_name': profile.get('region_name', REGION_NAME),
+        'cum_weight': np.cumsum(weights) / weights.sum(),
+        'poor_rate': np.asarray(barangays['poor_rate'], dtype=np.float64),
+        'urban_share': np.asarray(barangays['urban_share'], dtype=np.float64),
+        'psgc': np.asarray(barangays['psgc'], dtype=np.uint64),
+        'psgc_province': np.asarray(barangays['psgc_province'], dtype=np.uint64),
+        'psgc_municipality': np.asarray(barangays['psgc_municipality'], dtype=np.uint64),
+        'psgc_text': pa.array([str(p) for p in barangays['psgc']]),
+        'province': pa.array(barangays['province']),
+        'municipality': pa.array(barangays['municipality']),
+        'name': pa.array(barangays['name']),
+        'district': pa.array(barangays['district']),
+        'columns': columns
+    }
+
+
+def _strings(values, indices, dictionary):
+    indices = pa.array(indices.astype(np.int32))
+    return pa.DictionaryArray.from_arrays(indices, values) if dictionary else pc.take(values, indices)
+
+
+def _positions(spec, latent, poor, poor_flag, rng):
+    """Code index per household for one column"""
+    rows = len(latent)
+    if spec['loading']:
+        x = spec['loading'] * latent + spec['noise'] * rng.standard_normal(rows, dtype=np.float32)
+    else:
+        x = rng.random(rows, dtype=np.float32)
+    if len(spec['cuts_nonpoor']) > 8:
+        return np.where(poor, np.searchsorted(spec['cuts_poor'], x), np.searchsorted(spec['cuts_nonpoor'], x))
+    # Few codes: counting exceeded thresholds beats two binary searches
+    position = np.zeros(rows, dtype=np.uint8)
+    for cut, shift in zip(spec['cuts_nonpoor'], spec['cut_shift']):
+        position += x > (cut if spec['same'] else cut + shift * poor_flag)
+    return position
+
+
+def generate_chunk(compiled, index, rows, start, seed=42, schema='poverty_data', dictionary=False):
+    """Households start .. start + rows as an arrow Table
+
+    dictionary: keep repeated strings dictionary-encoded (smaller, faster Parquet).
+    """
+    rng = np.random.default_rng(np.random.SeedSequence([seed, index]))
+    barangay = np.searchsorted(compiled['cum_weight'], rng.random(rows), side='right')
+    barangay = np.minimum(barangay, len(compiled['cum_weight']) - 1)
+    poor = rng.random(rows) < compiled['poor_rate'][barangay]
+    urb_rur = np.where(rng.random(rows) < compiled['urban_share'][barangay], 1, 2).astype(np.uint8)
+    latent = rng.standard_normal(rows, dtype=np.float32)
+
+    poor_flag = poor.astype(np.float32)
+    # Only the code columns the schema holds are drawn
+    wanted = POVERTY_DATA_TYPES if schema == 'poverty_data' else ROSTER_COLUMNS
+    codes = {col: spec['codes'][_positions(spec, latent, poor, poor_flag, rng)]
+             for col, spec in compiled['columns'].items() if col in wanted}
+
+    serial = pc.utf8_lpad(pa.array(np.arange(start, start + rows, dtype=np.int64)).cast(pa.string()), 8, '0')
+    hh_id = pc.binary_join_element_wise(
+        pc.take(compiled['psgc_text'], pa.array(barangay.astype(np.int32))),
+        pa.array(urb_rur).cast(pa.string()), serial, '-'
+    )
+    purok = rng.choice(len(PUROK_SITIO), size=rows, p=PUROK_SITIO_WEIGHTS)
+    poor_int = poor.astype(np.uint8)
+
+    columns = {
+        'hh_id': hh_id,
+        'region_name': pa.repeat(compiled['region_name'], rows),
+        'province_name': _strings(compiled['province'], barangay, dictionary),
+        'city_name': _strings(compiled['municipality'], barangay, dictionary),
+        'barangay_name': _strings(compiled['name'], barangay, dictionary),
+        'psgc_province': pa.array(compiled['psgc_province'][barangay]),
+        'psgc_municipality': pa.array(compiled['psgc_municipality'][barangay]),
+        'psgc_barangay': pa.array(compiled['psgc'][barangay]),
+        'district': _strings(compiled['district'], barangay, dictionary),
+        'urb_rur': pa.array(urb_rur),
+        'purok_sitio': _strings(pa.array(PUROK_SITIO), purok, dictionary),
+        'poor': pa.array(poor_int),
+        'poverty_status': _strings(pa.array([POVERTY_STATUS[0], POVERTY_STATUS[1]]), poor_int, dictionary),
+    }
+
+    if schema == 'poverty_data':
+        for col, arrow_type in POVERTY_DATA_TYPES.items():
+            if col in columns:
+                continue
+            values = codes.get(col, np.zeros(rows, dtype=np.int64))
+            if col in POVERTY_DATA_BINARY:
+                values = values != 2
+            columns[col] = pa.array(values.astype(arrow_type.to_pandas_dtype()))
+        return pa.table({col: columns[col] for col in POVERTY_DATA_TYPES})
+
+    empty = pa.repeat('', rows)
+    for col in ROSTER_COLUMNS:
+        if col not in columns:
+            columns[col] = pa.array(codes[col]) if col in codes else empty
+    return pa.table({col: columns[col] for col in ROSTER_COLUMNS})
+
+
+# Per-process state, set once by the pool initializer
+_worker = {}
+
+
+def _init_worker(profile, options):
+    _worker['compiled'] = compile_profile(profile)
+    _worker['options'] = options
+    if options['clickhouse']:
+        import clickhouse_connect
+        _worker['client'] = clickhouse_connect.get_client(
+            host=os.getenv('CLICKHOUSE_HOST', 'localhost'),
+            port=int(os.getenv('CLICKHOUSE_PORT', 8123)),
+            username=os.getenv('CLICKHOUSE_USER', 'admin'),
+            password=os.getenv('CLICKHOUSE_PASSWORD', 'admin123'),
+            database=os.getenv('CLICKHOUSE_DB', 'poverty_db')
+        )
+
+
+def _write_chunk(index, rows, start):
+    """Generate one chunk and write or insert it; runs in a worker process"""
+    options = _worker['options']
+    to_file = not options['clickhouse']
+    table = generate_chunk(_worker['compiled'], index, rows, start, options['seed'], options['schema'],
+                           dictionary=to_file and options['format'] == 'parquet')
+
+    if options['clickhouse']:
+        if options['schema'] == 'dswd_roster':
+            # dswd_roster stores every column as String (see ingest_to_clickhouse_fixed.py)
+            table = pa.table({name: table[name].cast(pa.string()) for name in table.column_names})
+        _worker['client'].insert_arrow(options['table'], table)
+        return rows
+
+    path = os.path.join(options['output_dir'], f"part-{index:05d}.{options['format']}")
+    if options['format'] == 'parquet':
+        import pyarrow.parquet as pq
+        pq.write_table(table, path, compression='zstd')
+    else:
+        import pyarrow.csv as pa_csv
+        pa_csv.write_csv(table, path)
+    return rows
+
+
+def generate(rows, profile, schema='poverty_data', fmt='parquet', output_dir='data/synthetic',
+             clickhouse=False, table=None, chunk_rows=500000, workers=None, seed=42):
+    """Generate `rows` households in parallel chunks; returns rows written"""
+    options = {'schema': schema, 'format': fmt, 'output_dir': output_dir, 'clickhouse': clickhouse,
+               'table': table or schema, 'seed': seed}
+    if clickhouse:
+        _ensure_table(options['table'], schema)
+    else:
+        os.makedirs(output_dir, exist_ok=True)
+
+    chunks = [(i, min(chunk_rows, rows - start), start) for i, start in enumerate(range(0, rows, chunk_rows))]
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    written = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(profile, options)) as pool:
+        futures = [pool.submit(_write_chunk, *chunk) for chunk in chunks]
+        for future in as_completed(futures):
+            written += future.result()
+            elapsed = time.perf_counter() - started
+            print(f"  {written:,}/{rows:,} rows ({written / max(elapsed, 1e-9):,.0f} rows/s)")
+    return written
+
+
+def _ensure_table(table, schema):
+    """dswd_roster is created on demand; poverty_data comes from database/init"""
+    if schema != 'dswd_roster':
+        return
+    import clickhouse_connect
+    from ingest_to_clickhouse_fixed import create_clickhouse_table
+    client = clickhouse_connect.get_client(
+        host=os.getenv('CLICKHOUSE_HOST', 'localhost'),
+        port=int(os.getenv('CLICKHOUSE_PORT', 8123)),
+        username=os.getenv('CLICKHOUSE_USER', 'admin'),
+        password=os.getenv('CLICKHOUSE_PASSWORD', 'admin123'),
+        database=os.getenv('CLICKHOUSE_DB', 'poverty_db')
+    )
+    create_clickhouse_table(client, table)
+
+
+def parse_rows(text):
+    text = text.lower().replace('_', '')
+    multiplier = {'k': 1_000, 'm': 1_000_000}.get(text[-1], 1)
+    return int(float(text.rstrip('km')) * multiplier)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic household roster")
+    parser.add_argument('--rows', default='1m', help="Households to generate, e.g. 500k, 10m")
+    parser.add_argument('--schema', choices=['poverty_data', 'dswd_roster'], default='poverty_data')
+    parser.add_argument('--format', choices=['parquet', 'csv'], default='parquet')
+    parser.add_argument('--output-dir', default=os.path.join('data', 'synthetic'))
+    parser.add_argument('--clickhouse', action='store_true',
+                        help="Insert into ClickHouse (CLICKHOUSE_* env vars) instead of writing files")
+    parser.add_argument('--table', default=None, help="Target table (default: the schema name)")
+    parser.add_argument('--chunk-rows', type=int, default=500000)
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: all CPUs)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--profile', default=None, help="Profile JSON (default: built-in MIMAROPA profile)")
+    parser.add_argument('--fit', metavar='CSV', help="Fit a profile from the real roster CSV and exit")
+    parser.add_argument('--profile-out', default=os.path.join('data', 'roster_profile.json'))
+    args = parser.parse_args()
+
+    if args.fit:
+        from roster_loader import load_roster
+        print(f"Fitting profile from {args.fit}...")
+        df = load_roster(args.fit, columns=ROSTER_COLUMNS)
+        profile = fit_profile(df)
+        os.makedirs(os.path.dirname(os.path.abspath(args.profile_out)), exist_ok=True)
+        with open(args.profile_out, 'w') as f:
+            json.dump(profile, f)
+        print(f"Profile ({len(profile['barangays']['psgc'])} barangays, {len(profile['columns'])} columns) "
+              f"saved to {args.profile_out}")
+        return
+
+    rows = parse_rows(args.rows)
+    profile = load_profile(args.profile)
+    target = f"ClickHouse table {args.table or args.schema}" if args.clickhouse else args.output_dir
+    print(f"Generating {rows:,} {args.schema} rows ({profile['source']}, seed {args.seed}) -> {target}")
+    started = time.perf_counter()
+    written = generate(rows, profile, args.schema, args.format, args.output_dir, args.clickhouse, args.table,
+                       args.chunk_rows, args.workers, args.seed)
+    elapsed = time.perf_counter() - started
+    print(f"Done: {written:,} rows in {elapsed:.1f}s ({written / max(elapsed, 1e-9):,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    main()
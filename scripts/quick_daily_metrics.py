@@ -4,9 +4,17 @@ Quick Daily Metrics Analysis for L2_dec_roster.csv
 Simplified version for quick analysis and testing.
 """
 
-import pandas as pd
 import matplotlib.pyplot as plt
-from datetime import datetime, timedelta
+from datetime import datetime
+from metrics_engine import Metric, assign_pseudo_dates, compute_metrics, metric_columns
+from roster_loader import load_roster
+
+QUICK_METRICS = [
+    Metric('poverty_rate', 'rate', 'poor'),
+    Metric('avg_household_size', 'mean', 'no_of_indiv'),
+    Metric('electricity_rate', 'rate', 'has_electricity'),
+    Metric('program_rate', 'rate', 'received_programs'),
+]
 
 def quick_daily_analysis(csv_path, days_back=7):
     """Quick daily metrics analysis."""
@@ -15,37 +23,15 @@ def quick_daily_analysis(csv_path, days_back=7):
     
     # Load data
     print("📊 Loading data...")
-    df = pd.read_csv(csv_path)
+    df = load_roster(csv_path, columns=metric_columns(QUICK_METRICS))
     print(f"✅ Loaded {len(df):,} records")
     
-    # Create daily metrics
-    daily_data = []
-    end_date = datetime.now()
-    
-    for i in range(days_back):
-        date = end_date - timedelta(days=i)
-        
-        # Sample data for each day (in real scenario, you'd filter by actual dates)
-        sample_size = min(500, len(df))
-        daily_sample = df.sample(n=sample_size, random_state=int(date.timestamp()))
-        
-        # Calculate key metrics
-        poverty_rate = (daily_sample['poverty_status'].str.contains('Poor').sum() / len(daily_sample)) * 100
-        avg_household_size = daily_sample['no_of_indiv'].mean()
-        electricity_rate = (daily_sample['has_electricity'] == 1).sum() / len(daily_sample) * 100
-        program_rate = (daily_sample['received_programs'] == 1).sum() / len(daily_sample) * 100
-        
-        daily_data.append({
-            'date': date.strftime('%Y-%m-%d'),
-            'poverty_rate': round(poverty_rate, 2),
-            'avg_household_size': round(avg_household_size, 2),
-            'electricity_rate': round(electricity_rate, 2),
-            'program_rate': round(program_rate, 2)
-        })
-    
-    # Create DataFrame
-    daily_df = pd.DataFrame(daily_data)
-    daily_df = daily_df.sort_values('date')
+    # Create daily metrics: one vectorized pass over all days
+    # (in real scenario, you'd group by actual survey dates)
+    dated = assign_pseudo_dates(df, days_back=days_back - 1)
+    daily_df = compute_metrics(dated, QUICK_METRICS, group_by=['date'])
+    daily_df['date'] = daily_df['date'].dt.strftime('%Y-%m-%d')
+    daily_df = daily_df.drop(columns='total_households').round(2)
     
     # Display results
     print("\n📈 DAILY METRICS SUMMARY:")
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Shared, memory-efficient loader for L2_dec_roster.csv.
+
+- Reads only the requested columns (usecols projection).
+- Applies an explicit dtype map: survey codes become nullable UInt8/UInt16,
+  geographic names become categoricals.
+- Optionally parses with the pyarrow engine.
+- Caches the converted frame as Parquet/Feather next to the CSV, keyed on
+  the source file's size, mtime and a content hash, so repeat runs skip
+  CSV parsing entirely.
+"""
+
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+# Bump when ROSTER_DTYPES changes so old caches are not reused
+DTYPE_MAP_VERSION = 1
+
+CATEGORY_COLUMNS = [
+    'region_name', 'province_name', 'city_name', 'barangay_name', 'district',
+    'poverty_status', 'indigenous_group',
+]
+
+ROSTER_DTYPES = {
+    **{col: 'category' for col in CATEGORY_COLUMNS},
+    'hh_id': 'string',
+    'psgc_province': 'UInt32',
+    'psgc_municipality': 'UInt32',
+    'psgc_barangay': 'UInt32',
+    'l_stay': 'UInt16',
+    'n_hh': 'UInt16',
+    # Everything else the analysis scripts read is a small survey code/count
+    **{col: 'UInt8' for col in [
+        'urb_rur', 'no_of_indiv', 'no_of_families', 'no_sleeping_rooms', 'house_type',
+        'roof_mat', 'out_wall', 'tenure_status', 'toilet_facilities', 'has_electricity',
+        'water_supply', 'radio', 'television', 'video', 'stereo', 'ref', 'wash_mach',
+        'aircon', 'sala_set', 'dining', 'car_jeep', 'phone', 'pc', 'microwave', 'motorcycle',
+        'experienced_displacement', 'is_indigenous', 'received_programs',
+        'received_scholarship', 'received_day_care', 'received_feeding', 'received_rice',
+        'received_philhealth', 'received_livelihood', 'received_housing',
+        'received_microedit', 'received_self_employment', 'received_pppp',
+        'received_cash_transfer', 'received_other', 'poverty_status2', 'poor',
+    ]},
+}
+
+_INT_RANGES = {'UInt8': 255, 'UInt16': 65535, 'UInt32': 4294967295}
+_ENCODINGS = ['utf-8', 'latin-1', 'cp1252']
+
+
+def _source_fingerprint(csv_path, sample_bytes=1 << 20):
+    """Cheap content key: size, mtime and a hash of the first/last MiB."""
+    stat = os.stat(csv_path)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{stat.st_size}|{stat.st_mtime_ns}".encode())
+    with open(csv_path, 'rb') as f:
+        digest.update(f.read(sample_bytes))
+        if stat.st_size > sample_bytes:
+            f.seek(max(stat.st_size - sample_bytes, sample_bytes))
+            digest.update(f.read(sample_bytes))
+    return digest.hexdigest()
+
+
+def _cache_path(csv_path, columns, cache_dir, cache_format):
+    key = hashlib.blake2b(digest_size=8)
+    key.update(_source_fingerprint(csv_path).encode())
+    key.update(f"|{DTYPE_MAP_VERSION}|{','.join(columns)}".encode())
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(cache_dir, f"{stem}-{key.hexdigest()}.{cache_format}")
+
+
+def _apply_dtypes(df):
+    """Downcast numeric columns to the mapped nullable ints (coercing junk to NA)."""
+    for col, dtype in ROSTER_DTYPES.items():
+        if col not in df.columns or dtype not in _INT_RANGES:
+            continue
+        values = pd.to_numeric(df[col], errors='coerce')
+        in_range = values.isna() | ((values >= 0) & (values <= _INT_RANGES[dtype]) & (values % 1 == 0))
+        if in_range.all():
+            df[col] = values.astype(dtype)
+        else:
+            # Out-of-range codes: keep the values rather than wrap them
+            df[col] = values.astype(np.float32)
+    return df
+
+
+def _read_csv(csv_path, columns, engine):
+    parse_dtypes = {
+        col: dtype for col, dtype in ROSTER_DTYPES.items()
+        if col in columns and dtype in ('category', 'string')
+    }
+    for encoding in _ENCODINGS:
+        try:
+            return pd.read_csv(csv_path, usecols=columns, dtype=parse_dtypes,
+                               engine=engine, encoding=encoding)
+        except UnicodeDecodeError:
+            continue
+    raise ValueError(f"Could not decode {csv_path} as any of {_ENCODINGS}")
+
+
+def load_roster(csv_path, columns=None, engine='c', cache_dir=None, cache_format='parquet'):
+    """Load the roster CSV with a compact dtype map and an on-disk cache.
+
+    columns: only these columns are read (missing ones are skipped).
+    engine: 'c' or 'pyarrow' (multi-threaded parser).
+    cache_dir: where converted copies live (default: .cache next to the CSV);
+               pass False to disable caching.
+    cache_format: 'parquet' or 'feather'.
+    """
+    header = pd.read_csv(csv_path, nrows=0, encoding='latin-1').columns
+    usecols = [c for c in header if columns is None or c in set(columns)]
+
+    cache_path = None
+    if cache_dir is not False:
+        cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.abspath(csv_path)), '.cache')
+        cache_path = _cache_path(csv_path, usecols, cache_dir, cache_format)
+        if os.path.exists(cache_path):
+            print(f"Loading cached {cache_format}: {cache_path}")
+            if cache_format == 'feather':
+                return pd.read_feather(cache_path)
+            return pd.read_parquet(cache_path)
+
+    df = _apply_dtypes(_read_csv(csv_path, usecols, engine))
+
+    if cache_path:
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            if cache_format == 'feather':
+                df.to_feather(cache_path)
+            else:
+                df.to_parquet(cache_path, index=False)
+            print(f"Cached converted roster: {cache_path}")
+        except ImportError:
+            print("pyarrow not installed; skipping roster cache")
+
+    return df
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Parallel, partition-aware snapshot and restore of the ClickHouse database.
+
+Replaces export_db.sh / restore_db.sh (one CSV stream of poverty_data only).
+Every MergeTree table in the database is exported, one file per partition,
+several partitions at a time:
+- native (default): ClickHouse Native format, compressed with ZSTD here,
+  as {table}/{partition_id}.native.zst. On restore the compressed file is
+  sent as is (Content-Encoding: zstd), so the server decompresses and
+  reads Native blocks directly: no text parsing anywhere.
+- parquet: Parquet with ZSTD column compression done by the server, as
+  {table}/{partition_id}.parquet. Readable by pandas/pyarrow/DuckDB.
+
+manifest.json records:
+- each table's DDL and row count;
+- each partition's file, size, row count and SHA-256;
+- the views' DDL.
+It is written last, so a directory without one is an incomplete snapshot.
+
+Restore:
+1. Verify every checksum before touching the database.
+2. Create the tables (refusing non-empty ones unless --truncate).
+3. Detach the target database's materialized views, so restoring a source
+   table does not write a second copy of rows into their (also restored)
+   target tables; they are attached again however the restore ends.
+4. Load partitions concurrently.
+5. Compare per-partition row counts with the manifest.
+6. Create the snapshot's views last, for the same reason.
+
+Row counts come from system.parts when the snapshot starts, so snapshot
+while nothing is writing (restore reports any mismatch). Each worker holds
+one partition in memory while exporting it: lower --workers for very large
+partitions.
+
+Connection settings come from CLICKHOUSE_HOST/PORT/USER/PASSWORD/DB.
+
+Usage:
+    python scripts/snapshot_db.py snapshot                          # database/snapshots/<timestamp>
+    python scripts/snapshot_db.py snapshot --format parquet --tables poverty_data poverty_predictions
+    python scripts/snapshot_db.py verify database/snapshots/20261019_120000
+    python scripts/snapshot_db.py restore database/snapshots/20261019_120000 --workers 8
+    python scripts/snapshot_db.py restore database/snapshots/20261019_120000 --database poverty_copy --truncate
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import clickhouse_connect
+import zstandard
+
+MANIFEST = 'manifest.json'
+FORMATS = {
+    'native': {'clickhouse_format': 'Native', 'suffix': '.native.zst'},
+    'parquet': {'clickhouse_format': 'Parquet', 'suffix': '.parquet'}
+}
+CHUNK_BYTES = 4 * 1024 * 1024
+
+_local = threading.local()
+
+
+def get_client(database: str = None):
+    """One client per thread: a client runs one query at a time"""
+    database = database or os.getenv('CLICKHOUSE_DB', 'poverty_db')
+    clients = getattr(_local, 'clients', None)
+    if clients is None:
+        clients = _local.clients = {}
+    if database not in clients:
+        clients[database] = clickhouse_connect.get_client(
+            host=os.getenv('CLICKHOUSE_HOST', 'localhost'),
+            port=int(os.getenv('CLICKHOUSE_PORT', 8123)),
+            username=os.getenv('CLICKHOUSE_USER', 'admin'),
+            password=os.getenv('CLICKHOUSE_PASSWORD', 'admin123'),
+            database=database
+        )
+    return clients[database]
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_BYTES), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def run_parallel(func, items, workers: int, label: str):
+    """Apply func to items on a thread pool, printing progress; returns the results in order"""
+    started = time.perf_counter()
+    results = [None] * len(items)
+    done = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(func, item): index for index, item in enumerate(items)}
+        for future in futures:
+            results[futures[future]] = future.result()
+            done += 1
+            print(f"  {label}: {done}/{len(items)}", end='\r', flush=True)
+    print(f"  {label}: {len(items)} in {time.perf_counter() - started:.1f}s" + ' ' * 10)
+    return results
+
+
+# ---------------------------------------------------------------- snapshot
+
+def list_objects(database: str, tables=None):
+    """(MergeTree tables, views) of the database as dicts with name, engine and DDL"""
+    client = get_client(database)
+    rows = client.query(
+        "SELECT name, engine, create_table_query FROM system.tables "
+        "WHERE database = {db:String} AND NOT is_temporary AND NOT startsWith(name, '.inner') ORDER BY name",
+        parameters={'db': database}
+    ).result_rows
+    found, views = [], []
+    for name, engine, ddl in rows:
+        entry = {'name': name, 'engine': engine, 'create': ddl}
+        if engine in ('View', 'MaterializedView'):
+            views.append(entry)
+        elif engine.endswith('MergeTree'):
+            found.append(entry)
+        else:
+            print(f"Skipping {name} ({engine}): only MergeTree tables are snapshotted")
+    if tables:
+        missing = set(tables) - {t['name'] for t in found}
+        if missing:
+            sys.exit(f"Not MergeTree tables of {database}: {', '.join(sorted(missing))}")
+        found = [t for t in found if t['name'] in tables]
+        views = []  # A partial snapshot does not recreate views over tables it may not have
+    return found, views
+
+
+def list_partitions(database: str, table: str):
+    return get_client(database).query(
+        "SELECT partition, partition_id, sum(rows) FROM system.parts "
+        "WHERE database = {db:String} AND table = {table:String} AND active "
+        "GROUP BY partition, partition_id ORDER BY partition_id",
+        parameters={'db': database, 'table': table}
+    ).result_rows
+
+
+def export_partition(task):
+    database, table, partition, output_dir, fmt, level = task
+    spec = FORMATS[fmt]
+    relative = os.path.join(table, f"{partition['partition_id']}{spec['suffix']}")
+    path = os.path.join(output_dir, relative)
+
+    settings = {'output_format_parquet_compression_method': 'zstd'} if fmt == 'parquet' else None
+    data = get_client(database).raw_query(
+        f"SELECT * FROM {table} WHERE _partition_id = {{pid:String}}",
+        parameters={'pid': partition['partition_id']}, settings=settings, fmt=spec['clickhouse_format']
+    )
+    if fmt == 'native':
+        data = zstandard.ZstdCompressor(level=level).compress(data)
+
+    with open(path + '.tmp', 'wb') as f:
+        f.write(data)
+    os.replace(path + '.tmp', path)
+    return {**partition, 'file': relative, 'bytes': len(data), 'sha256': hashlib.sha256(data).hexdigest()}
+
+
+def snapshot(args):
+    database = args.database or os.getenv('CLICKHOUSE_DB', 'poverty_db')
+    output_dir = args.output or os.path.join('database', 'snapshots', datetime.now().strftime('%Y%m%d_%H%M%S'))
+    if os.path.exists(os.path.join(output_dir, MANIFEST)):
+        sys.exit(f"{output_dir} already holds a snapshot")
+
+    tables, views = list_objects(database, args.tables)
+    print(f"Snapshot of {database}: {len(tables)} tables -> {output_dir} ({args.format})")
+
+    tasks, manifest_tables = [], {}
+    for table in tables:
+        os.makedirs(os.path.join(output_dir, table['name']), exist_ok=True)
+        partitions = [
+            {'partition': str(partition), 'partition_id': partition_id, 'rows': int(rows)}
+            for partition, partition_id, rows in list_partitions(database, table['name'])
+        ]
+        manifest_tables[table['name']] = {
+            'engine': table['engine'], 'create': table['create'],
+            'rows': sum(p['rows'] for p in partitions), 'partitions': []
+        }
+        tasks += [(database, table['name'], p, output_dir, args.format, args.level) for p in partitions]
+        print(f"  {table['name']}: {manifest_tables[table['name']]['rows']:,} rows in {len(partitions)} partitions")
+
+    started = time.perf_counter()
+    for task, exported in zip(tasks, run_parallel(export_partition, tasks, args.workers, 'partitions')):
+        manifest_tables[task[1]]['partitions'].append(exported)
+
+    manifest = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'database': database,
+        'format': args.format,
+        'tables': manifest_tables,
+        'views': [{'name': v['name'], 'engine': v['engine'], 'create': v['create']} for v in views]
+    }
+    with open(os.path.join(output_dir, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    total_bytes = sum(p['bytes'] for t in manifest_tables.values() for p in t['partitions'])
+    total_rows = sum(t['rows'] for t in manifest_tables.values())
+    elapsed = time.perf_counter() - started
+    print(f"Snapshot complete: {total_rows:,} rows, {total_bytes / 1e6:.1f} MB in {elapsed:.1f}s "
+          f"({total_bytes / 1e6 / max(elapsed, 1e-9):.1f} MB/s)")
+
+
+# ---------------------------------------------------------------- restore
+
+def load_manifest(input_dir: str) -> dict:
+    path = os.path.join(input_dir, MANIFEST)
+    if not os.path.exists(path):
+        sys.exit(f"No {MANIFEST} in {input_dir} (missing or incomplete snapshot)")
+    with open(path) as f:
+        return json.load(f)
+
+
+def verify_files(input_dir: str, manifest: dict, workers: int, tables=None) -> bool:
+    """Check every partition file against its recorded size and SHA-256"""
+    entries = [
+        p for name, table in manifest['tables'].items() if not tables or name in tables
+        for p in table['partitions']
+    ]
+
+    def check(partition):
+        path = os.path.join(input_dir, partition['file'])
+        if not os.path.exists(path):
+            return f"{partition['file']}: missing"
+        if os.path.getsize(path) != partition['bytes']:
+            return f"{partition['file']}: size {os.path.getsize(path)} != {partition['bytes']}"
+        if file_sha256(path) != partition['sha256']:
+            return f"{partition['file']}: checksum mismatch"
+        return None
+
+    errors = [e for e in run_parallel(check, entries, workers, 'checksums') if e]
+    for error in errors:
+        print(f"  BAD {error}")
+    return not errors
+
+
+def retarget(ddl: str, source_db: str, target_db: str) -> str:
+    """DDL of the snapshot database rewritten for the target database, made idempotent"""
+    ddl = re.sub(rf'\b{re.escape(source_db)}\.', f'{target_db}.', ddl)
+    return re.sub(r'^CREATE (TABLE|VIEW|MATERIALIZED VIEW) ', r'CREATE \1 IF NOT EXISTS ', ddl)
+
+
+def detach_materialized_views(database: str) -> list:
+    """Detach every materialized view of the database; returns their names"""
+    client = get_client(database)
+    names = [row[0] for row in client.query(
+        "SELECT name FROM system.tables WHERE database = {db:String} AND engine = 'MaterializedView'",
+        parameters={'db': database}
+    ).result_rows]
+    for name in names:
+        client.command(f"DETACH TABLE {name}")
+    return names
+
+
+def load_partition(task):
+    input_dir, database, table, partition, fmt = task
+    spec = FORMATS[fmt]
+    with open(os.path.join(input_dir, partition['file']), 'rb') as f:
+        get_client(database).raw_insert(
+            table, insert_block=f, fmt=spec['clickhouse_format'],
+            # Keep unmerged rows of Replacing/Collapsing tables as they were, so counts match
+            settings={'optimize_on_insert': 0},
+            compression='zstd' if fmt == 'native' else None
+        )
+
+
+def restore(args):
+    manifest = load_manifest(args.input)
+    source_db = manifest['database']
+    database = args.database or source_db
+    tables = {name: t for name, t in manifest['tables'].items() if not args.tables or name in args.tables}
+    print(f"Restore of {source_db} ({manifest['created_at']}, {manifest['format']}) into {database}")
+
+    if not verify_files(args.input, manifest, args.workers, tables):
+        sys.exit("Checksum verification failed; nothing was restored")
+
+    admin = get_client('default')
+    admin.command(f"CREATE DATABASE IF NOT EXISTS {database}")
+    client = get_client(database)
+    for name, table in tables.items():
+        client.command(retarget(table['create'], source_db, database))
+        existing = client.query(f"SELECT count() FROM {name}").result_rows[0][0]
+        if existing:
+            if not args.truncate:
+                sys.exit(f"{database}.{name} already has {existing:,} rows (use --truncate to replace them)")
+            client.command(f"TRUNCATE TABLE {name}")
+
+    tasks = [
+        (args.input, database, name, partition, manifest['format'])
+        for name, table in tables.items() for partition in table['partitions']
+    ]
+    # E.g. poverty_data_sampled_mv would add every restored poverty_data row to the
+    # restored poverty_data_sampled a second time
+    detached = detach_materialized_views(database)
+    if detached:
+        print(f"  {len(detached)} materialized views detached while loading")
+    try:
+        started = time.perf_counter()
+        run_parallel(load_partition, tasks, args.workers, 'partitions')
+        elapsed = time.perf_counter() - started
+
+        mismatches = []
+        for name, table in tables.items():
+            counts = dict(client.query(
+                f"SELECT _partition_id, count() FROM {name} GROUP BY _partition_id"
+            ).result_rows)
+            for partition in table['partitions']:
+                loaded = counts.get(partition['partition_id'], 0)
+                if loaded != partition['rows']:
+                    mismatches.append(f"{name} partition {partition['partition']}: {loaded:,} rows, "
+                                      f"snapshot has {partition['rows']:,}")
+            print(f"  {name}: {sum(counts.values()):,} rows")
+    finally:
+        for name in detached:
+            client.command(f"ATTACH TABLE {name}")
+
+    if not args.tables:
+        for view in manifest['views']:
+            client.command(retarget(view['create'], source_db, database))
+        if manifest['views']:
+            print(f"  {len(manifest['views'])} views created")
+
+    total_bytes = sum(p['bytes'] for t in tables.values() for p in t['partitions'])
+    print(f"Restore loaded {total_bytes / 1e6:.1f} MB in {elapsed:.1f}s "
+          f"({total_bytes / 1e6 / max(elapsed, 1e-9):.1f} MB/s)")
+    if mismatches:
+        for mismatch in mismatches:
+            print(f"  MISMATCH {mismatch}")
+        sys.exit(1)
+    print("Row counts match the snapshot")
+
+
+def verify(args):
+    manifest = load_manifest(args.input)
+    print(f"Verifying snapshot of {manifest['database']} ({manifest['created_at']})")
+    if not verify_files(args.input, manifest, args.workers):
+        sys.exit(1)
+    print("All checksums match")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Partition-parallel snapshot and restore of ClickHouse tables")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    p = commands.add_parser('snapshot', help="Export every table, one file per partition")
+    p.add_argument('--output', default=None, help="Directory (default: database/snapshots/<timestamp>)")
+    p.add_argument('--database', default=None, help="Source database (default: CLICKHOUSE_DB)")
+    p.add_argument('--tables', nargs='+', default=None, help="Only these tables (views are then skipped)")
+    p.add_argument('--format', choices=list(FORMATS), default='native')
+    p.add_argument('--level', type=int, default=3, help="ZSTD level for native files")
+    p.add_argument('--workers', type=int, default=4, help="Partitions exported concurrently")
+    p.set_defaults(func=snapshot)
+
+    p = commands.add_parser('restore', help="Verify and load a snapshot")
+    p.add_argument('input', help="Snapshot directory")
+    p.add_argument('--database', default=None, help="Target database (default: the snapshot's)")
+    p.add_argument('--tables', nargs='+', default=None, help="Only these tables (views are then skipped)")
+    p.add_argument('--truncate', action='store_true', help="Replace rows already in the target tables")
+    p.add_argument('--workers', type=int, default=4, help="Partitions loaded concurrently")
+    p.set_defaults(func=restore)
+
+    p = commands.add_parser('verify', help="Check a snapshot's files against its manifest")
+    p.add_argument('input', help="Snapshot directory")
+    p.add_argument('--workers', type=int, default=4)
+    p.set_defaults(func=verify)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,17 @@
+import os
+import sys
 import pandas as pd
+import numpy as np
 import pickle
 from sklearn.svm import SVC
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
 
+# Shared feature pipeline, so training encodes exactly like the API serves
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+from app.ml.features import attach_feature_spec, build_feature_spec
+
 print("Loading data...")
 # Try different encodings
 try:
@@ -15,38 +22,23 @@ except UnicodeDecodeError:
     except:
         df = pd.read_csv('../data/L2_dec_roster.csv', encoding='cp1252')
 
-# MVP Features (simplified)
-selected_features = [
-    'province_name',  # Categorical
-    'urb_rur',
-    'no_of_indiv',
-    'no_sleeping_rooms',
-    'house_type',
-    'has_electricity',
-    'television',
-    'ref',
-    'motorcycle'
-]
-
-# Prepare data
-X = df[selected_features].copy()
+# The spec refuses provinces it was not built with, and a missing one is no province
+missing_province = df['province_name'].isna()
+if missing_province.any():
+    print(f"Dropping {missing_province.sum()} rows without a province_name")
+    df = df[~missing_province]
+
+# MVP Features (simplified): province, location, household size and assets.
+# Column order and encodings (province label, has_electricity 1/2 -> 1/0,
+# missing numeric answers -> 0) come from the shared feature spec.
+spec = build_feature_spec(df['province_name'].unique())
+X = spec.transform({col: df[col].to_numpy() for col in spec.columns})
 y = df['poverty_status2']
 
-# Encode province_name
 province_encoder = LabelEncoder()
-X['province_name_encoded'] = province_encoder.fit_transform(X['province_name'])
-X = X.drop('province_name', axis=1)
-
-# Normalize binary fields
-binary_cols = ['has_electricity']
-for col in binary_cols:
-    if col in X.columns:
-        X[col] = X[col].apply(lambda x: 0 if x == 2 else 1)
+province_encoder.classes_ = np.array(spec.features[0].categories)
 
-# Handle missing values
-X = X.fillna(0)
-
-print(f"Dataset: {len(X)} samples, {len(X.columns)} features")
+print(f"Dataset: {len(X)} samples, {len(spec.columns)} features")
 print(f"Poverty rate: {y.mean():.2%}")
 
 # Split data
@@ -80,11 +72,12 @@ model_data = {
     'model': svm,
     'scaler': scaler,
     'province_encoder': province_encoder,
-    'features': selected_features,
     'accuracy': accuracy,
     'version': 'svm_mvp_v1.0'
 }
 
+attach_feature_spec(model_data, spec)
+
 with open('../backend/models/svm_poverty_predictor.pkl', 'wb') as f:
     pickle.dump(model_data, f)
 